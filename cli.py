@@ -21,7 +21,7 @@ import platform
 import atexit
 import logging
 import signal
-from config.global_variables import agents_dir
+from src.storage import get_storage
 from src.workflow.polish_task import polish_agent
 import traceback
 
@@ -1005,6 +1005,15 @@ async def list_default_tools(ctx):
         stream_print(table)
 
 
+@cli.command(name="cache-stats")
+@click.pass_context
+def cache_stats(ctx):
+    """Show hit/miss/eviction counters of the caches, pools and limiters"""
+    server = ctx.obj['server']
+    stats = json.dumps(server._cache_stats(), indent=2, ensure_ascii=False, default=str)
+    stream_print(Syntax(stats, "json", theme="monokai", line_numbers=False))
+
+
 @cli.command()
 @click.pass_context
 @click.option('--agent-name', '-n', required=True, help='Name of the Agent to edit')
@@ -1135,13 +1144,11 @@ async def run_polish(ctx, user_id, match, interactive):
                     )
                     agent_to_edit = agents[int(agent_choice_idx_str) - 1].agent_name
 
-                    agent_path = agents_dir / f"{agent_to_edit}.json"
-                    if not agent_path.exists():
+                    json_str = get_storage().load_agent(agent_to_edit)
+                    if json_str is None:
                         raise FileNotFoundError(f"agent {agent_to_edit} not found.")
-                    with open(agent_path, "r") as f:
-                        json_str = f.read()
-                        _agent = Agent.model_validate_json(json_str)
-                        config = json.loads(json_str)
+                    _agent = Agent.model_validate_json(json_str)
+                    config = json.loads(json_str)
 
                     show_agent_config(config)
                     stop_tools_or_prompt = False
@@ -1566,6 +1573,7 @@ def help():
     
     help_table.add_row("[Command] list-default-agents", "List default Agents")
     help_table.add_row("[Command] list-default-tools", "List default tools")
+    help_table.add_row("[Command] cache-stats", "Show cache, pool and limiter statistics")
     help_table.add_row()
     
     help_table.add_row("[Command] edit-agent", "Interactively edit an Agent")
@@ -6,6 +6,8 @@ tools_dir = get_project_root() / "store" / "tools"
 agents_dir = get_project_root() / "store" / "agents"
 prompts_dir = get_project_root() / "store" / "prompts"
 workflows_dir = get_project_root() / "store" / "workflows"
+crawl_cache_dir = get_project_root() / "store" / "crawl_cache"
+llm_cache_path = get_project_root() / "store" / "llm_cache.db"
 
 context_variables = {
     "has_lauched": False
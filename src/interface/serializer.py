@@ -1,6 +1,6 @@
 """Set of serialize object."""
 
-from typing_extensions import TypedDict
+from typing_extensions import TypedDict, NotRequired
 from typing import Annotated
 
 
@@ -50,6 +50,8 @@ class Step(TypedDict):
     title: str
     description: str
     note: str
+    depends_on: NotRequired[list[int]]
+    """Indexes of earlier steps whose output this step needs, every earlier step when missing."""
 
 
 class PlanWithAgents(TypedDict):
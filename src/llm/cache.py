@@ -0,0 +1,326 @@
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import functools
+from pathlib import Path
+from typing import Any, AsyncIterator, Optional
+
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from config.global_variables import llm_cache_path
+from src.service.env import LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_PATH
+from src.utils.lru import LRUCache
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    stored_at REAL NOT NULL
+);
+"""
+# the time of day of CURRENT_TIME ("%a %b %d %Y %H:%M:%S %z"), which would make every prompt unique
+_CURRENT_TIME = re.compile(
+    r"\b((?:Mon|Tue|Wed|Thu|Fri|Sat|Sun) (?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec) \d{2} \d{4})"
+    r" \d{2}:\d{2}:\d{2}(?: ?[+-]\d{4})?"
+)
+_ROLES = {"human": "user", "ai": "assistant"}
+
+
+def _role(message) -> str:
+    if isinstance(message, BaseMessage):
+        return _ROLES.get(message.type, message.type)
+    return message.get("role", "user")
+
+
+def _content(message):
+    content = message.content if isinstance(message, BaseMessage) else message.get("content", "")
+    if isinstance(content, str):
+        return _CURRENT_TIME.sub(r"\1", content).strip()
+    return content
+
+
+def normalize_messages(messages) -> list:
+    """(role, content) of each message, without the time of day injected as CURRENT_TIME."""
+    if isinstance(messages, str):
+        messages = [{"role": "user", "content": messages}]
+    return [(_role(message), _content(message)) for message in messages]
+
+
+@functools.lru_cache(maxsize=64)
+def _schema_key(schema) -> str:
+    return json.dumps(convert_to_openai_tool(schema), sort_keys=True, default=str)
+
+
+def schema_key(schema) -> Optional[str]:
+    if schema is None:
+        return None
+    if isinstance(schema, dict):
+        return json.dumps(schema, sort_keys=True, default=str)
+    return _schema_key(schema)
+
+
+class LLMResponseCache:
+    """Answers of deterministic LLM calls, in memory and in a SQLite file.
+
+    Keyed on the model, its endpoint and temperature, the normalized messages
+    and the structured output schema. An answer is reused for `ttl` seconds;
+    the memory tier keeps the `max_entries` most recently used ones and the
+    disk tier (None disables it) keeps answers across restarts. Disk reads
+    and writes of async callers run in a worker thread.
+    """
+
+    def __init__(
+        self,
+        ttl: float = LLM_CACHE_TTL,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        path: Optional[Path] = None if LLM_CACHE_PATH == "none" else Path(LLM_CACHE_PATH or llm_cache_path),
+    ):
+        self.ttl = ttl
+        self.path = Path(path) if path else None
+        self._memory = LRUCache(max_entries=max_entries)
+        # sqlite connections are not shared between threads, one per thread
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.errors = 0
+
+    @staticmethod
+    def key(llm, messages, schema=None) -> str:
+        model = getattr(llm, "model_name", None) or getattr(llm, "model", None)
+        base_url = getattr(llm, "openai_api_base", None) or getattr(llm, "api_base", None)
+        payload = json.dumps(
+            [model, base_url, getattr(llm, "temperature", None), schema_key(schema), normalize_messages(messages)],
+            ensure_ascii=False, default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._schema_lock:
+                if not self._schema_ready:
+                    with conn:
+                        conn.executescript(SCHEMA)
+                        # expired answers are dropped once per process
+                        conn.execute("DELETE FROM responses WHERE stored_at < ?", (time.time() - self.ttl,))
+                    self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    def _fresh(self, stored_at: float) -> bool:
+        return time.time() - stored_at < self.ttl
+
+    def _memory_lookup(self, key: str) -> Any:
+        entry = self._memory.get(key)
+        if entry is not None:
+            if self._fresh(entry[0]):
+                self.memory_hits += 1
+                return entry[1]
+            self._memory.pop(key, None)
+        return None
+
+    def _disk_lookup(self, key: str) -> Any:
+        if self.path is None:
+            return None
+        try:
+            row = self._connection().execute(
+                "SELECT value, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.error(f"LLM cache lookup failed: {e}")
+            return None
+        if row is None or not self._fresh(row[1]):
+            return None
+        value = json.loads(row[0])
+        self._memory[key] = (row[1], value)
+        self.disk_hits += 1
+        return value
+
+    def _disk_store(self, key: str, text: str, stored_at: float):
+        if self.path is None:
+            return
+        try:
+            with self._connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, stored_at) VALUES (?, ?, ?)",
+                    (key, text, stored_at),
+                )
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.error(f"LLM cache store failed: {e}")
+
+    def _encode(self, value: Any) -> Optional[str]:
+        try:
+            return json.dumps(value, ensure_ascii=False)
+        except (TypeError, ValueError):
+            logger.debug(f"LLM answer of type {type(value).__name__} is not cached")
+            return None
+
+    def lookup(self, key: str) -> Any:
+        """The cached answer for `key`, None on a miss."""
+        if self.ttl <= 0:
+            return None
+        value = self._memory_lookup(key)
+        if value is None:
+            value = self._disk_lookup(key)
+        if value is None:
+            self.misses += 1
+        return value
+
+    async def alookup(self, key: str) -> Any:
+        if self.ttl <= 0:
+            return None
+        value = self._memory_lookup(key)
+        if value is None and self.path is not None:
+            value = await asyncio.to_thread(self._disk_lookup, key)
+        if value is None:
+            self.misses += 1
+        return value
+
+    def store(self, key: str, value: Any):
+        text = self._encode(value) if self.ttl > 0 else None
+        if text is None:
+            return
+        stored_at = time.time()
+        self._memory[key] = (stored_at, value)
+        self.stores += 1
+        self._disk_store(key, text, stored_at)
+
+    async def astore(self, key: str, value: Any):
+        text = self._encode(value) if self.ttl > 0 else None
+        if text is None:
+            return
+        stored_at = time.time()
+        self._memory[key] = (stored_at, value)
+        self.stores += 1
+        if self.path is not None:
+            await asyncio.to_thread(self._disk_store, key, text, stored_at)
+
+    def clear(self):
+        self._memory.clear()
+        if self.path is not None and self.path.exists():
+            with self._connection() as conn:
+                conn.execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "entries": len(self._memory),
+            "disk": str(self.path) if self.path else None,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "errors": self.errors,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "evictions": self._memory.evictions,
+        }
+
+
+llm_response_cache = LLMResponseCache()
+
+
+def _text(content) -> Optional[str]:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return None
+
+
+class CachedChatModel:
+    """Chat model of a system node answering repeated requests from the response cache.
+
+    Covers invoke/ainvoke, with_structured_output(...).ainvoke and astream,
+    which replays a cached answer as a single chunk. Answers carrying tool
+    calls and interrupted streams are not cached; everything else is
+    delegated to the wrapped model.
+    """
+
+    def __init__(self, llm, node: str, cache: LLMResponseCache = llm_response_cache, schema=None, runnable=None):
+        self.llm = llm
+        self.node = node
+        self.cache = cache
+        self.schema = schema
+        self._runnable = runnable if runnable is not None else llm
+
+    def with_structured_output(self, schema, **kwargs) -> "CachedChatModel":
+        return CachedChatModel(
+            self.llm, self.node, self.cache, schema, self.llm.with_structured_output(schema, **kwargs)
+        )
+
+    def _answer(self, cached: Any):
+        return cached if self.schema is not None else AIMessage(content=cached)
+
+    def _value(self, result: Any) -> Any:
+        if self.schema is not None:
+            return result
+        if getattr(result, "tool_calls", None):
+            return None
+        return _text(result.content)
+
+    def invoke(self, messages, *args, **kwargs):
+        key = self.cache.key(self.llm, messages, self.schema)
+        cached = self.cache.lookup(key)
+        if cached is not None:
+            logger.debug(f"{self.node} answered from the LLM cache")
+            return self._answer(cached)
+        result = self._runnable.invoke(messages, *args, **kwargs)
+        value = self._value(result)
+        if value is not None:
+            self.cache.store(key, value)
+        return result
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        key = self.cache.key(self.llm, messages, self.schema)
+        cached = await self.cache.alookup(key)
+        if cached is not None:
+            logger.debug(f"{self.node} answered from the LLM cache")
+            return self._answer(cached)
+        result = await self._runnable.ainvoke(messages, *args, **kwargs)
+        value = self._value(result)
+        if value is not None:
+            await self.cache.astore(key, value)
+        return result
+
+    async def astream(self, messages, *args, **kwargs) -> AsyncIterator:
+        if self.schema is not None:
+            async for chunk in self._runnable.astream(messages, *args, **kwargs):
+                yield chunk
+            return
+        key = self.cache.key(self.llm, messages)
+        cached = await self.cache.alookup(key)
+        if cached is not None:
+            logger.debug(f"{self.node} answered from the LLM cache")
+            yield AIMessageChunk(content=cached)
+            return
+        parts = []
+        tool_calls = False
+        async for chunk in self.llm.astream(messages, *args, **kwargs):
+            parts.append(_text(chunk.content) or "")
+            tool_calls = tool_calls or bool(getattr(chunk, "tool_call_chunks", None))
+            yield chunk
+        # only reached when the stream was consumed to the end
+        if not tool_calls:
+            await self.cache.astore(key, "".join(parts))
+
+    def __getattr__(self, name):
+        return getattr(self._runnable, name)
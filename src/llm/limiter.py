@@ -0,0 +1,449 @@
+import json
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Callable, Optional, Tuple
+
+import httpx
+from httpx._utils import get_environment_proxies
+
+from src.service.env import LLM_RPM, LLM_TPM, LLM_MAX_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+# user whose workflow makes the LLM calls of the current context, requests are queued per user
+llm_user: ContextVar[str] = ContextVar("llm_user", default="")
+
+# tokens reserved for the completion of a request that does not set max_tokens
+DEFAULT_COMPLETION_TOKENS = 512
+# seconds the model is paused after a 429 without Retry-After
+DEFAULT_RETRY_AFTER = 1.0
+# bytes of a non-streamed response read back for its token usage
+MAX_USAGE_BODY = 1024 * 1024
+# timeout and pool limits of openai's DefaultHttpxClient
+HTTP_TIMEOUT = httpx.Timeout(timeout=600.0, connect=5.0)
+HTTP_LIMITS = httpx.Limits(max_connections=1000, max_keepalive_connections=100)
+
+
+class TokenBucket:
+    """`capacity` units refilled over a minute. A request larger than the
+    bucket waits for a full bucket and leaves it in debt."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be taken."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, amount: float):
+        self.level -= amount
+
+    def give(self, amount: float):
+        self.level = min(self.capacity, self.level + amount)
+
+
+class _Waiter:
+    __slots__ = ("user", "cost", "wake", "admitted", "enqueued")
+
+    def __init__(self, user: str, cost: int, wake: Callable[[], None]):
+        self.user = user
+        self.cost = cost
+        self.wake = wake
+        self.admitted = False
+        self.enqueued = time.monotonic()
+
+
+class ModelLimiter:
+    """Admission control of the requests to one (model, base_url).
+
+    A request is admitted when fewer than `concurrency` requests are in
+    flight and the request and token buckets (`rpm`, `tpm` per minute) can
+    pay for it; 0 disables a limit. Waiting requests are admitted round
+    robin across users, so one user's burst does not hold back the others.
+    A 429 from the provider pauses admission for its Retry-After.
+    """
+
+    def __init__(self, name: str, rpm: int = LLM_RPM, tpm: int = LLM_TPM, concurrency: int = LLM_MAX_CONCURRENCY):
+        self.name = name
+        self.concurrency = concurrency
+        self._requests = TokenBucket(rpm) if rpm > 0 else None
+        self._tokens = TokenBucket(tpm) if tpm > 0 else None
+        # user -> waiting requests, the next user to serve first
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        # the waiter woken when the buckets allow the next request
+        self._timer: Optional[_Waiter] = None
+        self.active = 0
+        self.admitted = 0
+        self.throttled = 0
+        self.tokens = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._waits = deque(maxlen=1024)
+
+    @property
+    def counts_tokens(self) -> bool:
+        return self._tokens is not None
+
+    def _dispatch(self, now: float) -> Optional[float]:
+        """Admit the waiting requests that fit, returns the seconds until the next one may."""
+        while self._queues and (self.concurrency <= 0 or self.active < self.concurrency):
+            if now < self._paused_until:
+                delay = self._paused_until - now
+            else:
+                user, queue = next(iter(self._queues.items()))
+                waiter = queue[0]
+                delay = max(
+                    self._requests.delay(1, now) if self._requests else 0.0,
+                    self._tokens.delay(waiter.cost, now) if self._tokens else 0.0,
+                )
+            if delay > 0:
+                # the head of the line keeps the timer, the others wait for a wake up
+                head = next(iter(self._queues.values()))[0]
+                if head is not self._timer:
+                    self._timer = head
+                    head.wake()
+                return delay
+            queue.popleft()
+            del self._queues[user]
+            if queue:
+                self._queues[user] = queue
+            if self._requests:
+                self._requests.take(1)
+            if self._tokens:
+                self._tokens.take(waiter.cost)
+            self.active += 1
+            self.admitted += 1
+            self.tokens += waiter.cost
+            waited = now - waiter.enqueued
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            self._waits.append(waited)
+            if waited > 1:
+                logger.info(f"LLM request to {self.name} of user {waiter.user or '-'} waited {waited:.1f}s")
+            waiter.admitted = True
+            waiter.wake()
+        return None
+
+    def _enqueue(self, waiter: _Waiter) -> Optional[float]:
+        with self._lock:
+            self._queues.setdefault(waiter.user, deque()).append(waiter)
+            return self._dispatch(time.monotonic())
+
+    def _poll(self, waiter: _Waiter) -> Tuple[bool, Optional[float]]:
+        with self._lock:
+            if waiter.admitted:
+                return True, None
+            delay = self._dispatch(time.monotonic())
+            return waiter.admitted, delay
+
+    def _abandon(self, waiter: _Waiter):
+        with self._lock:
+            if waiter.admitted:
+                self.active -= 1
+            else:
+                queue = self._queues.get(waiter.user)
+                if queue is not None and waiter in queue:
+                    queue.remove(waiter)
+                    if not queue:
+                        del self._queues[waiter.user]
+            self._dispatch(time.monotonic())
+
+    async def acquire(self, cost: int = 0, user: str = None):
+        """Wait until a request of `cost` tokens may be sent, `release` it when done."""
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        waiter = _Waiter(llm_user.get() if user is None else user, cost, lambda: loop.call_soon_threadsafe(event.set))
+        delay = self._enqueue(waiter)
+        try:
+            while not waiter.admitted:
+                try:
+                    await asyncio.wait_for(event.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                event.clear()
+                admitted, delay = self._poll(waiter)
+                if admitted:
+                    break
+        except BaseException:
+            self._abandon(waiter)
+            raise
+
+    def acquire_sync(self, cost: int = 0, user: str = None):
+        """Blocking version of acquire."""
+        event = threading.Event()
+        waiter = _Waiter(llm_user.get() if user is None else user, cost, event.set)
+        delay = self._enqueue(waiter)
+        try:
+            while not waiter.admitted:
+                event.wait(delay)
+                event.clear()
+                admitted, delay = self._poll(waiter)
+                if admitted:
+                    break
+        except BaseException:
+            self._abandon(waiter)
+            raise
+
+    def release(self, cost: int = 0, used: Optional[int] = None):
+        """End an admitted request, `used` corrects the token estimate `cost` with the real usage."""
+        with self._lock:
+            self.active -= 1
+            if used is not None and self._tokens:
+                self.tokens += used - cost
+                if used > cost:
+                    self._tokens.take(used - cost)
+                else:
+                    self._tokens.give(cost - used)
+            self._dispatch(time.monotonic())
+
+    def throttle(self, retry_after: float):
+        """The provider answered 429, admit nothing for `retry_after` seconds."""
+        with self._lock:
+            self.throttled += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        logger.warning(f"LLM requests to {self.name} throttled by the provider, pausing {retry_after:.1f}s")
+
+    def stats(self) -> dict:
+        with self._lock:
+            queued = {user or "-": len(queue) for user, queue in self._queues.items()}
+            waits = sorted(self._waits)
+        return {
+            "active": self.active,
+            "queued": sum(queued.values()),
+            "queued_by_user": queued,
+            "admitted": self.admitted,
+            "throttled": self.throttled,
+            "tokens": self.tokens,
+            "wait_avg": round(self._wait_total / self.admitted, 3) if self.admitted else 0.0,
+            "wait_p95": round(waits[int(len(waits) * 0.95)], 3) if waits else 0.0,
+            "wait_max": round(self._wait_max, 3),
+        }
+
+
+def _request_cost(request: httpx.Request) -> Tuple[int, bool]:
+    """Estimated tokens of a chat completion request (4 bytes a token) and whether it streams."""
+    content = request.content
+    try:
+        body = json.loads(content)
+    except (ValueError, UnicodeDecodeError):
+        return len(content) // 4, False
+    completion = body.get("max_completion_tokens") or body.get("max_tokens") or DEFAULT_COMPLETION_TOKENS
+    return len(content) // 4 + completion, bool(body.get("stream"))
+
+
+def _retry_after(response: httpx.Response) -> float:
+    try:
+        return float(response.headers.get("retry-after", DEFAULT_RETRY_AFTER))
+    except ValueError:
+        return DEFAULT_RETRY_AFTER
+
+
+def _usage(body: bytes) -> Optional[int]:
+    try:
+        usage = json.loads(body).get("usage") or {}
+    except (ValueError, AttributeError, UnicodeDecodeError):
+        return None
+    return usage.get("total_tokens")
+
+
+class _Admission:
+    """An admitted request, released exactly once when its response is closed."""
+
+    def __init__(self, limiter: ModelLimiter, cost: int, read_usage: bool):
+        self.limiter = limiter
+        self.cost = cost
+        self.body = bytearray() if read_usage else None
+        self._released = False
+
+    def feed(self, chunk: bytes):
+        if self.body is not None:
+            if len(self.body) + len(chunk) > MAX_USAGE_BODY:
+                self.body = None
+            else:
+                self.body += chunk
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            used = _usage(bytes(self.body)) if self.body else None
+            self.limiter.release(self.cost, used)
+
+
+class _AsyncStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, admission: _Admission):
+        self._stream = stream
+        self._admission = admission
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self._admission.feed(chunk)
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            self._admission.release()
+
+
+class _SyncStream(httpx.SyncByteStream):
+    def __init__(self, stream: httpx.SyncByteStream, admission: _Admission):
+        self._stream = stream
+        self._admission = admission
+
+    def __iter__(self):
+        for chunk in self._stream:
+            self._admission.feed(chunk)
+            yield chunk
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            self._admission.release()
+
+
+class LimitedAsyncTransport(httpx.AsyncBaseTransport):
+    """Sends each request once `limiter` admits it, the slot is held until the response is closed."""
+
+    def __init__(self, limiter: ModelLimiter, transport: httpx.AsyncBaseTransport):
+        self.limiter = limiter
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        cost, streamed = _request_cost(request) if self.limiter.counts_tokens else (0, False)
+        await self.limiter.acquire(cost)
+        admission = _Admission(self.limiter, cost, self.limiter.counts_tokens and not streamed)
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            admission.release()
+            raise
+        if response.status_code == 429:
+            self.limiter.throttle(_retry_after(response))
+        if response.is_closed:
+            # the transport already read the body
+            admission.feed(response.content)
+            admission.release()
+        else:
+            response.stream = _AsyncStream(response.stream, admission)
+        return response
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+class LimitedTransport(httpx.BaseTransport):
+    """Blocking version of LimitedAsyncTransport."""
+
+    def __init__(self, limiter: ModelLimiter, transport: httpx.BaseTransport):
+        self.limiter = limiter
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        cost, streamed = _request_cost(request) if self.limiter.counts_tokens else (0, False)
+        self.limiter.acquire_sync(cost)
+        admission = _Admission(self.limiter, cost, self.limiter.counts_tokens and not streamed)
+        try:
+            response = self._transport.handle_request(request)
+        except BaseException:
+            admission.release()
+            raise
+        if response.status_code == 429:
+            self.limiter.throttle(_retry_after(response))
+        if response.is_closed:
+            # the transport already read the body
+            admission.feed(response.content)
+            admission.release()
+        else:
+            response.stream = _SyncStream(response.stream, admission)
+        return response
+
+    def close(self):
+        self._transport.close()
+
+
+def _proxy_mounts(limiter: ModelLimiter, limited, transport) -> dict:
+    """Limited transports for the proxies of HTTP(S)_PROXY / ALL_PROXY / NO_PROXY.
+
+    httpx only reads them when a client builds its own transport.
+    """
+    return {
+        pattern: None if proxy is None else limited(limiter, transport(proxy=proxy, limits=HTTP_LIMITS))
+        for pattern, proxy in get_environment_proxies().items()
+    }
+
+
+def limited_client(limiter: ModelLimiter) -> httpx.Client:
+    """httpx client sending through `limiter`, with the settings of openai's DefaultHttpxClient."""
+    return httpx.Client(
+        transport=LimitedTransport(limiter, httpx.HTTPTransport(limits=HTTP_LIMITS)),
+        mounts=_proxy_mounts(limiter, LimitedTransport, httpx.HTTPTransport),
+        timeout=HTTP_TIMEOUT,
+        follow_redirects=True,
+    )
+
+
+def limited_async_client(limiter: ModelLimiter) -> httpx.AsyncClient:
+    """Async version of limited_client."""
+    return httpx.AsyncClient(
+        transport=LimitedAsyncTransport(limiter, httpx.AsyncHTTPTransport(limits=HTTP_LIMITS)),
+        mounts=_proxy_mounts(limiter, LimitedAsyncTransport, httpx.AsyncHTTPTransport),
+        timeout=HTTP_TIMEOUT,
+        follow_redirects=True,
+    )
+
+
+class LLMLimits:
+    """One ModelLimiter per (model, base_url), shared by every LLM instance calling that model."""
+
+    def __init__(self, rpm: int = LLM_RPM, tpm: int = LLM_TPM, concurrency: int = LLM_MAX_CONCURRENCY):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.concurrency = concurrency
+        self._limiters: dict[tuple, ModelLimiter] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rpm > 0 or self.tpm > 0 or self.concurrency > 0
+
+    def limiter(self, model: str, base_url: Optional[str]) -> ModelLimiter:
+        key = (model, base_url or "")
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                name = f"{model}@{base_url}" if base_url else model
+                limiter = self._limiters[key] = ModelLimiter(name, self.rpm, self.tpm, self.concurrency)
+            return limiter
+
+    def http_clients(self, model: str, base_url: Optional[str]) -> dict:
+        """http_client / http_async_client arguments of a ChatOpenAI sending through the limiter, {} if disabled."""
+        if not self.enabled:
+            return {}
+        limiter = self.limiter(model, base_url)
+        return {
+            "http_client": limited_client(limiter),
+            "http_async_client": limited_async_client(limiter),
+        }
+
+    def stats(self) -> dict:
+        return {limiter.name: limiter.stats() for limiter in list(self._limiters.values())}
+
+
+llm_limits = LLMLimits()
@@ -15,8 +15,11 @@ from src.service.env import (
     CODE_MODEL,
     CODE_BASE_URL,
     CODE_API_KEY,
+    LLM_CACHE_NODES,
 )
 from src.llm.agents import LLMType
+from src.llm.cache import CachedChatModel
+from src.llm.limiter import llm_limits
 
 
 def create_openai_llm(
@@ -38,6 +41,10 @@ def create_openai_llm(
     if api_key:  # This will handle None or empty string
         llm_kwargs["api_key"] = api_key
 
+    # requests go through the rate limiter of the model, shared by every instance calling it
+    for name, client in llm_limits.http_clients(model, base_url).items():
+        llm_kwargs.setdefault(name, client)
+
     return ChatOpenAI(**llm_kwargs)
 
 
@@ -65,12 +72,21 @@ def create_deepseek_llm(
 
 # Cache for LLM instances
 _llm_cache: dict[LLMType, ChatOpenAI | ChatDeepSeek] = {}
+# (llm type, node) -> the instance answering from the LLM response cache
+_cached_llms: dict[tuple, CachedChatModel] = {}
 
 
-def get_llm_by_type(llm_type: LLMType) -> ChatOpenAI | ChatDeepSeek:
+def get_llm_by_type(llm_type: LLMType, node: Optional[str] = None) -> ChatOpenAI | ChatDeepSeek | CachedChatModel:
     """
     Get LLM instance by type. Returns cached instance if available.
+    When `node` is one of LLM_CACHE_NODES, its answers are reused for identical requests.
     """
+    if node is not None and node in LLM_CACHE_NODES:
+        key = (llm_type, node)
+        if key not in _cached_llms:
+            _cached_llms[key] = CachedChatModel(get_llm_by_type(llm_type), node)
+        return _cached_llms[key]
+
     if llm_type in _llm_cache:
         return _llm_cache[llm_type]
 
@@ -1,13 +1,9 @@
-import re
 import logging
 import asyncio
+import threading
 from pathlib import Path
 
-import aiofiles
-import aiofiles.os
-
 from langchain_core.tools import tool
-from langchain_mcp_adapters.client import MultiServerMCPClient
 
 from src.tools import (
     bash_tool,
@@ -21,8 +17,11 @@ from src.llm.agents import AGENT_LLM_MAP
 from src.interface.mcp import Tool
 from src.prompts import get_prompt_template
 from src.interface.agent import Agent
-from src.service.env import USR_AGENT, USE_BROWSER,USE_MCP_TOOLS
-from src.manager.mcp import mcp_client_config
+from src.service.env import USR_AGENT, USE_BROWSER,USE_MCP_TOOLS, MCP_DISCOVERY_TIMEOUT
+from src.manager.mcp_pool import mcp_pool
+from src.manager.index import AgentIndex
+from src.manager.team import TeamDescriptors
+from src.storage import StorageBackend, FileStorage, get_storage
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.WARNING)
@@ -36,7 +35,7 @@ class NotFoundToolError(Exception):
     pass
 
 class AgentManager:
-    def __init__(self, tools_dir, agents_dir, prompt_dir):
+    def __init__(self, tools_dir, agents_dir, prompt_dir, storage: StorageBackend = None):
         for path in [tools_dir, agents_dir, prompt_dir]:
             if not path.exists():
                 logger.info(f"path {path} does not exist when agent manager initializing, gona to create...")
@@ -48,15 +47,91 @@ class AgentManager:
 
         if not self.tools_dir.exists() or not self.agents_dir.exists() or not self.prompt_dir.exists():
             raise FileNotFoundError("One or more provided directories do not exist.")
+        # agent definitions and prompts are persisted through the storage backend,
+        # its calls are blocking and always run in a worker thread
+        self.storage = storage or FileStorage(agent_dir=self.agents_dir, prompt_dir=self.prompt_dir)
         self.available_agents = {}
+        # available_agents by owner and name prefix, see _add_agent/_drop_agent
+        self.index = AgentIndex()
         self.available_tools = {}
+        # bumped whenever available_tools changes, state derived from the tools keys on it
+        self.tools_version = 0
+        # set once agents and built-in tools are loaded / once MCP tool discovery finished.
+        # threading events because the cli runs every command in a fresh event loop
+        self._ready = threading.Event()
+        self._tools_ready = threading.Event()
+        self._init_task = None
+        self._init_loop = None
+        self._mcp_thread = None
+        # called with the agent name whenever a loaded definition changes or is removed
+        self._change_listeners = []
+        # prompt descriptors of each user's team, kept up to date with the agents
+        self.team = TeamDescriptors()
+        self.on_agent_changed(self._update_team)
+
+    def on_agent_changed(self, callback):
+        """Register `callback(agent_name)`, used to drop state derived from an agent definition."""
+        self._change_listeners.append(callback)
+
+    def _update_team(self, agent_name: str):
+        self.team.update(agent_name, self.available_agents.get(agent_name))
+
+    def team_descriptors(self, user_id: str, coor_agents: list[str] = None, query: str = None) -> tuple[list[str], str, str]:
+        """TEAM_MEMBERS, the description lines of the user's agents and the TOOLS description, narrowed to `query`."""
+        members, description = self.team.team(user_id, coor_agents, query)
+        return members, description, self.team.tools(self.available_tools, query)
+
+    def _add_agent(self, agent: Agent):
+        self.available_agents[agent.agent_name] = agent
+        self.index.add(agent)
+
+    def _drop_agent(self, agent_name: str) -> bool:
+        self.index.remove(agent_name)
+        return self.available_agents.pop(agent_name, None) is not None
+
+    def _notify_agent_changed(self, agent_name: str):
+        for callback in self._change_listeners:
+            try:
+                callback(agent_name)
+            except Exception as e:
+                logger.error(f"Error notifying change of agent {agent_name}: {e}")
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    @property
+    def tools_ready(self) -> bool:
+        return self._tools_ready.is_set()
 
     async def initialize(self, user_agent_flag=USR_AGENT):
-        """Asynchronously initializes the AgentManager by loading agents and tools."""
+        """Asynchronously initializes the AgentManager by loading agents and tools.
+
+        MCP tools are discovered in the background, use `wait_for_tools` when they are needed.
+        """
         await self._load_agents(user_agent_flag)
+        self.team.rebuild(self.available_agents.values())
         await self.load_tools()
+        self._ready.set()
         logger.info(f"AgentManager initialized. {len(self.available_agents)} agents and {len(self.available_tools)} tools available.")
 
+    async def ensure_ready(self, user_agent_flag=USR_AGENT):
+        """Initialize on first use, concurrent callers of the same event loop share one startup."""
+        if self._ready.is_set():
+            return
+        loop = asyncio.get_running_loop()
+        if self._init_task is None or self._init_loop is not loop or self._init_task.done():
+            # a startup left behind by a closed loop, or a failed one, is started again
+            self._init_loop = loop
+            self._init_task = loop.create_task(self.initialize(user_agent_flag))
+        await asyncio.shield(self._init_task)
+
+    async def wait_for_tools(self, timeout: float = MCP_DISCOVERY_TIMEOUT) -> bool:
+        """Wait for background MCP tool discovery, returns False if it did not finish in time."""
+        if self._tools_ready.is_set():
+            return True
+        return await asyncio.to_thread(self._tools_ready.wait, timeout)
+
     async def _create_agent_by_prebuilt(self, user_id: str, name: str, nick_name: str, llm_type: str, tools: list[tool], prompt: str, description: str):
         async def _create(user_id: str, name: str, nick_name: str, llm_type: str, tools: list[tool], prompt: str, description: str):
             _tools = []
@@ -80,13 +155,40 @@ class AgentManager:
             return _agent
         
         _agent = await _create(user_id, name, nick_name, llm_type, tools, prompt, description)
-        self.available_agents[name] = _agent
+        self._add_agent(_agent)
+        self._notify_agent_changed(name)
 
     async def load_mcp_tools(self):
-        mcp_client = MultiServerMCPClient(mcp_client_config())
-        mcp_tools = await mcp_client.get_tools()
+        mcp_tools = await mcp_pool.get_tools()
+        # publish all tools at once, readers iterate available_tools from other threads
+        if all(self.available_tools.get(_tool.name) is _tool for _tool in mcp_tools):
+            return
+        available_tools = dict(self.available_tools)
         for _tool in mcp_tools:
-            self.available_tools[_tool.name] = _tool
+            available_tools[_tool.name] = _tool
+        self.available_tools = available_tools
+        self._tools_changed()
+
+    def _tools_changed(self):
+        self.tools_version += 1
+        self.team.tools_changed()
+
+    def _discover_mcp_tools(self):
+        try:
+            asyncio.run(self.load_mcp_tools())
+            logger.info(f"MCP tool discovery finished, {len(self.available_tools)} tools available.")
+        except Exception as e:
+            logger.error(f"Error loading MCP tools: {e}")
+        finally:
+            self._tools_ready.set()
+
+    def start_mcp_discovery(self):
+        """Discover MCP tools on a daemon thread with its own event loop, so slow
+        MCP servers neither delay startup nor die with a short-lived cli loop."""
+        if self._mcp_thread is not None:
+            return
+        self._mcp_thread = threading.Thread(target=self._discover_mcp_tools, name="mcp-discovery", daemon=True)
+        self._mcp_thread.start()
                     
     async def load_tools(self):        
         self.available_tools.update({
@@ -98,70 +200,53 @@ class AgentManager:
         })
         if not USE_BROWSER:
             del self.available_tools[browser_tool.name]    
+        self._tools_changed()
         if USE_MCP_TOOLS:
-            await self.load_mcp_tools()
+            self.start_mcp_discovery()
+        else:
+            self._tools_ready.set()
         
-    async def _write_file(self, path: Path, content: str):
-        async with aiofiles.open(path, "w") as f:
-            await f.write(content)
-
     async def _save_agent(self, agent: Agent, flush=False):
-        agent_path = self.agents_dir / f"{agent.agent_name}.json"
-        agent_prompt_path = self.prompt_dir / f"{agent.agent_name}.md"
-        agents = []
-
-        if flush and not agent_path.exists():
-            agents.append((agent_path, agent.model_dump_json(indent=4)))
-
-        if flush and not agent_prompt_path.exists():
-            agents.append((agent_prompt_path, agent.prompt))
-
-        if not agents:
+        if not flush:
             logger.debug(f"skip saving agent")
             return
 
-        agent_tasks = [self._write_file(path, content) for path, content in agents]
-        await asyncio.gather(*agent_tasks)
+        saved = await asyncio.to_thread(
+            self.storage.save_agent,
+            agent.agent_name,
+            agent.user_id,
+            agent.model_dump_json(indent=4),
+            agent.prompt,
+        )
+        if not saved:
+            logger.debug(f"skip saving agent")
+            return
 
         logger.info(f"agent {agent.agent_name} saved.")
         
     async def _remove_agent(self, agent_name: str):
-        agent_path = self.agents_dir / f"{agent_name}.json"
-        agent_prompt_path = self.prompt_dir / f"{agent_name}.md"
-
-        if agent_path.exists():
-            await aiofiles.os.remove(agent_path)
-            logger.info(f"Removed agent definition file: {agent_path}")
-        if agent_prompt_path.exists():
-            await aiofiles.os.remove(agent_prompt_path)
-            logger.info(f"Removed agent prompt file: {agent_prompt_path}")
-        if agent_name in self.available_agents:
-            del self.available_agents[agent_name] 
+        await asyncio.to_thread(self.storage.remove_agent, agent_name)
+        if self._drop_agent(agent_name):
             logger.info(f"Removed agent '{agent_name}' from available agents.")
+        self._notify_agent_changed(agent_name)
     
     async def _load_agent(self, agent_name: str, user_agent_flag: bool=False):
-        agent_path = self.agents_dir / f"{agent_name}.json"
-
-        if not agent_path.exists():
+        json_str = await asyncio.to_thread(self.storage.load_agent, agent_name)
+        if json_str is None:
             raise FileNotFoundError(f"agent {agent_name} not found.")
 
-        async with aiofiles.open(agent_path, "r") as f:
-            json_str = await f.read()
-            _agent = Agent.model_validate_json(json_str)
-            if _agent.user_id == 'share':
-                self.available_agents[_agent.agent_name] = _agent
-            elif user_agent_flag:
-                self.available_agents[_agent.agent_name] = _agent
+        _agent = Agent.model_validate_json(json_str)
+        if _agent.user_id == 'share':
+            self._add_agent(_agent)
+        elif user_agent_flag:
+            self._add_agent(_agent)
         
     async def _list_agents(self, user_id: str = None, match: str = None):
-        agents = [agent for agent in self.available_agents.values()]
-
-        if user_id:
-            agents = [agent for agent in agents if agent.user_id == user_id]
-        if match:
-            agents = [agent for agent in agents if re.match(match, agent.agent_name)]
+        return self.index.select(user_id, match)
 
-        return agents
+    def _list_user_all_agents(self, user_id: str):
+        """The share agents and the agents of `user_id`."""
+        return self.index.shared() + self.index.user_agents(user_id)
 
     async def _edit_agent(self, agent: Agent):
 
@@ -174,6 +259,8 @@ class AgentManager:
         _agent.selected_tools = agent.selected_tools
         _agent.prompt = agent.prompt
         _agent.llm_type = agent.llm_type
+        self.index.add(_agent)
+        self._notify_agent_changed(_agent.agent_name)
         await self._save_agent(_agent, flush=True)
 
         return "success"
@@ -222,12 +309,11 @@ class AgentManager:
     async def _load_agents(self, user_agent_flag):
         await self._load_default_agents()
         load_tasks = []
-        for agent_path in self.agents_dir.glob("*.json"):
-            agent_name = agent_path.stem
+        for agent_name in await asyncio.to_thread(self.storage.list_agent_names):
             if agent_name not in self.available_agents:
                 load_tasks.append(self._load_agent(agent_name, user_agent_flag))
-        if not USE_BROWSER and "browser" in self.available_agents:
-            del self.available_agents["browser"]
+        if not USE_BROWSER:
+            self._drop_agent("browser")
         if load_tasks:
             results = await asyncio.gather(*load_tasks, return_exceptions=True)
             for i, result in enumerate(results):
@@ -246,8 +332,7 @@ class AgentManager:
         return tools
 
     async def _list_default_agents(self):
-        agents = [agent for agent in self.available_agents.values() if agent.user_id == "share"]
-        return agents
+        return self.index.shared()
     
 from src.utils.path_utils import get_project_root
 
@@ -255,5 +340,5 @@ tools_dir = get_project_root() / "store" / "tools"
 agents_dir = get_project_root() / "store" / "agents"
 prompts_dir = get_project_root() / "store" / "prompts"
 
-agent_manager = AgentManager(tools_dir, agents_dir, prompts_dir)
-asyncio.run(agent_manager.initialize())
\ No newline at end of file
+# agents and tools are loaded lazily, see AgentManager.ensure_ready
+agent_manager = AgentManager(tools_dir, agents_dir, prompts_dir, storage=get_storage())
\ No newline at end of file
@@ -0,0 +1,148 @@
+import re
+import itertools
+from typing import Iterable, List, Optional
+
+from src.interface.agent import Agent
+
+# characters ending the literal prefix of a pattern
+_REGEX_META = set(".^$*+?{}[]\\|()")
+# quantifiers making the character before them optional
+_OPTIONAL = set("?*{")
+
+
+def literal_prefix(pattern: str) -> str:
+    """Leading text every string matched by `re.match(pattern, ...)` starts with, "" if unknown."""
+    if "|" in pattern:
+        return ""
+    prefix = []
+    for char in pattern:
+        if char in _REGEX_META:
+            if char in _OPTIONAL and prefix:
+                prefix.pop()
+            break
+        prefix.append(char)
+    return "".join(prefix)
+
+
+class _PrefixTrie:
+    """Names by prefix, a lookup walks the prefix and then only the names below it."""
+
+    def __init__(self):
+        self._root = {}
+
+    def add(self, name: str):
+        node = self._root
+        for char in name:
+            node = node.setdefault(char, {})
+        node[""] = name
+
+    def remove(self, name: str):
+        path = []
+        node = self._root
+        for char in name:
+            path.append((node, char))
+            node = node.get(char)
+            if node is None:
+                return
+        node.pop("", None)
+        # prune the branches left empty
+        for parent, char in reversed(path):
+            if parent[char]:
+                break
+            del parent[char]
+
+    def with_prefix(self, prefix: str) -> List[str]:
+        node = self._root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+        names = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for char, child in node.items():
+                if char:
+                    stack.append(child)
+                else:
+                    names.append(child)
+        return names
+
+    def clear(self):
+        self._root = {}
+
+
+class AgentIndex:
+    """Secondary indexes over the loaded agents: by owner, share agents and by name prefix.
+
+    Kept up to date by AgentManager on every load, create, edit and remove,
+    so listing the agents of a user costs the user's own agents rather than
+    a scan of all of them. Results keep the order the agents were loaded in.
+    """
+
+    def __init__(self):
+        # user -> agent name -> agent, "share" holds the share agents
+        self._by_user: dict[str, dict[str, Agent]] = {}
+        self._owner: dict[str, str] = {}
+        self._order: dict[str, int] = {}
+        self._names = _PrefixTrie()
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._owner)
+
+    def add(self, agent: Agent):
+        name = agent.agent_name
+        owner = self._owner.get(name)
+        if owner is not None and owner != agent.user_id:
+            self.remove(name)
+        if name not in self._owner:
+            self._order[name] = next(self._counter)
+            self._names.add(name)
+        self._owner[name] = agent.user_id
+        self._by_user.setdefault(agent.user_id, {})[name] = agent
+
+    def remove(self, agent_name: str):
+        owner = self._owner.pop(agent_name, None)
+        if owner is None:
+            return
+        del self._order[agent_name]
+        self._names.remove(agent_name)
+        agents = self._by_user[owner]
+        agents.pop(agent_name, None)
+        if not agents:
+            del self._by_user[owner]
+
+    def rebuild(self, agents: Iterable[Agent]):
+        self._by_user.clear()
+        self._owner.clear()
+        self._order.clear()
+        self._names.clear()
+        for agent in agents:
+            self.add(agent)
+
+    def user_agents(self, user_id: str) -> List[Agent]:
+        return list(self._by_user.get(user_id, {}).values())
+
+    def shared(self) -> List[Agent]:
+        return self.user_agents("share")
+
+    def select(self, user_id: Optional[str] = None, match: Optional[str] = None) -> List[Agent]:
+        """Agents of `user_id` (all users if None) whose name matches the regex `match`."""
+        if user_id:
+            agents = self._by_user.get(user_id, {})
+            if not match:
+                return list(agents.values())
+            prefix = literal_prefix(match)
+            candidates = [agent for name, agent in agents.items() if name.startswith(prefix)]
+        else:
+            prefix = literal_prefix(match) if match else ""
+            if prefix:
+                names = sorted(self._names.with_prefix(prefix), key=self._order.__getitem__)
+            else:
+                names = list(self._order)
+            candidates = [self._by_user[self._owner[name]][name] for name in names]
+        if match:
+            pattern = re.compile(match)
+            candidates = [agent for agent in candidates if pattern.match(agent.agent_name)]
+        return candidates
@@ -3,12 +3,31 @@ import json
 load_dotenv()
 import os
 import logging
+import threading
+from copy import deepcopy
 from src.utils import get_project_root
 
 logger = logging.getLogger(__name__)
 CONFIG_FILE_PATH = str(get_project_root()) + "/config/mcp.json"
 
+# parsed config, reused until config/mcp.json changes on disk
+_config_cache = {"mtime_ns": None, "config": {}}
+_config_lock = threading.Lock()
+
+
 def mcp_client_config():
+    try:
+        mtime_ns = os.stat(CONFIG_FILE_PATH).st_mtime_ns
+    except FileNotFoundError:
+        mtime_ns = -1
+    with _config_lock:
+        if _config_cache["mtime_ns"] != mtime_ns:
+            _config_cache["config"] = _load_mcp_client_config()
+            _config_cache["mtime_ns"] = mtime_ns
+        return deepcopy(_config_cache["config"])
+
+
+def _load_mcp_client_config():
     _mcp_client_config = {}
     mcp_servers_from_json = None # Initialize to None
 
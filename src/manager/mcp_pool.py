@@ -0,0 +1,278 @@
+import json
+import time
+import atexit
+import asyncio
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.sessions import create_session
+from langchain_mcp_adapters.tools import convert_mcp_tool_to_langchain_tool
+
+from src.manager.mcp import mcp_client_config
+from src.service.env import (
+    MCP_MAX_CONCURRENCY,
+    MCP_HEALTH_CHECK_INTERVAL,
+    MCP_RECONNECT_BACKOFF_MAX,
+)
+
+logger = logging.getLogger(__name__)
+
+# seconds before the first reconnect attempt, doubled on every further failure
+RECONNECT_BACKOFF_BASE = 1.0
+PING_TIMEOUT = 5.0
+
+
+class MCPServerUnavailableError(Exception):
+    """when an MCP server is inside its reconnect backoff window"""
+    pass
+
+
+class _ServerConnection:
+    """A long-lived session to one MCP server, owned by the pool event loop.
+
+    The session context is entered and exited by a dedicated task because the
+    anyio transports must be closed from the task that opened them.
+    """
+
+    def __init__(self, name: str, connection: dict, max_concurrency: int):
+        self.name = name
+        self.connection = connection
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.session = None
+        self.tools: Optional[List] = None
+        self._connect_lock = asyncio.Lock()
+        self._stop: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.failures = 0
+        self.retry_at = 0.0
+        self.last_checked = 0.0
+        self.connects = 0
+        self.calls = 0
+        self.in_flight = 0
+
+    async def _run(self, ready: asyncio.Future):
+        try:
+            async with create_session(self.connection) as session:
+                await session.initialize()
+                self.session = session
+                ready.set_result(session)
+                await self._stop.wait()
+        except BaseException as e:
+            if not ready.done():
+                ready.set_exception(e)
+            elif not isinstance(e, asyncio.CancelledError):
+                logger.warning(f"MCP session {self.name} closed unexpectedly: {e}")
+        finally:
+            self.session = None
+
+    async def _connect(self):
+        now = time.monotonic()
+        if now < self.retry_at:
+            raise MCPServerUnavailableError(f"MCP server {self.name} unavailable, retrying in {self.retry_at - now:.1f}s")
+        self._stop = asyncio.Event()
+        ready = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._run(ready))
+        try:
+            await ready
+        except Exception as e:
+            self.failures += 1
+            backoff = min(RECONNECT_BACKOFF_BASE * 2 ** (self.failures - 1), MCP_RECONNECT_BACKOFF_MAX)
+            self.retry_at = time.monotonic() + backoff
+            logger.error(f"Error connecting to MCP server {self.name}, retry in {backoff:.1f}s: {e}")
+            raise
+        self.failures = 0
+        self.retry_at = 0.0
+        self.last_checked = time.monotonic()
+        self.connects += 1
+        logger.info(f"MCP session {self.name} connected")
+
+    async def _healthy(self) -> bool:
+        if self.session is None:
+            return False
+        if time.monotonic() - self.last_checked < MCP_HEALTH_CHECK_INTERVAL:
+            return True
+        try:
+            await asyncio.wait_for(self.session.send_ping(), PING_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"MCP session {self.name} failed health check: {e}")
+            return False
+        self.last_checked = time.monotonic()
+        return True
+
+    async def acquire(self):
+        """Return a live session, reconnecting if it dropped or fails its health check."""
+        async with self._connect_lock:
+            if await self._healthy():
+                return self.session
+            await self.close()
+            await self._connect()
+            return self.session
+
+    async def list_tools(self, refresh: bool = False) -> List:
+        if self.tools is None or refresh:
+            session = await self.acquire()
+            async with self.semaphore:
+                self.tools = (await session.list_tools()).tools
+        return self.tools
+
+    async def call_tool(self, tool_name: str, arguments: dict):
+        session = await self.acquire()
+        async with self.semaphore:
+            self.in_flight += 1
+            self.calls += 1
+            try:
+                return await session.call_tool(tool_name, arguments)
+            except (OSError, EOFError) as e:
+                # transport level failure, the next call reconnects
+                logger.warning(f"MCP session {self.name} dropped during {tool_name}: {e}")
+                await self.close()
+                raise
+            finally:
+                self.in_flight -= 1
+
+    async def close(self):
+        if self._task is None:
+            return
+        self._stop.set()
+        try:
+            await asyncio.wait_for(self._task, PING_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Error closing MCP session {self.name}: {e}")
+            self._task.cancel()
+        self._task = None
+        self.session = None
+
+    def stats(self) -> dict:
+        return {
+            "connected": self.session is not None,
+            "connects": self.connects,
+            "failures": self.failures,
+            "calls": self.calls,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "tools": len(self.tools) if self.tools is not None else None,
+        }
+
+
+class _PooledSession:
+    """Stands in for a ClientSession in converted tools, routes calls through the pool."""
+
+    def __init__(self, pool: "MCPConnectionPool", server_name: str):
+        self.pool = pool
+        self.server_name = server_name
+
+    async def call_tool(self, tool_name: str, arguments: dict):
+        return await self.pool.call_tool(self.server_name, tool_name, arguments)
+
+
+class MCPConnectionPool:
+    """Warm MCP sessions shared by every workflow, keyed by server config.
+
+    All sessions live on one background event loop so they outlive the short
+    event loops of cli commands; callers on any loop await them through
+    run_coroutine_threadsafe.
+    """
+
+    def __init__(self, max_concurrency: int = MCP_MAX_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        self._connections: Dict[str, _ServerConnection] = {}
+        # server name -> (listed mcp tools, their langchain tools), converted once per listing
+        self._converted: Dict[str, tuple] = {}
+        # bumped whenever a server's langchain tools are replaced by new objects
+        self.generation = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="mcp-pool", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    async def _submit(self, coro):
+        loop = self._ensure_loop()
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    @staticmethod
+    def _key(name: str, connection: dict) -> str:
+        return name + ":" + json.dumps(connection, sort_keys=True, default=str)
+
+    def _connection(self, name: str, connection: dict) -> _ServerConnection:
+        """Runs on the pool loop, a changed server config gets a new session."""
+        key = self._key(name, connection)
+        if key not in self._connections:
+            for stale_key in [k for k, c in self._connections.items() if c.name == name]:
+                asyncio.create_task(self._connections.pop(stale_key).close())
+            # a pool setting, not a transport argument of create_session
+            connection = dict(connection)
+            max_concurrency = int(connection.pop("max_concurrency", self.max_concurrency))
+            self._connections[key] = _ServerConnection(name, connection, max_concurrency)
+        return self._connections[key]
+
+    async def _server_tools(self, name: str, connection: dict, refresh: bool) -> List:
+        return await self._connection(name, connection).list_tools(refresh)
+
+    async def _call_tool(self, server_name: str, tool_name: str, arguments: dict):
+        config = mcp_client_config()
+        if server_name not in config:
+            raise KeyError(f"MCP server {server_name} is not configured")
+        return await self._connection(server_name, config[server_name]).call_tool(tool_name, arguments)
+
+    async def get_tools(self, server_name: str = None, refresh: bool = False) -> List[BaseTool]:
+        """LangChain tools of the configured servers.
+
+        Tool lists are cached per session and converted once, repeated calls
+        return the same tool objects until a server lists its tools again.
+        """
+        config = mcp_client_config()
+        names = [server_name] if server_name else list(config)
+        tools = []
+        for name in names:
+            try:
+                mcp_tools = await self._submit(self._server_tools(name, config[name], refresh))
+            except Exception as e:
+                logger.error(f"Error listing tools of MCP server {name}: {e}")
+                continue
+            converted = self._converted.get(name)
+            if converted is None or converted[0] is not mcp_tools:
+                session = _PooledSession(self, name)
+                converted = (mcp_tools, [convert_mcp_tool_to_langchain_tool(session, mcp_tool) for mcp_tool in mcp_tools])
+                self._converted[name] = converted
+                self.generation += 1
+            tools.extend(converted[1])
+        return tools
+
+    async def call_tool(self, server_name: str, tool_name: str, arguments: dict):
+        return await self._submit(self._call_tool(server_name, tool_name, arguments))
+
+    def stats(self) -> dict:
+        return {connection.name: connection.stats() for connection in list(self._connections.values())}
+
+    def close(self, timeout: float = 10):
+        """Close every session and stop the pool loop."""
+        if self._loop is None or not self._loop.is_running():
+            return
+
+        async def _close_all():
+            await asyncio.gather(*(c.close() for c in self._connections.values()), return_exceptions=True)
+            self._connections.clear()
+            self._converted.clear()
+
+        try:
+            asyncio.run_coroutine_threadsafe(_close_all(), self._loop).result(timeout)
+        except Exception as e:
+            logger.error(f"Error closing MCP sessions: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._loop = None
+        self._thread = None
+
+
+mcp_pool = MCPConnectionPool()
+atexit.register(mcp_pool.close)
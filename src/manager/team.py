@@ -0,0 +1,190 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+from src.interface.agent import Agent
+from src.service.env import TEAM_MAX_AGENTS, TEAM_TOP_K_AGENTS, TEAM_TOP_K_TOOLS
+from src.utils.bm25 import BM25Index
+
+logger = logging.getLogger(__name__)
+
+TEAM_MEMBER_TEMPLATE = """
+    - **`{agent_name}`**: {agent_description}
+    """
+TOOL_TEMPLATE = """
+    - **`{tool_name}`**: {tool_description}
+    """
+
+
+class _Team:
+    __slots__ = ("shared", "names", "lines", "members", "description", "member_set", "index")
+
+    def __init__(self, shared: tuple, names: list, lines: dict):
+        self.shared = shared
+        self.names = names
+        self.lines = lines
+        self.members = ("agent_factory", *shared, *names)
+        self.description = "".join("\n" + lines[name] for name in names)
+        self.member_set = frozenset(self.members)
+        # ranking of the user's agents, built on the first query needing it
+        self.index: Optional[BM25Index] = None
+
+
+class TeamDescriptors:
+    """TEAM_MEMBERS, TEAM_MEMBERS_DESCRIPTION and TOOLS of the workflow prompts.
+
+    The description line of every agent is rendered once, when it is loaded,
+    created or edited, and the team of a user is assembled on first use and
+    kept until one of its agents changes. A user's team holds the share
+    agents plus the user's own agents, at most `max_agents` of them (the most
+    recently created or edited first, 0 keeps all); agents picked for a
+    workflow with coor_agents are always added.
+
+    With a query, only the `top_agents` of the user's own agents and the
+    `top_tools` tools most relevant to it by BM25 are listed (0 lists all),
+    so the prompts stop growing with the catalog.
+    """
+
+    def __init__(
+        self,
+        max_agents: int = TEAM_MAX_AGENTS,
+        top_agents: int = TEAM_TOP_K_AGENTS,
+        top_tools: int = TEAM_TOP_K_TOOLS,
+    ):
+        self.max_agents = max_agents
+        self.top_agents = top_agents
+        self.top_tools = top_tools
+        self._shared: "OrderedDict[str, None]" = OrderedDict()
+        # user -> agent name -> description line, least recently changed first
+        self._by_user: dict[str, "OrderedDict[str, str]"] = {}
+        self._owner: dict[str, str] = {}
+        self._teams: dict[str, _Team] = {}
+        # tool name -> description line, and their ranking
+        self._tools: Optional[dict] = None
+        self._tools_index: Optional[BM25Index] = None
+        self._tools_version = 0
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.ranked = 0
+
+    @staticmethod
+    def _describe(agent: Agent) -> str:
+        return TEAM_MEMBER_TEMPLATE.format(agent_name=agent.agent_name, agent_description=agent.description)
+
+    def _discard(self, agent_name: str):
+        owner = self._owner.pop(agent_name, None)
+        if owner is None:
+            return
+        if owner == "share":
+            self._shared.pop(agent_name, None)
+            # every team includes the share agents
+            self._teams.clear()
+        else:
+            self._by_user.get(owner, {}).pop(agent_name, None)
+            self._teams.pop(owner, None)
+
+    def _add(self, agent: Agent):
+        self._owner[agent.agent_name] = agent.user_id
+        if agent.user_id == "share":
+            self._shared[agent.agent_name] = None
+            self._teams.clear()
+        else:
+            self._by_user.setdefault(agent.user_id, OrderedDict())[agent.agent_name] = self._describe(agent)
+            self._teams.pop(agent.user_id, None)
+
+    def rebuild(self, agents: Iterable[Agent]):
+        """Start over from all loaded agents."""
+        with self._lock:
+            self._shared.clear()
+            self._by_user.clear()
+            self._owner.clear()
+            self._teams.clear()
+            for agent in agents:
+                self._add(agent)
+
+    def update(self, agent_name: str, agent: Optional[Agent]):
+        """Record a created or edited agent, `agent` is None when it was removed."""
+        with self._lock:
+            self._discard(agent_name)
+            if agent is not None:
+                self._add(agent)
+
+    def _team(self, user_id: str) -> _Team:
+        team = self._teams.get(user_id)
+        if team is None:
+            own = self._by_user.get(user_id, {})
+            names = list(own)
+            if self.max_agents > 0:
+                names = names[-self.max_agents:]
+            team = self._teams[user_id] = _Team(tuple(self._shared), names, {name: own[name] for name in names})
+            self.builds += 1
+        return team
+
+    def team(
+        self, user_id: str, coor_agents: Optional[List[str]] = None, query: Optional[str] = None
+    ) -> Tuple[List[str], str]:
+        """TEAM_MEMBERS and the description lines of the user's agents, the most relevant to `query` if given."""
+        with self._lock:
+            team = self._team(user_id)
+            members, description, member_set = team.members, team.description, team.member_set
+            if query and 0 < self.top_agents < len(team.names):
+                if team.index is None:
+                    team.index = BM25Index(team.lines)
+                names = team.index.top_k(query, self.top_agents)
+                members = ("agent_factory", *team.shared, *names)
+                description = "".join("\n" + team.lines[name] for name in names)
+                member_set = frozenset(members)
+                self.ranked += 1
+            extra = [
+                name for name in dict.fromkeys(coor_agents or [])
+                if name not in member_set and name in self._owner
+            ]
+            for name in extra:
+                owner = self._owner[name]
+                if owner != "share":
+                    description += "\n" + self._by_user[owner][name]
+        return [*members, *extra], description
+
+    def tools(self, available_tools: dict, query: Optional[str] = None) -> str:
+        """TOOLS description, the `top_tools` most relevant to `query` if given.
+
+        Lines are rendered again only after `tools_changed`.
+        """
+        lines, index = self._tools, self._tools_index
+        if lines is None:
+            version = self._tools_version
+            lines = {
+                tool_name: TOOL_TEMPLATE.format(tool_name=tool_name, tool_description=tool.description)
+                for tool_name, tool in list(available_tools.items())
+            }
+            index = None
+            # tools may change on the MCP discovery thread meanwhile
+            if version == self._tools_version:
+                self._tools, self._tools_index = lines, None
+        names = lines
+        if query and 0 < self.top_tools < len(lines):
+            if index is None:
+                index = BM25Index(lines)
+                if self._tools is lines:
+                    self._tools_index = index
+            names = index.top_k(query, self.top_tools)
+        return """
+    """ + "".join("\n" + lines[name] for name in names)
+
+    def tools_changed(self):
+        self._tools_version += 1
+        self._tools = None
+
+    def stats(self) -> dict:
+        return {
+            "agents": len(self._owner),
+            "shared": len(self._shared),
+            "users": len(self._by_user),
+            "cached_teams": len(self._teams),
+            "builds": self.builds,
+            "ranked": self.ranked,
+            "max_agents": self.max_agents,
+            "top_agents": self.top_agents,
+            "top_tools": self.top_tools,
+        }
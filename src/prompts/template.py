@@ -1,7 +1,9 @@
 import os
 import re
+import time
+import functools
+import threading
 from datetime import datetime
-import copy
 from langchain_core.prompts import PromptTemplate
 from langgraph.prebuilt.chat_agent_executor import AgentState
 from src.utils.path_utils import get_project_root
@@ -10,75 +12,104 @@ from src.interface.agent import Agent
 from src.interface.agent import State
 
 
-def get_prompt_template(prompt_name: str) -> str:
-    prompts_dir = get_project_root() / "src" / "prompts"
-    template = open(os.path.join(prompts_dir, f"{prompt_name}.md")).read()
-    
+# seconds a prompt file is trusted before its mtime is checked again
+PROMPT_RELOAD_INTERVAL = 2.0
+
+# prompt name -> (mtime_ns, content, time of the last mtime check)
+_prompt_files: dict = {}
+_prompt_files_lock = threading.Lock()
+
+
+def _read_prompt_file(prompt_name: str) -> str:
+    """Content of src/prompts/<prompt_name>.md, re-read only when the file changed."""
+    path = os.path.join(get_project_root() / "src" / "prompts", f"{prompt_name}.md")
+    now = time.monotonic()
+    cached = _prompt_files.get(prompt_name)
+    if cached is not None and now - cached[2] < PROMPT_RELOAD_INTERVAL:
+        return cached[1]
+    mtime = os.stat(path).st_mtime_ns
+    if cached is not None and cached[0] == mtime:
+        content = cached[1]
+    else:
+        with open(path) as f:
+            content = f.read()
+    with _prompt_files_lock:
+        _prompt_files[prompt_name] = (mtime, content, now)
+    return content
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_template(raw: str) -> tuple:
+    """Turns a `<<VAR>>` prompt into a format template, cached by prompt content."""
     # 提取模板中的变量名（格式为 <<VAR>>）
-    variables = re.findall(r"<<([^>>]+)>>", template)
+    variables = tuple(re.findall(r"<<([^>>]+)>>", raw))
     
     # Escape curly braces using backslash
     
-    template = template.replace("{", "{{").replace("}", "}}")
+    template = raw.replace("{", "{{").replace("}", "}}")
     # Replace `<<VAR>>` with `{VAR}`
     template = re.sub(r"<<([^>>]+)>>", r"{\1}", template)
     
     return template, variables
 
 
+@functools.lru_cache(maxsize=256)
+def _formatter(template: str) -> PromptTemplate:
+    """Ready PromptTemplate of a compiled template, validated once."""
+    return PromptTemplate(
+        input_variables=["CURRENT_TIME"],
+        template=template,
+    )
+
+
+def get_prompt_template(prompt_name: str) -> str:
+    template, variables = _compile_template(_read_prompt_file(prompt_name))
+    return template, list(variables)
+
+
+def _chat_message(msg) -> dict:
+    """Role/content dict of a state message, None for messages the prompt leaves out."""
+    if isinstance(msg, HumanMessage):
+        return {"role": "user", "content": msg.content}
+    if isinstance(msg, dict) and 'role' in msg:
+        if msg["role"] == "user":
+            return {"role": "user", "content": msg["content"]}
+        return {"role": "assistant", "content": msg["content"]}
+    return None
+
+
 def apply_prompt_template(prompt_name: str, state: State, template:str=None) -> list:
-    state = copy.deepcopy(state)
-    messages = []
-    for msg in state["messages"]:
-        if isinstance(msg, HumanMessage):
-            messages.append({"role": "user", "content": msg.content})
-        elif isinstance(msg, dict) and 'role' in msg:
-            if msg["role"] == "user":
-                messages.append({"role": "user", "content": msg["content"]})
-            else:
-                messages.append({"role": "assistant", "content": msg["content"]})
-    state["messages"] = messages
+    # formatting only reads the state, so a shallow view with the converted messages is enough;
+    # the returned messages are new dicts and never alias the state's
+    messages = [message for message in map(_chat_message, state["messages"]) if message is not None]
+    variables = {**state, "messages": messages}
     
     _template, _ = get_prompt_template(prompt_name) if not template else template
-    system_prompt = PromptTemplate(
-        input_variables=["CURRENT_TIME"],
-        template=_template,
-    ).format(CURRENT_TIME=datetime.now().strftime("%a %b %d %Y %H:%M:%S %z"), **state)
+    system_prompt = _formatter(_template).format(
+        CURRENT_TIME=datetime.now().strftime("%a %b %d %Y %H:%M:%S %z"), **variables
+    )
 
     return [{"role": "system", "content": system_prompt}] + messages
 
+@functools.lru_cache(maxsize=256)
 def decorate_prompt(template: str) -> list:
-    variables = re.findall(r"<<([^>>]+)>>", template)
-    template = template.replace("{", "{{").replace("}", "}}")
-    # Replace `<<VAR>>` with `{VAR}`
-    template = re.sub(r"<<([^>>]+)>>", r"{\1}", template)
+    template, _ = _compile_template(template)
     if "CURRENT_TIME" not in template:
         template = "Current time: {CURRENT_TIME}\n\n" + template
     return template
 
 def apply_prompt(state: AgentState, template:str=None) -> list:
-    template = decorate_prompt(template)
-    _prompt = PromptTemplate(
-        input_variables=["CURRENT_TIME"],
-        template=template,
-    ).format(CURRENT_TIME=datetime.now().strftime("%a %b %d %Y %H:%M:%S %z"), **state)
+    _prompt = _formatter(decorate_prompt(template)).format(
+        CURRENT_TIME=datetime.now().strftime("%a %b %d %Y %H:%M:%S %z"), **state
+    )
     return _prompt
 
 
 def apply_polish_template(_agent: Agent, instruction: str):
     try:
-        template_dir = get_project_root() / "src" / "prompts"
-        polish_template = open(os.path.join(template_dir, "agent_polish.md")).read()
-        # First, escape all literal curly braces in the template
-        polish_template = polish_template.replace("{", "{{").replace("}", "}}")
-        # Then, unescape the <<VAR>> style placeholders by converting them to single brace {VAR}
-        polish_template = re.sub(r"<<([^>>]+)>>", r"{\1}", polish_template)
-
-        # Create the PromptTemplate instance
-        prompt_instance = PromptTemplate(
-            input_variables=["CURRENT_TIME", "agent_to_modify", "available_tools", "user_instruction"],
-            template=polish_template,
-        )
+        # <<VAR>> placeholders become {VAR}, literal curly braces are escaped
+        polish_template, _ = get_prompt_template("agent_polish")
+        prompt_instance = _formatter(polish_template)
         # Format the prompt
         formatted_prompt = prompt_instance.format(
             CURRENT_TIME=datetime.now().strftime("%a %b %d %Y %H:%M:%S %z"),
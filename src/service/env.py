@@ -1,4 +1,6 @@
 import os
+import json
+import tempfile
 from dotenv import load_dotenv
 import logging
 
@@ -33,7 +35,90 @@ USE_MCP_TOOLS = eval(os.getenv("USE_MCP_TOOLS", "True"))
 USE_BROWSER = eval(os.getenv("USE_BROWSER", "False"))
 DEBUG = eval(os.getenv("DEBUG", "False"))
 BROWSER_BACKEND = os.getenv("BROWSER_BACKEND")
+# characters of page text the browser tool passes to the summarizing llm, about 2000 tokens of english
+BROWSER_TEXT_MAX_CHARS = int(os.getenv("BROWSER_TEXT_MAX_CHARS", "8000"))
+# browser backend: seconds per scroll request (the backend scrolls for 30), scrolls running at once,
+# seconds a browsed page's summary is reused (0 disables the cache) and the number of cached pages
+BROWSER_TIMEOUT = float(os.getenv("BROWSER_TIMEOUT", "90"))
+BROWSER_CONCURRENCY = int(os.getenv("BROWSER_CONCURRENCY", "2"))
+BROWSER_CACHE_TTL = float(os.getenv("BROWSER_CACHE_TTL", "1800"))
+BROWSER_CACHE_MAX_ENTRIES = int(os.getenv("BROWSER_CACHE_MAX_ENTRIES", "256"))
 MAX_STEPS = eval(os.getenv("MAX_STEPS", "25"))
+# most of a user's own agents listed to the planner, the most recently created or edited first (0 = all)
+TEAM_MAX_AGENTS = int(os.getenv("TEAM_MAX_AGENTS", "0"))
+# agents of the user and tools most relevant to the request (BM25) listed to the planner (0 = all)
+TEAM_TOP_K_AGENTS = int(os.getenv("TEAM_TOP_K_AGENTS", "10"))
+TEAM_TOP_K_TOOLS = int(os.getenv("TEAM_TOP_K_TOOLS", "20"))
+# Seconds a workflow waits for background MCP tool discovery before running without those tools
+MCP_DISCOVERY_TIMEOUT = float(os.getenv("MCP_DISCOVERY_TIMEOUT", "30"))
+# Plan steps of a production run executed at the same time when they do not depend on each other
+PLAN_MAX_CONCURRENCY = int(os.getenv("PLAN_MAX_CONCURRENCY", "4"))
+# Compiled ReAct agent graphs kept for reuse across steps
+AGENT_GRAPH_CACHE_SIZE = int(os.getenv("AGENT_GRAPH_CACHE_SIZE", "64"))
+# Pooled MCP sessions: concurrent calls per server, seconds between pings of an idle session
+# and the longest reconnect backoff
+MCP_MAX_CONCURRENCY = int(os.getenv("MCP_MAX_CONCURRENCY", "4"))
+MCP_HEALTH_CHECK_INTERVAL = float(os.getenv("MCP_HEALTH_CHECK_INTERVAL", "30"))
+MCP_RECONNECT_BACKOFF_MAX = float(os.getenv("MCP_RECONNECT_BACKOFF_MAX", "60"))
+# Seconds a synchronous call may hold the event loop before it is logged with its stack, 0 disables
+LOOP_BLOCK_THRESHOLD = float(os.getenv("LOOP_BLOCK_THRESHOLD", "0.5"))
+# Thread pools running blocking tools (bash, python repl, browser, crawl): workers and waiting calls
+# per tool, seconds before a call is abandoned, and json overrides per tool name such as
+# {"bash_tool": {"max_workers": 8, "max_queue": 32, "timeout": 600}}
+TOOL_EXECUTOR_WORKERS = int(os.getenv("TOOL_EXECUTOR_WORKERS", "4"))
+TOOL_EXECUTOR_QUEUE = int(os.getenv("TOOL_EXECUTOR_QUEUE", "16"))
+TOOL_EXECUTOR_TIMEOUT = float(os.getenv("TOOL_EXECUTOR_TIMEOUT", "300"))
+TOOL_EXECUTOR_LIMITS = json.loads(os.getenv("TOOL_EXECUTOR_LIMITS", "{}"))
+# Worker processes of python_repl_tool, one per user session: process limit, pre-started spares,
+# libraries imported ahead of time, memory (MB) and cpu (seconds per run) limits, wall clock
+# timeout and idle time before a session worker is closed, and the longest returned output
+PYTHON_REPL_WORKERS = int(os.getenv("PYTHON_REPL_WORKERS", "4"))
+PYTHON_REPL_WARM = int(os.getenv("PYTHON_REPL_WARM", "1"))
+PYTHON_REPL_PRELOAD = [m.strip() for m in os.getenv("PYTHON_REPL_PRELOAD", "numpy,pandas,matplotlib").split(",") if m.strip()]
+PYTHON_REPL_MEMORY_MB = int(os.getenv("PYTHON_REPL_MEMORY_MB", "2048"))
+PYTHON_REPL_CPU_SECONDS = int(os.getenv("PYTHON_REPL_CPU_SECONDS", "120"))
+PYTHON_REPL_TIMEOUT = float(os.getenv("PYTHON_REPL_TIMEOUT", "180"))
+PYTHON_REPL_IDLE_TIMEOUT = float(os.getenv("PYTHON_REPL_IDLE_TIMEOUT", "600"))
+PYTHON_REPL_MAX_OUTPUT = int(os.getenv("PYTHON_REPL_MAX_OUTPUT", "20000"))
+# bash_tool: seconds before the command's process group is killed, characters of stdout/stderr
+# returned to the model (head and tail, 0 = no cap) and where the full output of longer commands is kept
+BASH_TOOL_TIMEOUT = float(os.getenv("BASH_TOOL_TIMEOUT", "120"))
+BASH_TOOL_MAX_OUTPUT = int(os.getenv("BASH_TOOL_MAX_OUTPUT", "10000"))
+BASH_TOOL_SPILL_DIR = os.getenv("BASH_TOOL_SPILL_DIR", os.path.join(tempfile.gettempdir(), "cooragent_bash"))
+# Crawler http client: seconds per request, retries of failed requests and concurrent requests per host
+CRAWL_TIMEOUT = float(os.getenv("CRAWL_TIMEOUT", "60"))
+CRAWL_RETRIES = int(os.getenv("CRAWL_RETRIES", "3"))
+CRAWL_PER_HOST_CONCURRENCY = int(os.getenv("CRAWL_PER_HOST_CONCURRENCY", "8"))
+# Crawl result cache: directory (default store/crawl_cache), seconds before an entry is revalidated
+# (0 disables the cache), size bound in bytes, and offline mode serving only cached entries (fixtures)
+CRAWL_CACHE_DIR = os.getenv("CRAWL_CACHE_DIR", "")
+CRAWL_CACHE_TTL = float(os.getenv("CRAWL_CACHE_TTL", "86400"))
+CRAWL_CACHE_MAX_BYTES = int(os.getenv("CRAWL_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+CRAWL_CACHE_OFFLINE = eval(os.getenv("CRAWL_CACHE_OFFLINE", "False"))
+# tavily_tool result cache: seconds a result is reused (0 disables the cache, results never
+# outlive the hour they were searched in) and the number of cached queries
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "3600"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024"))
+# LLM response cache, opt-in: nodes whose answers are reused for identical requests (coordinator,
+# publisher and agent_factory run at temperature 0), seconds an answer is reused, answers kept in
+# memory and the SQLite file of the disk tier (default store/llm_cache.db, "none" keeps memory only)
+LLM_CACHE_NODES = [n.strip() for n in os.getenv("LLM_CACHE_NODES", "").split(",") if n.strip()]
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "")
+# Client side limits of the requests to each (model, base_url): requests and tokens per minute
+# (0 = unlimited) and requests in flight, waiting requests are served round robin across users
+LLM_RPM = int(os.getenv("LLM_RPM", "0"))
+LLM_TPM = int(os.getenv("LLM_TPM", "0"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+
+# Workflow cache bounds, 0 disables a bound
+WORKFLOW_CACHE_MAX_ENTRIES = int(os.getenv("WORKFLOW_CACHE_MAX_ENTRIES", "512"))
+WORKFLOW_CACHE_MAX_BYTES = int(os.getenv("WORKFLOW_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Persistence backend of workflows and agents: "file" (json files under store/) or "sqlite"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "file")
+STORAGE_SQLITE_PATH = os.getenv("STORAGE_SQLITE_PATH")
 
 if DEBUG != "True":
     logging.basicConfig(
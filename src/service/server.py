@@ -15,6 +15,17 @@ from fastapi.responses import FileResponse
 from src.service.tool_tracker import tool_tracker
 from src.tools.websocket_manager import websocket_manager
 from src.workflow.cache import workflow_cache
+from src.manager.mcp_pool import mcp_pool
+from src.workflow.agent_cache import compiled_agent_cache
+from src.utils.loop_monitor import loop_monitor
+from src.tools.executor import tool_executors
+from src.tools.repl_pool import python_repl_pool
+from src.tools.crawler.http_client import http_client
+from src.tools.crawler.cache import crawl_cache
+from src.tools.search_cache import search_cache
+from src.tools.browser_client import browser_client
+from src.llm.cache import llm_response_cache
+from src.llm.limiter import llm_limits
 
 
 logger = logging.getLogger(__name__)
@@ -76,6 +87,7 @@ class Server:
              logger.error("Agent workflow called before AgentManager was initialized.")
              raise Exception("Agent workflow called before AgentManager was initialized.")
         try:
+            await agent_manager.ensure_ready()
             agents:List[Agent] = await agent_manager._list_agents(request.user_id, request.match)
             for agent in agents:
                 yield agent.model_dump_json() + "\n"
@@ -86,6 +98,7 @@ class Server:
     @staticmethod
     async def _list_agents_json(user_id: str, match: Optional[str] = None):
         try:
+            await agent_manager.ensure_ready()
             agents: List[Agent] = await agent_manager._list_agents(user_id, match)
             return [agent.model_dump() for agent in agents]
         except Exception as e:
@@ -102,8 +115,8 @@ class Server:
     @staticmethod
     async def _list_workflow_json(user_id: str, match: Optional[str] = None):
         try:
-            workflows = workflow_cache.list_workflows(user_id, match)
-            default_workflows = workflow_cache.list_workflows('share')
+            workflows = workflow_cache.list_workflow_metas(user_id, match)
+            default_workflows = workflow_cache.list_workflow_metas('share')
             workflows.extend(default_workflows)
             workflowJsons = []
             for workflow in workflows:
@@ -133,9 +146,28 @@ class Server:
             logger.error(f"Error listing workflows: {e}", exc_info=True)
             raise Exception(f"Error listing workflows: {e}")
 
+    @staticmethod
+    def _cache_stats():
+        return {
+            "workflow_cache": workflow_cache.stats(),
+            "mcp_pool": mcp_pool.stats(),
+            "compiled_agents": compiled_agent_cache.stats(),
+            "event_loop": loop_monitor.stats(),
+            "tool_executors": tool_executors.stats(),
+            "python_repl": python_repl_pool.stats(),
+            "crawl_http": http_client.stats(),
+            "crawl_cache": crawl_cache.stats(),
+            "search_cache": search_cache.stats(),
+            "browser": browser_client.stats(),
+            "team": agent_manager.team.stats(),
+            "llm_cache": llm_response_cache.stats(),
+            "llm_limits": llm_limits.stats(),
+        }
+
     @staticmethod
     async def _list_user_all_agents(user_id: str):
         try:
+            await agent_manager.ensure_ready()
             agents = agent_manager._list_user_all_agents(user_id)
             return [agent.model_dump() for agent in agents]
         except Exception as e:
@@ -144,7 +176,8 @@ class Server:
     @staticmethod
     async def _list_default_agents_json():
         try:
-            agents = agent_manager._list_default_agents()
+            await agent_manager.ensure_ready()
+            agents = await agent_manager._list_default_agents()
             return [agent.model_dump() for agent in agents]
         except Exception as e:
             raise Exception(f"Error listing default agents: {e}")
@@ -152,6 +185,7 @@ class Server:
     @staticmethod
     async def _edit_workflow(user_id: str, workflow):
         try:
+            await agent_manager.ensure_ready()
             nodes = workflow["nodes"]
             for _, node in nodes.items():
                 if node["component_type"] == "agent" and node["config"]["type"] == "execution_agent":
@@ -159,7 +193,7 @@ class Server:
                         agent_name = node["name"]
                         agents = agent_manager._list_user_all_agents(user_id)
                         for agent in agents:
-                            if agent["agent_name"] == node["name"]:
+                            if agent.agent_name == node["name"]:
                                 from datetime import datetime
                                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                                 agent_name = f"{node['name']}_{timestamp}"
@@ -214,6 +248,7 @@ class Server:
              logger.error("Agent workflow called before AgentManager was initialized.")
              raise Exception("Agent workflow called before AgentManager was initialized.")
         try:
+            await agent_manager.ensure_ready()
             agents = await agent_manager._list_default_agents()
             for agent in agents:
                 yield agent.model_dump_json() + "\n"
@@ -227,6 +262,8 @@ class Server:
              logger.error("Agent workflow called before AgentManager was initialized.")
              raise Exception("Agent workflow called before AgentManager was initialized.")
         try:
+            await agent_manager.ensure_ready()
+            await agent_manager.wait_for_tools()
             tools = await agent_manager._list_default_tools()
             for tool in tools:
                 yield tool.model_dump_json() + "\n"
@@ -242,6 +279,7 @@ class Server:
              logger.error("Agent workflow called before AgentManager was initialized.")
              raise Exception("Agent workflow called before AgentManager was initialized.")
         try:
+            await agent_manager.ensure_ready()
             result = await agent_manager._edit_agent(request)
             yield json.dumps({"result": result}) + "\n"
         except NotFoundAgentError as e:
@@ -271,6 +309,7 @@ class Server:
              yield json.dumps({"result": "error", "message": "Service not ready, AgentManager not initialized."}) + "\n"
              return
         try:
+            await agent_manager.ensure_ready()
             await agent_manager._remove_agent(request.agent_name)
             yield json.dumps({"result": "success", "message": f"Agent '{request.agent_name}' deleted successfully."}) + "\n"
         except Exception as e:
@@ -0,0 +1,41 @@
+import logging
+from pathlib import Path
+
+from config.global_variables import workflows_dir
+from src.service.env import STORAGE_BACKEND, STORAGE_SQLITE_PATH
+from .base import StorageBackend, WORKFLOW_HEADER_FIELDS, workflow_header
+from .file import FileStorage, MANIFEST_FILE
+from .sqlite import SQLiteStorage
+
+logger = logging.getLogger(__name__)
+
+_storage = None
+
+
+def default_sqlite_path() -> Path:
+    return Path(STORAGE_SQLITE_PATH) if STORAGE_SQLITE_PATH else workflows_dir.parent / "cooragent.db"
+
+
+def get_storage() -> StorageBackend:
+    """Process wide storage backend selected by STORAGE_BACKEND."""
+    global _storage
+    if _storage is None:
+        if STORAGE_BACKEND == "sqlite":
+            _storage = SQLiteStorage(default_sqlite_path())
+        elif STORAGE_BACKEND == "file":
+            _storage = FileStorage()
+        else:
+            raise ValueError(f"Unknown STORAGE_BACKEND {STORAGE_BACKEND}, expected 'file' or 'sqlite'")
+        logger.info(f"Using {STORAGE_BACKEND} storage backend")
+    return _storage
+
+
+__all__ = [
+    "StorageBackend",
+    "FileStorage",
+    "SQLiteStorage",
+    "MANIFEST_FILE",
+    "WORKFLOW_HEADER_FIELDS",
+    "workflow_header",
+    "get_storage",
+]
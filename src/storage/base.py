@@ -0,0 +1,63 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+# top-level workflow fields kept alongside the body so listings never parse it
+WORKFLOW_HEADER_FIELDS = (
+    "workflow_id",
+    "mode",
+    "lap",
+    "version",
+    "user_input_messages",
+    "deep_thinking_mode",
+    "search_before_planning",
+)
+
+
+def workflow_header(workflow: dict) -> dict:
+    return {field: workflow.get(field) for field in WORKFLOW_HEADER_FIELDS}
+
+
+class StorageBackend(ABC):
+    """Persistence of workflow bodies and agent definitions.
+
+    Methods are synchronous; callers on the event loop run them in a thread.
+    """
+
+    @abstractmethod
+    def load_workflow(self, user_id: str, polish_id: str) -> Optional[dict]:
+        """Return the workflow body, or None if it does not exist."""
+
+    @abstractmethod
+    def save_workflow(self, user_id: str, polish_id: str, content: str, header: dict) -> None:
+        """Persist a serialized workflow together with its header fields."""
+
+    @abstractmethod
+    def list_workflow_metas(self, user_id: str, match: str = None) -> List[dict]:
+        """List header fields (plus mtime_ns) of the user workflows whose polish id matches `match`."""
+
+    @abstractmethod
+    def latest_polish_id(self, user_id: str) -> Optional[str]:
+        """Polish id of the most recently written workflow of the user."""
+
+    @abstractmethod
+    def load_agent(self, agent_name: str) -> Optional[str]:
+        """Return the agent definition json, or None if it does not exist."""
+
+    @abstractmethod
+    def agent_exists(self, agent_name: str) -> bool:
+        pass
+
+    @abstractmethod
+    def save_agent(self, agent_name: str, user_id: str, agent_json: str, prompt: str, overwrite: bool = False) -> bool:
+        """Persist an agent definition and its prompt, returns False when nothing was written."""
+
+    @abstractmethod
+    def remove_agent(self, agent_name: str) -> None:
+        pass
+
+    @abstractmethod
+    def list_agent_names(self, user_id: str = None, match: str = None) -> List[str]:
+        pass
+
+    def close(self) -> None:
+        pass
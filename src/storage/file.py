@@ -0,0 +1,229 @@
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+from config.global_variables import agents_dir, prompts_dir, workflows_dir
+from .base import StorageBackend, workflow_header
+
+logger = logging.getLogger(__name__)
+
+# per-user manifest file, kept next to the workflow json files. It does not
+# use the .json suffix so directory scans never mistake it for a workflow.
+# It is a log of json lines, each mapping polish ids to their entries; later
+# lines win. A save appends one line, the log is compacted into a single
+# line once it holds more lines than entries (and at least MANIFEST_LOG_SLACK).
+MANIFEST_FILE = ".manifest"
+MANIFEST_LOG_SLACK = 64
+
+
+def atomic_write(path: Path, content: str):
+    """Write to a temp file in the same directory and rename it over the target."""
+    tmp_path = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, "w", encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+class FileStorage(StorageBackend):
+    """One json file per object: store/workflows/<user>/<polish_id>.json, store/agents/*.json and store/prompts/*.md."""
+
+    def __init__(self, workflow_dir: Path = workflows_dir, agent_dir: Path = agents_dir, prompt_dir: Path = prompts_dir):
+        for path in [workflow_dir, agent_dir, prompt_dir]:
+            Path(path).mkdir(parents=True, exist_ok=True)
+        self.workflow_dir = Path(workflow_dir)
+        self.agents_dir = Path(agent_dir)
+        self.prompt_dir = Path(prompt_dir)
+        self._lock_pool = {}
+        # user_id -> {polish_id: manifest entry}
+        self._manifest = {}
+        # user_id -> (st_ino, st_mtime_ns) of the user workflow dir the manifest was built from
+        self._manifest_signature = {}
+        # user_id -> number of lines in the manifest log
+        self._manifest_lines = {}
+
+    def _get_lock(self, user_id: str) -> threading.RLock:
+        if user_id not in self._lock_pool:
+            self._lock_pool[user_id] = threading.RLock()
+        return self._lock_pool[user_id]
+
+    def _dir_signature(self, user_workflow_dir: Path):
+        dir_stat = user_workflow_dir.stat()
+        return (dir_stat.st_ino, dir_stat.st_mtime_ns)
+
+    def _manifest_entry(self, header: dict, file_stat: os.stat_result, filename: str) -> dict:
+        entry = dict(header)
+        entry["path"] = filename
+        entry["inode"] = file_stat.st_ino
+        entry["mtime_ns"] = file_stat.st_mtime_ns
+        entry["size"] = file_stat.st_size
+        return entry
+
+    def _read_manifest_file(self, user_id: str) -> dict:
+        manifest_path = self.workflow_dir / user_id / MANIFEST_FILE
+        manifest = {}
+        lines = 0
+        try:
+            with open(manifest_path, "r", encoding='utf-8') as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        manifest.update(json.loads(line))
+                    except Exception as e:
+                        # a line torn by a crash, its entries are rebuilt from the workflow files
+                        logger.warning(f"Ignoring unreadable line of workflow manifest {manifest_path}: {e}")
+        except FileNotFoundError:
+            pass
+        self._manifest_lines[user_id] = lines
+        return manifest
+
+    def _write_manifest_file(self, user_id: str):
+        """Compact the manifest log into a single line holding every entry."""
+        user_workflow_dir = self.workflow_dir / user_id
+        atomic_write(user_workflow_dir / MANIFEST_FILE, json.dumps(dict(self._manifest[user_id]), ensure_ascii=False) + "\n")
+        self._manifest_lines[user_id] = 1
+        # writing the manifest touches the directory, remember the new state
+        self._manifest_signature[user_id] = self._dir_signature(user_workflow_dir)
+
+    def _append_manifest_entry(self, user_id: str, polish_id: str):
+        """Record one changed entry at the end of the manifest log, O(1) in the number of workflows."""
+        manifest = self._manifest[user_id]
+        lines = self._manifest_lines.get(user_id, 0)
+        if lines >= max(len(manifest), MANIFEST_LOG_SLACK):
+            self._write_manifest_file(user_id)
+            return
+        user_workflow_dir = self.workflow_dir / user_id
+        with open(user_workflow_dir / MANIFEST_FILE, "a", encoding='utf-8') as f:
+            f.write(json.dumps({polish_id: manifest[polish_id]}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._manifest_lines[user_id] = lines + 1
+        # the workflow write (and creating the log) touches the directory, remember the new state
+        self._manifest_signature[user_id] = self._dir_signature(user_workflow_dir)
+
+    def _refresh_manifest(self, user_id: str) -> dict:
+        """Bring the user manifest up to date with the workflow dir.
+
+        Only the manifest is read up front; a workflow file is parsed again only
+        when its inode, mtime or size no longer match the manifest entry.
+        """
+        with self._get_lock(user_id):
+            user_workflow_dir = self.workflow_dir / user_id
+            if not user_workflow_dir.exists():
+                # only create user workflow dir
+                logger.info(f"path {user_workflow_dir} does not exist when user {user_id} workflow cache initializing, gona to create...")
+                user_workflow_dir.mkdir(parents=True, exist_ok=True)
+                self._manifest[user_id] = {}
+                self._manifest_signature[user_id] = self._dir_signature(user_workflow_dir)
+                return self._manifest[user_id]
+
+            signature = self._dir_signature(user_workflow_dir)
+            if user_id in self._manifest and self._manifest_signature.get(user_id) == signature:
+                return self._manifest[user_id]
+
+            manifest = self._manifest.get(user_id) or self._read_manifest_file(user_id)
+            refreshed = {}
+            with os.scandir(user_workflow_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".json") or not entry.is_file():
+                        continue
+                    polish_id = entry.name[: -len(".json")]
+                    file_stat = entry.stat()
+                    known = manifest.get(polish_id)
+                    if known and known["inode"] == file_stat.st_ino and known["mtime_ns"] == file_stat.st_mtime_ns and known["size"] == file_stat.st_size:
+                        refreshed[polish_id] = known
+                        continue
+                    with open(entry.path, "r", encoding='utf-8') as f:
+                        workflow = json.load(f)
+                    refreshed[polish_id] = self._manifest_entry(workflow_header(workflow), file_stat, entry.name)
+
+            self._manifest[user_id] = refreshed
+            if refreshed != manifest:
+                self._write_manifest_file(user_id)
+            else:
+                self._manifest_signature[user_id] = signature
+            return refreshed
+
+    def load_workflow(self, user_id: str, polish_id: str) -> Optional[dict]:
+        entry = self._manifest.get(user_id, {}).get(polish_id)
+        filename = entry["path"] if entry else f"{polish_id}.json"
+        try:
+            with open(self.workflow_dir / user_id / filename, "r", encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save_workflow(self, user_id: str, polish_id: str, content: str, header: dict) -> None:
+        workflow_path = self.workflow_dir / user_id / f"{polish_id}.json"
+        with self._get_lock(user_id):
+            if user_id not in self._manifest:
+                self._refresh_manifest(user_id)
+            atomic_write(workflow_path, content)
+            self._manifest[user_id][polish_id] = self._manifest_entry(header, workflow_path.stat(), workflow_path.name)
+            self._append_manifest_entry(user_id, polish_id)
+
+    def list_workflow_metas(self, user_id: str, match: str = None) -> List[dict]:
+        manifest = self._refresh_manifest(user_id)
+        return [
+            dict(entry) for polish_id, entry in manifest.items()
+            if not match or re.match(match, polish_id)
+        ]
+
+    def latest_polish_id(self, user_id: str) -> Optional[str]:
+        manifest = self._refresh_manifest(user_id)
+        if not manifest:
+            return None
+        return max(manifest, key=lambda polish_id: manifest[polish_id]["mtime_ns"])
+
+    def load_agent(self, agent_name: str) -> Optional[str]:
+        agent_path = self.agents_dir / f"{agent_name}.json"
+        try:
+            with open(agent_path, "r", encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def agent_exists(self, agent_name: str) -> bool:
+        return (self.agents_dir / f"{agent_name}.json").exists()
+
+    def save_agent(self, agent_name: str, user_id: str, agent_json: str, prompt: str, overwrite: bool = False) -> bool:
+        agent_path = self.agents_dir / f"{agent_name}.json"
+        agent_prompt_path = self.prompt_dir / f"{agent_name}.md"
+        written = False
+        for path, content in [(agent_path, agent_json), (agent_prompt_path, prompt)]:
+            if overwrite or not path.exists():
+                atomic_write(path, content)
+                written = True
+        return written
+
+    def remove_agent(self, agent_name: str) -> None:
+        agent_path = self.agents_dir / f"{agent_name}.json"
+        agent_prompt_path = self.prompt_dir / f"{agent_name}.md"
+        if agent_path.exists():
+            agent_path.unlink()
+            logger.info(f"Removed agent definition file: {agent_path}")
+        if agent_prompt_path.exists():
+            agent_prompt_path.unlink()
+            logger.info(f"Removed agent prompt file: {agent_prompt_path}")
+
+    def list_agent_names(self, user_id: str = None, match: str = None) -> List[str]:
+        names = []
+        for agent_path in self.agents_dir.glob("*.json"):
+            agent_name = agent_path.stem
+            if match and not re.match(match, agent_name):
+                continue
+            if user_id:
+                agent_json = self.load_agent(agent_name)
+                if not agent_json or json.loads(agent_json).get("user_id") != user_id:
+                    continue
+            names.append(agent_name)
+        return names
@@ -0,0 +1,76 @@
+"""Import a json file store into the SQLite backend.
+
+    python -m src.storage.migrate [--db store/cooragent.db] [--overwrite]
+
+Workflows are read from store/workflows/<user_id>/*.json, agents from
+store/agents/*.json together with their store/prompts/*.md prompt. Running
+it again is safe, rows that already exist are kept unless --overwrite is set.
+"""
+import argparse
+import json
+import logging
+from pathlib import Path
+
+from config.global_variables import agents_dir, prompts_dir, workflows_dir
+from . import default_sqlite_path
+from .base import workflow_header
+from .sqlite import SQLiteStorage
+
+logger = logging.getLogger(__name__)
+
+
+def migrate_workflows(storage: SQLiteStorage, workflow_dir: Path, overwrite: bool = False) -> int:
+    migrated = 0
+    for user_workflow_dir in sorted(p for p in Path(workflow_dir).iterdir() if p.is_dir()):
+        user_id = user_workflow_dir.name
+        existing = {meta["path"] for meta in storage.list_workflow_metas(user_id)}
+        for workflow_path in sorted(user_workflow_dir.glob("*.json")):
+            if not overwrite and workflow_path.name in existing:
+                continue
+            try:
+                content = workflow_path.read_text(encoding='utf-8')
+                workflow = json.loads(content)
+            except Exception as e:
+                logger.error(f"Skipping unreadable workflow {workflow_path}: {e}")
+                continue
+            storage.save_workflow(user_id, workflow_path.stem, content, workflow_header(workflow))
+            migrated += 1
+    return migrated
+
+
+def migrate_agents(storage: SQLiteStorage, agent_dir: Path, prompt_dir: Path, overwrite: bool = False) -> int:
+    migrated = 0
+    for agent_path in sorted(Path(agent_dir).glob("*.json")):
+        try:
+            agent_json = agent_path.read_text(encoding='utf-8')
+            agent = json.loads(agent_json)
+        except Exception as e:
+            logger.error(f"Skipping unreadable agent {agent_path}: {e}")
+            continue
+        prompt_path = Path(prompt_dir) / f"{agent_path.stem}.md"
+        prompt = prompt_path.read_text(encoding='utf-8') if prompt_path.exists() else agent.get("prompt", "")
+        if storage.save_agent(agent_path.stem, agent.get("user_id", "share"), agent_json, prompt, overwrite=overwrite):
+            migrated += 1
+    return migrated
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import the json file store into the SQLite storage backend.")
+    parser.add_argument("--db", type=Path, default=default_sqlite_path(), help="target SQLite database")
+    parser.add_argument("--workflows-dir", type=Path, default=workflows_dir)
+    parser.add_argument("--agents-dir", type=Path, default=agents_dir)
+    parser.add_argument("--prompts-dir", type=Path, default=prompts_dir)
+    parser.add_argument("--overwrite", action="store_true", help="replace rows that already exist")
+    args = parser.parse_args(argv)
+
+    storage = SQLiteStorage(args.db)
+    try:
+        workflows = migrate_workflows(storage, args.workflows_dir, args.overwrite) if args.workflows_dir.exists() else 0
+        agents = migrate_agents(storage, args.agents_dir, args.prompts_dir, args.overwrite) if args.agents_dir.exists() else 0
+    finally:
+        storage.close()
+    print(f"migrated {workflows} workflows and {agents} agents into {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from .base import StorageBackend, WORKFLOW_HEADER_FIELDS
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workflows (
+    user_id TEXT NOT NULL,
+    polish_id TEXT NOT NULL,
+    workflow_id TEXT,
+    mode TEXT,
+    lap INTEGER,
+    version INTEGER,
+    header TEXT NOT NULL,
+    body TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    PRIMARY KEY (user_id, polish_id)
+);
+CREATE INDEX IF NOT EXISTS idx_workflows_user_mtime ON workflows (user_id, mtime_ns DESC);
+CREATE TABLE IF NOT EXISTS agents (
+    agent_name TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    body TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_agents_user ON agents (user_id, agent_name);
+"""
+
+
+def _regexp(pattern: str, value: str) -> bool:
+    return value is not None and re.match(pattern, value) is not None
+
+
+class SQLiteStorage(StorageBackend):
+    """Workflows and agents in a single SQLite database in WAL mode.
+
+    Readers never block the writer thread, and listing a user's workflows is an
+    index scan over the header columns instead of a directory walk.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # sqlite connections are not shared between threads, one per thread
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.create_function("REGEXP", 2, _regexp, deterministic=True)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def load_workflow(self, user_id: str, polish_id: str) -> Optional[dict]:
+        row = self._connection().execute(
+            "SELECT body FROM workflows WHERE user_id = ? AND polish_id = ?", (user_id, polish_id)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_workflow(self, user_id: str, polish_id: str, content: str, header: dict) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO workflows (user_id, polish_id, workflow_id, mode, lap, version, header, body, mtime_ns) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    user_id,
+                    polish_id,
+                    header.get("workflow_id"),
+                    header.get("mode"),
+                    header.get("lap"),
+                    header.get("version"),
+                    json.dumps(header, ensure_ascii=False),
+                    content,
+                    time.time_ns(),
+                ),
+            )
+
+    def list_workflow_metas(self, user_id: str, match: str = None) -> List[dict]:
+        query = "SELECT polish_id, header, length(body), mtime_ns FROM workflows WHERE user_id = ?"
+        params = [user_id]
+        if match:
+            query += " AND polish_id REGEXP ?"
+            params.append(match)
+        metas = []
+        for polish_id, header, size, mtime_ns in self._connection().execute(query, params):
+            entry = {field: None for field in WORKFLOW_HEADER_FIELDS}
+            entry.update(json.loads(header))
+            entry["path"] = f"{polish_id}.json"
+            entry["mtime_ns"] = mtime_ns
+            entry["size"] = size
+            metas.append(entry)
+        return metas
+
+    def latest_polish_id(self, user_id: str) -> Optional[str]:
+        row = self._connection().execute(
+            "SELECT polish_id FROM workflows WHERE user_id = ? ORDER BY mtime_ns DESC LIMIT 1", (user_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def load_agent(self, agent_name: str) -> Optional[str]:
+        row = self._connection().execute(
+            "SELECT body FROM agents WHERE agent_name = ?", (agent_name,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def agent_exists(self, agent_name: str) -> bool:
+        return self._connection().execute(
+            "SELECT 1 FROM agents WHERE agent_name = ?", (agent_name,)
+        ).fetchone() is not None
+
+    def save_agent(self, agent_name: str, user_id: str, agent_json: str, prompt: str, overwrite: bool = False) -> bool:
+        verb = "INSERT OR REPLACE" if overwrite else "INSERT OR IGNORE"
+        with self._connection() as conn:
+            cursor = conn.execute(
+                f"{verb} INTO agents (agent_name, user_id, body, prompt, mtime_ns) VALUES (?, ?, ?, ?, ?)",
+                (agent_name, user_id, agent_json, prompt, time.time_ns()),
+            )
+            return cursor.rowcount > 0
+
+    def remove_agent(self, agent_name: str) -> None:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM agents WHERE agent_name = ?", (agent_name,))
+        logger.info(f"Removed agent {agent_name} from {self.db_path}")
+
+    def list_agent_names(self, user_id: str = None, match: str = None) -> List[str]:
+        query = "SELECT agent_name FROM agents WHERE 1 = 1"
+        params = []
+        if user_id:
+            query += " AND user_id = ?"
+            params.append(user_id)
+        if match:
+            query += " AND agent_name REGEXP ?"
+            params.append(match)
+        return [row[0] for row in self._connection().execute(query, params)]
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except Exception as e:
+                    logger.error(f"Error closing sqlite connection: {e}")
+            self._connections.clear()
+        self._local = threading.local()
@@ -1,19 +1,108 @@
+import os
+import time
+import codecs
+import signal
+import asyncio
 import logging
+import tempfile
+import threading
 import subprocess
 from typing import ClassVar, Type
 from pydantic import BaseModel, Field
 from langchain.tools import BaseTool
+from langchain_core.runnables import ensure_config
 from .decorators import create_logged_tool
+from src.service.env import BASH_TOOL_TIMEOUT, BASH_TOOL_MAX_OUTPUT, BASH_TOOL_SPILL_DIR
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
+# bytes read from a pipe at a time while streaming
+READ_CHUNK = 4096
+# seconds between SIGTERM and SIGKILL of a timed out command
+KILL_GRACE = 2
+
 
 class BashToolInput(BaseModel):
     """Input for Bash Tool."""
     cmd: str = Field(..., description="The bash command to be executed.")
 
 
+class _OutputCapture:
+    """Collects one output stream of a command, bounded to `max_chars`.
+
+    Past the bound only the head and tail are kept in memory and the full
+    stream is written to a spill file that the result refers to.
+    """
+
+    def __init__(self, stream: str, max_chars: int = None):
+        self.stream = stream
+        self.max_chars = BASH_TOOL_MAX_OUTPUT if max_chars is None else max_chars
+        self.tail_chars = self.max_chars - self.max_chars // 2
+        self.buffer = ""
+        self.head = ""
+        self.tail = ""
+        self.total = 0
+        self.spill = None
+        self.spill_path = None
+
+    def write(self, text: str):
+        self.total += len(text)
+        if self.spill is not None:
+            self.spill.write(text)
+            self.tail = (self.tail + text)[-self.tail_chars:]
+            return
+        self.buffer += text
+        if 0 < self.max_chars < len(self.buffer):
+            os.makedirs(BASH_TOOL_SPILL_DIR, exist_ok=True)
+            self.spill = tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=BASH_TOOL_SPILL_DIR, prefix=f"{self.stream}_", suffix=".log", delete=False
+            )
+            self.spill_path = self.spill.name
+            self.spill.write(self.buffer)
+            self.head = self.buffer[: self.max_chars // 2]
+            self.tail = self.buffer[-self.tail_chars:]
+            self.buffer = ""
+
+    def value(self) -> str:
+        if self.spill is None:
+            return self.buffer
+        self.spill.close()
+        omitted = self.total - len(self.head) - len(self.tail)
+        return (
+            f"{self.head}\n... [{omitted} characters omitted, the full {self.stream} "
+            f"({self.total} characters) is in {self.spill_path}] ...\n{self.tail}"
+        )
+
+
+def _signal_group(pid: int, sig: int):
+    try:
+        os.killpg(pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _pump(pipe, capture: _OutputCapture):
+    """Copy a pipe of a blocking Popen into `capture` as the output arrives, runs on a thread."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    with pipe:
+        while chunk := pipe.read1(READ_CHUNK):
+            capture.write(decoder.decode(chunk))
+    capture.write(decoder.decode(b"", final=True))
+
+
+def _result(returncode: int, stdout: _OutputCapture, stderr: _OutputCapture, timed_out: bool) -> str:
+    if timed_out:
+        error_message = f"Command timed out after {BASH_TOOL_TIMEOUT}s and was killed.\nStdout: {stdout.value()}\nStderr: {stderr.value()}"
+    elif returncode != 0:
+        error_message = f"Command failed with exit code {returncode}.\nStdout: {stdout.value()}\nStderr: {stderr.value()}"
+    else:
+        # Return stdout as the result
+        return stdout.value()
+    logger.error(error_message)
+    return error_message
+
+
 class BashTool(BaseTool):
     name: ClassVar[str] = "bash_tool"
     args_schema: Type[BaseModel] = BashToolInput
@@ -22,27 +111,96 @@ class BashTool(BaseTool):
     def _run(self, cmd: str) -> str:
         """Execute bash command and return result."""
         logger.info(f"Executing Bash Command: {cmd}")
+        stdout, stderr = _OutputCapture("stdout"), _OutputCapture("stderr")
         try:
-            # Execute the command and capture output
-            result = subprocess.run(
-                cmd, shell=True, check=True, text=True, capture_output=True
+            # a session of its own, so a timeout kills the whole process group
+            process = subprocess.Popen(
+                cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True,
             )
-            # Return stdout as the result
-            return result.stdout
-        except subprocess.CalledProcessError as e:
-            # If command fails, return error information
-            error_message = f"Command failed with exit code {e.returncode}.\nStdout: {e.stdout}\nStderr: {e.stderr}"
-            logger.error(error_message)
-            return error_message
         except Exception as e:
             # Catch any other exceptions
             error_message = f"Error executing command: {str(e)}"
             logger.error(error_message)
             return error_message
 
+        # output is captured while it arrives, so only the bounded head and tail stay in memory
+        readers = [
+            threading.Thread(target=_pump, args=(process.stdout, stdout), name="bash-stdout", daemon=True),
+            threading.Thread(target=_pump, args=(process.stderr, stderr), name="bash-stderr", daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+        deadline = time.monotonic() + BASH_TOOL_TIMEOUT
+        timed_out = False
+        try:
+            process.wait(BASH_TOOL_TIMEOUT)
+            for reader in readers:
+                reader.join(max(0, deadline - time.monotonic()))
+            # children may outlive the shell and keep the pipes open
+            timed_out = any(reader.is_alive() for reader in readers)
+        except subprocess.TimeoutExpired:
+            timed_out = True
+        finally:
+            if process.returncode is None or timed_out:
+                _signal_group(process.pid, signal.SIGTERM)
+                try:
+                    process.wait(KILL_GRACE)
+                except subprocess.TimeoutExpired:
+                    pass
+                _signal_group(process.pid, signal.SIGKILL)
+                for reader in readers:
+                    reader.join(KILL_GRACE)
+        return _result(process.returncode, stdout, stderr, timed_out)
+
     async def _arun(self, cmd: str) -> str:
-        """Async version of bash tool."""
-        return self._run(cmd)
+        """Async version of bash tool, streams output to the workflow events and the user's websocket."""
+        from src.workflow.streaming import emit_tool_output
+        from .websocket_manager import websocket_manager
+
+        logger.info(f"Executing Bash Command: {cmd}")
+        user_id = ensure_config().get("configurable", {}).get("user_id")
+        stdout, stderr = _OutputCapture("stdout"), _OutputCapture("stderr")
+
+        async def pump(reader: asyncio.StreamReader, capture: _OutputCapture):
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            while chunk := await reader.read(READ_CHUNK):
+                text = decoder.decode(chunk)
+                if not text:
+                    continue
+                capture.write(text)
+                emit_tool_output(self.name, capture.stream, text)
+                if user_id:
+                    await websocket_manager.broadcast_tool_output(user_id, self.name, capture.stream, text)
+            capture.write(decoder.decode(b"", final=True))
+
+        try:
+            process = await asyncio.create_subprocess_shell(
+                cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, start_new_session=True,
+            )
+        except Exception as e:
+            error_message = f"Error executing command: {str(e)}"
+            logger.error(error_message)
+            return error_message
+
+        timed_out = False
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(pump(process.stdout, stdout), pump(process.stderr, stderr), process.wait()),
+                BASH_TOOL_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            timed_out = True
+        finally:
+            # also reached when the workflow is cancelled
+            if process.returncode is None or timed_out:
+                _signal_group(process.pid, signal.SIGTERM)
+                try:
+                    await asyncio.wait_for(process.wait(), KILL_GRACE)
+                except asyncio.TimeoutError:
+                    pass
+                # children may outlive the shell and keep the pipes open
+                _signal_group(process.pid, signal.SIGKILL)
+        return _result(process.returncode, stdout, stderr, timed_out)
 
 
 # Create logged version of the tool
@@ -1,12 +1,14 @@
-import requests
 import json
 import re
 from pydantic import BaseModel, Field
-from typing import ClassVar, Type
+from typing import ClassVar, Optional, Tuple, Type
 from langchain.tools import BaseTool
 from src.tools.browser_decorators import create_logged_tool
+from src.tools.executor import tool_executors
+from src.tools.browser_client import browser_client
 from src.llm.llm import get_llm_by_type
-from src.service.env import USE_BROWSER, BROWSER_BACKEND
+from src.service.env import USE_BROWSER, BROWSER_TEXT_MAX_CHARS
+from src.utils.html_text import extract_text
 import os
 import logging
 
@@ -30,42 +32,16 @@ class BrowserTool(BaseTool):
         return USE_BROWSER
     
     def _extract_text_from_html(self, html_content: str) -> str:
-        """Extract plain text content from HTML"""
+        """Extract plain text content from HTML, the main content within BROWSER_TEXT_MAX_CHARS"""
         try:
-            # Remove script and style tags and their content
-            text = re.sub(r'<script[^>]*>.*?</script>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
-            text = re.sub(r'<style[^>]*>.*?</style>', '', text, flags=re.DOTALL | re.IGNORECASE)
-            
-            # Remove HTML tags
-            text = re.sub(r'<[^>]+>', '', text)
-            
-            # Decode HTML entities
-            text = text.replace('&nbsp;', ' ')
-            text = text.replace('&lt;', '<')
-            text = text.replace('&gt;', '>')
-            text = text.replace('&amp;', '&')
-            text = text.replace('&quot;', '"')
-            text = text.replace('&#39;', "'")
-            
-            # Clean up extra whitespace
-            text = re.sub(r'\s+', ' ', text)
-            text = text.strip()
-            
-            # Limit text length to avoid being too long
-            if len(text) > 8000:
-                text = text[:8000] + "..."
-                
-            return text
+            return extract_text(html_content, BROWSER_TEXT_MAX_CHARS)
         except Exception as e:
             logger.error(f"Error extracting text from HTML: {e}")
             return html_content[:1000] + "..." if len(html_content) > 1000 else html_content
     
-    def _summarize_content(self, url: str, text_content: str) -> str:
-        """Use LLM to summarize web page content"""
-        try:
-            llm = get_llm_by_type("basic")
-            
-            prompt = f"""Please analyze the following web page content and provide a structured summary.
+    @staticmethod
+    def _summary_prompt(url: str, text_content: str) -> str:
+        return f"""Please analyze the following web page content and provide a structured summary.
                          Web page URL: {url}
                          Web page content:
                         {text_content}
@@ -83,142 +59,155 @@ class BrowserTool(BaseTool):
                         [If there are important links or resources, please list them]
                         Please reply in Chinese, keep it concise and clear."""
 
-            response = llm.invoke(prompt)
-            return response.content
-            
+    @staticmethod
+    def _summary_error(text_content: str, e: Exception) -> str:
+        logger.error(f"Error during LLM summarization: {e}")
+        return f"Web page content retrieved successfully, but error occurred during summarization: {str(e)}\n\nOriginal content preview:\n{text_content[:500]}..."
+
+    def _summarize_content(self, url: str, text_content: str) -> Tuple[str, bool]:
+        """Use LLM to summarize web page content, returns the summary and whether summarizing succeeded"""
+        try:
+            llm = get_llm_by_type("basic")
+            response = llm.invoke(self._summary_prompt(url, text_content))
+            return response.content, True
+        except Exception as e:
+            return self._summary_error(text_content, e), False
+
+    async def _asummarize_content(self, url: str, text_content: str) -> Tuple[str, bool]:
+        """Async version of _summarize_content"""
+        try:
+            llm = get_llm_by_type("basic")
+            response = await llm.ainvoke(self._summary_prompt(url, text_content))
+            return response.content, True
         except Exception as e:
-            logger.error(f"Error during LLM summarization: {e}")
-            return f"Web page content retrieved successfully, but error occurred during summarization: {str(e)}\n\nOriginal content preview:\n{text_content[:500]}..."
+            return self._summary_error(text_content, e), False
+
+    @staticmethod
+    def _result(url: str, summary: str, success: bool, error: str = None) -> str:
+        result = {
+            "summary": summary,
+            "success": success,
+            "url": url
+        }
+        if error is not None:
+            result["error"] = error
+        return json.dumps(result, ensure_ascii=False)
+
+    def _disabled_result(self, url: str) -> str:
+        logger.warning("Browser tool is disabled via environment variable USE_BROWSER")
+        return self._result(
+            url,
+            "Browser tool is currently disabled. Please enable USE_BROWSER environment variable to use this feature.",
+            False,
+            "Browser tool disabled",
+        )
+
+    def _error_result(self, url: str, e: Exception, test_mode: bool) -> str:
+        if test_mode:
+            logger.error(f"Exception occurred: {e}")
+            import traceback
+            logger.error(traceback.format_exc())
+        return self._result(url, f"Error occurred while accessing web page: {str(e)}", False, str(e))
+
+    def _page_text(self, response_text: str, status_code: int, test_mode: bool = False) -> Tuple[Optional[str], bool]:
+        """Text to summarize from a backend response and whether the page was retrieved, (None, False) when the page has no content"""
+        try:
+            data = json.loads(response_text)
+        except json.JSONDecodeError:
+            data = None
+
+        # If it's JSON and contains success flag
+        if isinstance(data, dict):
+            if test_mode:
+                logger.info(f"Successfully parsed as JSON: {data}")
+            if "html" in data and "success" in data:
+                html_content = data.get("html", "")
+                success = data.get("success", False)
+            else:
+                html_content = data.get("html_content", "") or data.get("content", "") or json.dumps(data)
+                success = True
+            if success and html_content:
+                return self._extract_text_from_html(html_content), True
+            return None, False
+
+        if data is None:
+            if test_mode:
+                logger.info("Response is not JSON format, trying to extract HTML content")
+
+            # Try to extract JSON from response
+            json_match = re.search(r'(\{.*"success":\s*(true|false).*\})', response_text)
+            if json_match:
+                try:
+                    json_str = json_match.group(1)
+                    if test_mode:
+                        logger.info(f"JSON string extracted from response: {json_str}")
+                    html_content = json.loads(json_str).get("html", "")
+                    if html_content:
+                        return self._extract_text_from_html(html_content), True
+                except Exception:
+                    if test_mode:
+                        logger.warning("Extracted JSON cannot be parsed")
+
+            # If response contains HTML tags
+            if "<html" in response_text:
+                if test_mode:
+                    logger.info("Response contains HTML tags")
+                return self._extract_text_from_html(response_text), True
+
+        # Other cases, try to summarize response content
+        return response_text, status_code == 200
 
     def _run(self, url: str, test_mode: bool = False, user_id: str = None) -> str:
         """Browser page browsing, returns web page HTML content"""
         
         # Check if browser tool is enabled
         if not self._check_browser_enabled():
-            logger.warning("Browser tool is disabled via environment variable USE_BROWSER")
-            return json.dumps({
-                "summary": "Browser tool is currently disabled. Please enable USE_BROWSER environment variable to use this feature.",
-                "success": False,
-                "url": url,
-                "error": "Browser tool disabled"
-            }, ensure_ascii=False)
-        
+            return self._disabled_result(url)
+
+        cached = browser_client.cached(url)
+        if cached is not None:
+            return self._result(url, cached[1], True)
+
         try:
-            # Build query parameters
-            query_params = {
-                "url": url,
-                "duration": 30,
-                "interval": 1.5,
-                "scroll_amount": 1,
-                "return_html": "true"
-            }
-            print("Request URL", url)
-            # Send request to scroll API
-            response = requests.get(f"{BROWSER_BACKEND}/scroll", params=query_params)
-            
-            response_text = response.text
-            
-            # Check if response is valid JSON
-            try:
-                # Try to parse as JSON
-                data = json.loads(response_text)
-                
-                # If it's JSON and contains success flag
-                if isinstance(data, dict):
-                    if test_mode:
-                        logger.info(f"Successfully parsed as JSON: {data}")
-                    
-                    # Get HTML content
-                    html_content = ""
-                    if "html" in data and "success" in data:
-                        html_content = data.get("html", "")
-                        success = data.get("success", False)
-                    else:
-                        html_content = data.get("html_content", "") or data.get("content", "") or json.dumps(data)
-                        success = True
-                    
-                    # If successfully got HTML content, summarize it
-                    if success and html_content:
-                        # Extract text content
-                        text_content = self._extract_text_from_html(html_content)
-                        
-                        # Use LLM to summarize content
-                        summary = self._summarize_content(url, text_content)
-                        
-                        return json.dumps({
-                            "summary": summary,
-                            "success": True,
-                            "url": url
-                        }, ensure_ascii=False)
-                    else:
-                        return json.dumps({
-                            "summary": "Unable to get web page content",
-                            "success": False,
-                            "url": url
-                        }, ensure_ascii=False)
-            except json.JSONDecodeError:
-                if test_mode:
-                    logger.info("Response is not JSON format, trying to extract HTML content")
-                
-                # Try to extract JSON from response
-                json_match = re.search(r'(\{.*"success":\s*(true|false).*\})', response_text)
-                if json_match:
-                    try:
-                        json_str = json_match.group(1)
-                        if test_mode:
-                            logger.info(f"JSON string extracted from response: {json_str}")
-                        
-                        data = json.loads(json_str)
-                        html_content = data.get("html", "")
-                        if html_content:
-                            text_content = self._extract_text_from_html(html_content)
-                            summary = self._summarize_content(url, text_content)
-                            return json.dumps({
-                                "summary": summary,
-                                "success": True,
-                                "url": url
-                            }, ensure_ascii=False)
-                    except:
-                        if test_mode:
-                            logger.warning("Extracted JSON cannot be parsed")
-                
-                # If response contains HTML tags
-                if "<html" in response_text:
-                    if test_mode:
-                        logger.info("Response contains HTML tags")
-                    
-                    text_content = self._extract_text_from_html(response_text)
-                    summary = self._summarize_content(url, text_content)
-                    return json.dumps({
-                        "summary": summary,
-                        "success": True,
-                        "url": url
-                    }, ensure_ascii=False)
-                
-                # Other cases, try to summarize response content
-                summary = self._summarize_content(url, response_text)
-                return json.dumps({
-                    "summary": summary,
-                    "success": response.status_code == 200,
-                    "url": url
-                }, ensure_ascii=False)
-                
+            logger.info(f"Request URL {url}")
+            status_code, response_text = browser_client.scroll(url)
+            text_content, success = self._page_text(response_text, status_code, test_mode)
+            if text_content is None:
+                return self._result(url, "Unable to get web page content", False)
+
+            # Use LLM to summarize content
+            summary, summarized = self._summarize_content(url, text_content)
+            if success and summarized:
+                browser_client.store(url, text_content, summary)
+            return self._result(url, summary, success)
         except Exception as e:
-            if test_mode:
-                logger.error(f"Exception occurred: {e}")
-                import traceback
-                logger.error(traceback.format_exc())
-                
-            return json.dumps({
-                "summary": f"Error occurred while accessing web page: {str(e)}",
-                "success": False,
-                "url": url,
-                "error": str(e)
-            }, ensure_ascii=False)
+            return self._error_result(url, e, test_mode)
 
     async def _arun(self, url: str, test_mode: bool = False, user_id: str = None) -> str:
-        """Async version of browser tool"""
-        return self._run(url, test_mode, user_id)
+        """Async version of browser tool, waits for a backend slot on the shared client instead of a thread"""
+        if not self._check_browser_enabled():
+            return self._disabled_result(url)
+
+        cached = browser_client.cached(url)
+        if cached is not None:
+            return self._result(url, cached[1], True)
+
+        try:
+            logger.info(f"Request URL {url}")
+            status_code, response_text = await browser_client.ascroll(url)
+            # extracting the text of a large page is cpu bound, keep it off the event loop
+            text_content, success = await tool_executors.run(
+                self.name, self._page_text, response_text, status_code, test_mode
+            )
+            if text_content is None:
+                return self._result(url, "Unable to get web page content", False)
+
+            summary, summarized = await self._asummarize_content(url, text_content)
+            if success and summarized:
+                browser_client.store(url, text_content, summary)
+            return self._result(url, summary, success)
+        except Exception as e:
+            return self._error_result(url, e, test_mode)
 
 BrowserTool = create_logged_tool(BrowserTool)
 browser_tool = BrowserTool()
@@ -0,0 +1,114 @@
+import time
+import logging
+from typing import Optional, Tuple
+
+import httpx
+import requests
+
+from src.service.env import (
+    BROWSER_BACKEND,
+    BROWSER_TIMEOUT,
+    BROWSER_CONCURRENCY,
+    BROWSER_CACHE_TTL,
+    BROWSER_CACHE_MAX_ENTRIES,
+)
+from src.tools.crawler.cache import normalize_url
+from src.tools.crawler.http_client import SharedHttpClient
+from src.utils.lru import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# how the backend scrolls a page before returning its html
+SCROLL_PARAMS = {
+    "duration": 30,
+    "interval": 1.5,
+    "scroll_amount": 1,
+    "return_html": "true",
+}
+
+
+class BrowserBackendClient:
+    """Client of the browser backend's /scroll endpoint with a cache of browsed pages.
+
+    Async scrolls share keep-alive connections, at most `concurrency` of them
+    run at once and the others wait in line, so parallel browser steps do not
+    overload the backend. A page's text and summary are reused for `ttl`
+    seconds, keyed by normalized url.
+    """
+
+    def __init__(
+        self,
+        base_url: str = BROWSER_BACKEND,
+        concurrency: int = BROWSER_CONCURRENCY,
+        timeout: float = BROWSER_TIMEOUT,
+        ttl: float = BROWSER_CACHE_TTL,
+        max_entries: int = BROWSER_CACHE_MAX_ENTRIES,
+    ):
+        self.base_url = (base_url or "").rstrip("/")
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.ttl = ttl
+        # the per host limit of the shared client is the backend's queue
+        self._http = SharedHttpClient(retries=0, per_host=concurrency)
+        self._pages = LRUCache(max_entries=max_entries)
+        self.pending = 0
+        self.scrolls = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _params(self, url: str) -> dict:
+        return {"url": url, **SCROLL_PARAMS}
+
+    def scroll(self, url: str) -> Tuple[int, str]:
+        """Blocking scroll of `url`, returns the status code and body of the backend response."""
+        self.scrolls += 1
+        response = requests.get(f"{self.base_url}/scroll", params=self._params(url), timeout=self.timeout)
+        return response.status_code, response.text
+
+    async def ascroll(self, url: str) -> Tuple[int, str]:
+        """Async version of scroll, waits for a free backend slot first."""
+        self.pending += 1
+        try:
+            response: httpx.Response = await self._http.get(
+                f"{self.base_url}/scroll", params=self._params(url), timeout=self.timeout
+            )
+        finally:
+            self.pending -= 1
+        self.scrolls += 1
+        return response.status_code, response.text
+
+    def cached(self, url: str) -> Optional[Tuple[str, str]]:
+        """(text, summary) of a page browsed less than `ttl` seconds ago."""
+        if self.ttl <= 0:
+            return None
+        key = normalize_url(url)
+        entry = self._pages.get(key)
+        if entry is None or time.monotonic() - entry[0] >= self.ttl:
+            if entry is not None:
+                self._pages.pop(key, None)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1], entry[2]
+
+    def store(self, url: str, text: str, summary: str):
+        if self.ttl > 0:
+            self._pages[normalize_url(url)] = (time.monotonic(), text, summary)
+
+    async def aclose(self):
+        await self._http.aclose()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "concurrency": self.concurrency,
+            "pending": self.pending,
+            "scrolls": self.scrolls,
+            "cached_pages": len(self._pages),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+browser_client = BrowserBackendClient()
@@ -24,3 +24,18 @@ def crawl_tool(
         error_msg = f"Failed to crawl. Error: {repr(e)}"
         logger.error(error_msg)
         return error_msg
+
+
+@log_io
+async def _acrawl(url: str) -> HumanMessage:
+    """Async version of crawl_tool over the shared http client."""
+    try:
+        article = await Crawler().acrawl(url)
+        return {"role": "user", "content": article.to_message()}
+    except Exception as e:
+        error_msg = f"Failed to crawl. Error: {repr(e)}"
+        logger.error(error_msg)
+        return error_msg
+
+
+crawl_tool.coroutine = _acrawl
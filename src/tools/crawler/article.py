@@ -7,15 +7,19 @@ from markdownify import markdownify as md
 class Article:
     url: str
 
-    def __init__(self, title: str, html_content: str):
+    def __init__(self, title: str, html_content: str, markdown: str = None):
         self.title = title
         self.html_content = html_content
+        # converted body, kept so cached articles skip markdownify
+        self.markdown = markdown
 
     def to_markdown(self, including_title: bool = True) -> str:
         markdown = ""
         if including_title:
             markdown += f"# {self.title}\n\n"
-        markdown += md(self.html_content)
+        if self.markdown is None:
+            self.markdown = md(self.html_content)
+        markdown += self.markdown
         return markdown
 
     def to_message(self) -> list[dict]:
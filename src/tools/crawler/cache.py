@@ -0,0 +1,230 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from config.global_variables import crawl_cache_dir
+from src.service.env import (
+    CRAWL_CACHE_DIR,
+    CRAWL_CACHE_TTL,
+    CRAWL_CACHE_MAX_BYTES,
+    CRAWL_CACHE_OFFLINE,
+)
+from src.storage.file import atomic_write
+from .article import Article
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+class CrawlCacheMiss(Exception):
+    """when an offline crawl cache has no entry for a url"""
+    pass
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a url: lower-case scheme and host, no default port or
+    fragment. Path and query are kept as given, servers may tell apart `/a`
+    and `/a/` or depend on the order of parameters."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if ":" in host:
+        host = f"[{host}]"
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    userinfo, _, _ = parts.netloc.rpartition("@")
+    if userinfo:
+        host = f"{userinfo}@{host}"
+    return urlunsplit((scheme, host, parts.path or "/", parts.query, ""))
+
+
+class CrawlCache:
+    """Extracted articles on disk, one json file per normalized url.
+
+    Entries younger than `ttl` are served directly. Older entries are
+    revalidated against the origin with the ETag/Last-Modified seen when they
+    were stored; when that is not possible they are crawled again. The
+    directory is kept under `max_bytes` by dropping least recently used
+    entries. In `offline` mode the directory is a fixture store: entries never
+    expire and nothing is fetched, a missing url raises CrawlCacheMiss.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = Path(CRAWL_CACHE_DIR) if CRAWL_CACHE_DIR else crawl_cache_dir,
+        ttl: float = CRAWL_CACHE_TTL,
+        max_bytes: int = CRAWL_CACHE_MAX_BYTES,
+        offline: bool = CRAWL_CACHE_OFFLINE,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.offline or self.ttl > 0
+
+    def _path(self, url: str) -> Path:
+        digest = hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+        return self.cache_dir / digest[:2] / f"{digest}.json"
+
+    def _read(self, url: str) -> Optional[dict]:
+        path = self._path(url)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Dropping unreadable crawl cache entry {path}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+        # recency for the LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def lookup(self, url: str) -> Tuple[Optional[Article], Optional[dict]]:
+        """Returns (article, None) for a servable entry, (None, entry) for an
+        entry that needs revalidation and (None, None) on a miss."""
+        if not self.enabled:
+            return None, None
+        entry = self._read(url)
+        if entry is None:
+            self.misses += 1
+            if self.offline:
+                raise CrawlCacheMiss(f"{url} is not in the crawl fixture store {self.cache_dir}")
+            return None, None
+        if self.offline or time.time() - entry["fetched_at"] < self.ttl:
+            self.hits += 1
+            return self.article(entry), None
+        return None, entry
+
+    @staticmethod
+    def article(entry: dict) -> Article:
+        article = Article(entry["title"], entry["html_content"], entry.get("markdown"))
+        article.url = entry["url"]
+        return article
+
+    @staticmethod
+    def revalidation_headers(entry: dict) -> dict:
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def revalidate(self, url: str, entry: dict, status_code: int = None, headers=None) -> Optional[Article]:
+        """Serve `entry` again if the origin response to a conditional request shows it is unchanged.
+
+        Without a response (no validators stored, origin unreachable) the entry is expired.
+        """
+        headers = headers or {}
+        unchanged = status_code == 304 or (
+            status_code == 200
+            and bool(entry.get("etag") or entry.get("last_modified"))
+            and headers.get("etag") == entry.get("etag")
+            and headers.get("last-modified") == entry.get("last_modified")
+        )
+        if not unchanged:
+            self.expired += 1
+            return None
+        entry["fetched_at"] = time.time()
+        self._write(url, entry)
+        self.revalidated += 1
+        return self.article(entry)
+
+    def put(self, url: str, article: Article, headers=None) -> dict:
+        """Store an extracted article with the validators of the origin response headers, if any."""
+        headers = headers or {}
+        entry = {
+            "url": url,
+            "normalized_url": normalize_url(url),
+            "title": article.title,
+            "html_content": article.html_content,
+            "markdown": article.to_markdown(including_title=False),
+            "content_hash": hashlib.sha256((article.html_content or "").encode("utf-8")).hexdigest(),
+            "fetched_at": time.time(),
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+        }
+        if self.enabled and not self.offline:
+            self._write(url, entry)
+        return entry
+
+    def _write(self, url: str, entry: dict):
+        path = self._path(url)
+        content = json.dumps(entry, ensure_ascii=False)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            previous = path.stat().st_size if path.exists() else 0
+            atomic_write(path, content)
+        except OSError as e:
+            logger.error(f"Error writing crawl cache entry {path}: {e}")
+            return
+        with self._lock:
+            if self._size is not None:
+                self._size += path.stat().st_size - previous
+        self._evict()
+
+    def _entries(self) -> list:
+        entries = []
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self):
+        if self.max_bytes <= 0:
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            if self._size <= self.max_bytes:
+                return
+            # down to 90% so a full cache does not rescan on every write
+            target = self.max_bytes * 0.9
+            for _, size, path in sorted(self._entries()):
+                if self._size <= target:
+                    break
+                path.unlink(missing_ok=True)
+                self._size -= size
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.revalidated + self.expired + self.misses
+        return {
+            "enabled": self.enabled,
+            "offline": self.offline,
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "expired": self.expired,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.revalidated) / lookups, 3) if lookups else 0.0,
+            "bytes": self._size,
+            "evictions": self.evictions,
+        }
+
+
+crawl_cache = CrawlCache()
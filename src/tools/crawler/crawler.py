@@ -1,18 +1,92 @@
 import sys
+import asyncio
+import logging
+from typing import Optional
+
+import httpx
+import requests
 
 from .article import Article
+from .cache import crawl_cache
+from .http_client import http_client
 from .jina_client import JinaClient
 from .readability_extractor import ReadabilityExtractor
+from src.tools.executor import tool_executors
+
+logger = logging.getLogger(__name__)
+
+# seconds for the HEAD request reading the ETag/Last-Modified of the origin
+VALIDATOR_TIMEOUT = 10
 
 
 class Crawler:
+    # both are stateless, one instance serves every crawl
+    jina_client = JinaClient()
+    extractor = ReadabilityExtractor()
+
+    def _head(self, url: str, headers: dict = None) -> Optional[requests.Response]:
+        """Origin response carrying the validators, None if the origin does not answer HEAD."""
+        try:
+            response = requests.head(url, headers=headers, timeout=VALIDATOR_TIMEOUT, allow_redirects=True)
+        except requests.RequestException as e:
+            logger.debug(f"HEAD {url} failed: {e}")
+            return None
+        return response if response.status_code < 400 else None
+
+    async def _ahead(self, url: str, headers: dict = None) -> Optional[httpx.Response]:
+        try:
+            response = await http_client.request(
+                "HEAD", url, retries=0, headers=headers, timeout=VALIDATOR_TIMEOUT
+            )
+        except httpx.HTTPError as e:
+            logger.debug(f"HEAD {url} failed: {e}")
+            return None
+        return response if response.status_code < 400 else None
+
+    @staticmethod
+    def _revalidate(url: str, stale: dict, response) -> Optional[Article]:
+        if response is None:
+            return crawl_cache.revalidate(url, stale)
+        return crawl_cache.revalidate(url, stale, response.status_code, response.headers)
+
     def crawl(self, url: str) -> Article:
+        article, stale = crawl_cache.lookup(url)
+        if article is not None:
+            return article
+        response = None
+        if stale is not None:
+            # without stored validators a plain HEAD learns them for the next expiry
+            response = self._head(url, crawl_cache.revalidation_headers(stale))
+            article = self._revalidate(url, stale, response)
+            if article is not None:
+                return article
+
+        html = self.jina_client.crawl(url, return_format="html")
+        article = self.extractor.extract_article(html)
+        article.url = url
+        if crawl_cache.enabled:
+            # a miss is stored without validators, the origin is only asked once the entry expires
+            crawl_cache.put(url, article, response.headers if response is not None else None)
+        return article
+
+    async def acrawl(self, url: str) -> Article:
+        # cache reads, writes and evictions touch the disk, keep them off the event loop
+        article, stale = await asyncio.to_thread(crawl_cache.lookup, url)
+        if article is not None:
+            return article
+        response = None
+        if stale is not None:
+            response = await self._ahead(url, crawl_cache.revalidation_headers(stale))
+            article = await asyncio.to_thread(self._revalidate, url, stale, response)
+            if article is not None:
+                return article
 
-        jina_client = JinaClient()
-        html = jina_client.crawl(url, return_format="html")
-        extractor = ReadabilityExtractor()
-        article = extractor.extract_article(html)
+        html = await self.jina_client.acrawl(url, return_format="html")
+        # readability parses in a node subprocess, keep it off the event loop
+        article = await tool_executors.run("readability", self.extractor.extract_article, html)
         article.url = url
+        if crawl_cache.enabled:
+            await asyncio.to_thread(crawl_cache.put, url, article, response.headers if response is not None else None)
         return article
 
 
@@ -0,0 +1,104 @@
+import random
+import asyncio
+import logging
+import weakref
+from urllib.parse import urlsplit
+
+import httpx
+
+from src.service.env import (
+    CRAWL_TIMEOUT,
+    CRAWL_RETRIES,
+    CRAWL_PER_HOST_CONCURRENCY,
+)
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+RETRY_BACKOFF_BASE = 0.5
+RETRY_BACKOFF_MAX = 8.0
+POOL_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30)
+
+
+class _LoopClient:
+    def __init__(self, transport: httpx.AsyncBaseTransport = None):
+        self.client = httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(CRAWL_TIMEOUT),
+            limits=POOL_LIMITS,
+            follow_redirects=True,
+        )
+        self.host_limits: dict[str, asyncio.Semaphore] = {}
+
+
+class SharedHttpClient:
+    """Keep-alive httpx clients shared by the crawl path, one per event loop.
+
+    Connections belong to the loop that opened them and cli commands each run
+    their own loop, so clients are kept per loop and dropped with it. Requests
+    to one host are limited to `per_host` at a time and retried with
+    exponential backoff on transport errors and retryable status codes.
+    """
+
+    def __init__(self, retries: int = CRAWL_RETRIES, per_host: int = CRAWL_PER_HOST_CONCURRENCY, transport: httpx.AsyncBaseTransport = None):
+        self.retries = retries
+        self.per_host = per_host
+        self.transport = transport
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopClient]" = weakref.WeakKeyDictionary()
+        self.requests = 0
+        self.retried = 0
+
+    def _loop_client(self) -> _LoopClient:
+        loop = asyncio.get_running_loop()
+        loop_client = self._clients.get(loop)
+        if loop_client is None:
+            for closed in [other for other in list(self._clients.keys()) if other.is_closed()]:
+                self._clients.pop(closed, None)
+            loop_client = self._clients[loop] = _LoopClient(self.transport)
+        return loop_client
+
+    async def request(self, method: str, url: str, retries: int = None, **kwargs) -> httpx.Response:
+        retries = self.retries if retries is None else retries
+        loop_client = self._loop_client()
+        host = urlsplit(url).netloc
+        limit = loop_client.host_limits.setdefault(host, asyncio.Semaphore(self.per_host))
+        attempt = 0
+        while True:
+            try:
+                async with limit:
+                    self.requests += 1
+                    response = await loop_client.client.request(method, url, **kwargs)
+                if response.status_code not in RETRY_STATUS or attempt >= retries:
+                    return response
+                reason = f"status {response.status_code}"
+            except httpx.TransportError as e:
+                if attempt >= retries:
+                    raise
+                reason = repr(e)
+            attempt += 1
+            self.retried += 1
+            backoff = min(RETRY_BACKOFF_BASE * 2 ** (attempt - 1), RETRY_BACKOFF_MAX) * random.uniform(0.5, 1.0)
+            logger.warning(f"Retrying {method} {url} in {backoff:.1f}s after {reason}")
+            await asyncio.sleep(backoff)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def aclose(self):
+        """Close the client of the running loop."""
+        loop_client = self._clients.pop(asyncio.get_running_loop(), None)
+        if loop_client is not None:
+            await loop_client.client.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "clients": len(self._clients),
+            "requests": self.requests,
+            "retried": self.retried,
+        }
+
+
+http_client = SharedHttpClient()
@@ -3,11 +3,16 @@ import os
 
 import requests
 
+from src.service.env import CRAWL_TIMEOUT
+from .http_client import http_client
+
 logger = logging.getLogger(__name__)
 
+JINA_READER_URL = "https://r.jina.ai/"
+
 
 class JinaClient:
-    def crawl(self, url: str, return_format: str = "html") -> str:
+    def _headers(self, return_format: str) -> dict:
         headers = {
             "Content-Type": "application/json",
             "X-Return-Format": return_format,
@@ -18,6 +23,15 @@ class JinaClient:
             logger.warning(
                 "Jina API key is not set. Provide your own key to access a higher rate limit. See https://jina.ai/reader for more information."
             )
+        return headers
+
+    def crawl(self, url: str, return_format: str = "html") -> str:
+        data = {"url": url}
+        response = requests.post(JINA_READER_URL, headers=self._headers(return_format), json=data, timeout=CRAWL_TIMEOUT)
+        return response.text
+
+    async def acrawl(self, url: str, return_format: str = "html") -> str:
+        """Same as `crawl` over the shared keep-alive client, with retries."""
         data = {"url": url}
-        response = requests.post("https://r.jina.ai/", headers=headers, json=data)
+        response = await http_client.post(JINA_READER_URL, headers=self._headers(return_format), json=data)
         return response.text
@@ -1,4 +1,5 @@
 import logging
+import inspect
 import functools
 from typing import Any, Callable, Type, TypeVar
 
@@ -12,26 +13,39 @@ def log_io(func: Callable) -> Callable:
     A decorator that logs the input parameters and output of a tool function.
 
     Args:
-        func: The tool function to be decorated
+        func: The tool function to be decorated, plain or async
 
     Returns:
         The wrapped function with input/output logging
     """
 
-    @functools.wraps(func)
-    def wrapper(*args: Any, **kwargs: Any) -> Any:
-        # Log input parameters
-        func_name = func.__name__
+    def log_input(args, kwargs):
         params = ", ".join(
             [*(str(arg) for arg in args), *(f"{k}={v}" for k, v in kwargs.items())]
         )
-        logger.debug(f"Tool {func_name} called with parameters: {params}")
+        logger.debug(f"Tool {func.__name__} called with parameters: {params}")
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            log_input(args, kwargs)
+            result = await func(*args, **kwargs)
+            logger.debug(f"Tool {func.__name__} returned: {result}")
+            return result
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        # Log input parameters
+        log_input(args, kwargs)
 
         # Execute the function
         result = func(*args, **kwargs)
 
         # Log the output
-        logger.debug(f"Tool {func_name} returned: {result}")
+        logger.debug(f"Tool {func.__name__} returned: {result}")
 
         return result
 
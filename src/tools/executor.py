@@ -0,0 +1,149 @@
+import time
+import asyncio
+import logging
+import functools
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from src.service.env import (
+    TOOL_EXECUTOR_WORKERS,
+    TOOL_EXECUTOR_QUEUE,
+    TOOL_EXECUTOR_TIMEOUT,
+    TOOL_EXECUTOR_LIMITS,
+    PYTHON_REPL_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+# tools with their own bound on concurrent calls
+DEFAULT_LIMITS = {
+    # every call waits for one of the REPL worker processes
+    "python_repl_tool": {"max_workers": PYTHON_REPL_WORKERS},
+}
+
+
+class ToolExecutorSaturatedError(Exception):
+    """when every worker of a tool is busy and its queue is full"""
+    pass
+
+
+class ToolTimeoutError(TimeoutError):
+    """when a tool call runs longer than the timeout of its executor"""
+    pass
+
+
+class ToolExecutor:
+    """A bounded thread pool running the blocking implementation of one tool.
+
+    At most `max_workers` calls run and `max_queue` wait; further calls fail
+    fast with ToolExecutorSaturatedError. A call not finished `timeout` seconds
+    after it was submitted, queueing included, raises ToolTimeoutError; a call
+    that already started keeps its worker until the blocking call returns.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, timeout: float):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"tool-{name}")
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.max_wait = 0.0
+
+    def _call(self, submitted: float, func: Callable, args, kwargs):
+        with self._lock:
+            self.running += 1
+            self.max_wait = max(self.max_wait, time.monotonic() - submitted)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    def _release(self, _future):
+        # also runs for calls cancelled while queued
+        with self._lock:
+            self.pending -= 1
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            if self.pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ToolExecutorSaturatedError(
+                    f"Tool {self.name} is saturated: {self.running} running, {self.pending - self.running} queued"
+                )
+            self.pending += 1
+        # copy the context so callbacks and tracing of the caller keep working in the worker
+        call = functools.partial(contextvars.copy_context().run, self._call, time.monotonic(), func, args, kwargs)
+        pool_future = self._pool.submit(call)
+        pool_future.add_done_callback(self._release)
+        future = asyncio.wrap_future(pool_future)
+        try:
+            result = await asyncio.wait_for(future, self.timeout) if self.timeout > 0 else await future
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            logger.error(f"Tool {self.name} timed out after {self.timeout}s")
+            raise ToolTimeoutError(f"Tool {self.name} did not finish within {self.timeout}s")
+        except Exception:
+            with self._lock:
+                self.failures += 1
+            raise
+        with self._lock:
+            self.completed += 1
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            queued = self.pending - self.running
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self.running,
+                "queued": queued,
+                "saturation": round(self.pending / (self.max_workers + self.max_queue), 3),
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "failures": self.failures,
+                "max_wait": round(self.max_wait, 3),
+            }
+
+
+class ToolExecutors:
+    """One ToolExecutor per tool, created on first use from the configured limits."""
+
+    def __init__(self, limits: Dict[str, dict] = None):
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self._executors: Dict[str, ToolExecutor] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> ToolExecutor:
+        with self._lock:
+            if name not in self._executors:
+                limits = self.limits.get(name, {})
+                self._executors[name] = ToolExecutor(
+                    name,
+                    max_workers=int(limits.get("max_workers", TOOL_EXECUTOR_WORKERS)),
+                    max_queue=int(limits.get("max_queue", TOOL_EXECUTOR_QUEUE)),
+                    timeout=float(limits.get("timeout", TOOL_EXECUTOR_TIMEOUT)),
+                )
+            return self._executors[name]
+
+    async def run(self, name: str, func: Callable, *args, **kwargs) -> Any:
+        """Run the blocking `func` on the executor of tool `name`."""
+        return await self.get(name).run(func, *args, **kwargs)
+
+    def stats(self) -> dict:
+        return {name: executor.stats() for name, executor in list(self._executors.items())}
+
+
+tool_executors = ToolExecutors(TOOL_EXECUTOR_LIMITS)
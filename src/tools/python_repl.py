@@ -2,14 +2,20 @@ import logging
 from typing import ClassVar, Type
 from pydantic import BaseModel, Field
 from langchain.tools import BaseTool
-from langchain_experimental.utilities import PythonREPL
+from langchain_core.runnables import ensure_config
 from .decorators import create_logged_tool
+from .executor import tool_executors
+from .repl_pool import python_repl_pool
 
-# Initialize REPL and logger
-repl = PythonREPL()
 logger = logging.getLogger(__name__)
 
 
+def _session_id() -> str:
+    """Code of one user's workflow shares a worker and its variables, other sessions are isolated."""
+    configurable = ensure_config().get("configurable", {})
+    return f"{configurable.get('user_id', 'default')}:{configurable.get('workflow_id', 'default')}"
+
+
 class PythonReplInput(BaseModel):
     """Input for Python REPL Tool."""
     code: str = Field(..., description="The python code to execute to do further analysis or calculation.")
@@ -25,7 +31,7 @@ class PythonReplTool(BaseTool):
         """Execute Python code and return result."""
         logger.info("Executing Python code")
         try:
-            result = repl.run(code)
+            result = python_repl_pool.run(_session_id(), code)
             logger.info("Code execution successful")
         except BaseException as e:
             error_msg = f"Failed to execute. Error: {repr(e)}"
@@ -35,8 +41,8 @@ class PythonReplTool(BaseTool):
         return result_str
 
     async def _arun(self, code: str) -> str:
-        """Async version of Python REPL tool."""
-        return self._run(code)
+        """Async version of Python REPL tool, waits for its worker process on the bounded REPL executor."""
+        return await tool_executors.run(self.name, self._run, code)
 
 
 # Create logged version of the tool
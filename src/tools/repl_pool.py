@@ -0,0 +1,300 @@
+import sys
+import json
+import time
+import atexit
+import logging
+import threading
+import subprocess
+import multiprocessing
+from collections import OrderedDict
+from typing import List, Optional
+
+from src.service.env import (
+    PYTHON_REPL_WORKERS,
+    PYTHON_REPL_WARM,
+    PYTHON_REPL_PRELOAD,
+    PYTHON_REPL_MEMORY_MB,
+    PYTHON_REPL_CPU_SECONDS,
+    PYTHON_REPL_TIMEOUT,
+    PYTHON_REPL_IDLE_TIMEOUT,
+    PYTHON_REPL_MAX_OUTPUT,
+)
+from src.utils import repl_worker
+
+logger = logging.getLogger(__name__)
+
+# seconds a new worker may spend importing the preloaded libraries
+STARTUP_TIMEOUT = 60
+
+
+
+class _ScriptProcess:
+    """A worker started as `python repl_worker.py`, with the Process interface the pool uses.
+
+    A spawned multiprocessing child runs the parent's main script (cli.py, the
+    server) again as __mp_main__ and imports the whole project; the script only
+    imports src.utils.repl_worker. Its end of the pipe is inherited by fd.
+    """
+
+    def __init__(self, conn, args: tuple):
+        fd = conn.fileno()
+        self._popen = subprocess.Popen(
+            [sys.executable, repl_worker.__file__, str(fd), json.dumps(args)],
+            pass_fds=(fd,),
+            stdin=subprocess.DEVNULL,
+        )
+
+    @property
+    def exitcode(self) -> Optional[int]:
+        return self._popen.poll()
+
+    def is_alive(self) -> bool:
+        return self._popen.poll() is None
+
+    def kill(self):
+        self._popen.kill()
+
+    def join(self, timeout: float = None):
+        try:
+            self._popen.wait(timeout)
+        except subprocess.TimeoutExpired:
+            pass
+
+
+def _start_process(conn, args: tuple):
+    if sys.platform == "win32":
+        # no fd inheritance, the spawned child runs the main script again
+        process = multiprocessing.get_context("spawn").Process(
+            target=repl_worker.run_worker, args=(conn, *args), name="python-repl"
+        )
+        process.start()
+        return process
+    return _ScriptProcess(conn, args)
+
+
+class ReplWorkerError(Exception):
+    """when a REPL worker cannot run the code: it timed out, died or every worker is busy"""
+    pass
+
+
+class _Worker:
+    """One python process holding the namespace of one session."""
+
+    def __init__(self, preload: List[str], memory_mb: int, cpu_seconds: int, max_output: int):
+        self.conn, child_conn = multiprocessing.Pipe()
+        try:
+            self.process = _start_process(child_conn, (preload, memory_mb, cpu_seconds, max_output))
+        finally:
+            child_conn.close()
+        # serializes the runs of one session, `users` counts checked out callers
+        self.lock = threading.Lock()
+        self.users = 0
+        self.ready = False
+        self.session: Optional[str] = None
+        self.last_used = time.monotonic()
+
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def _receive(self, timeout: float):
+        if not self.conn.poll(timeout):
+            return None
+        try:
+            return self.conn.recv()
+        except EOFError:
+            self.process.join(1)
+            raise ReplWorkerError(
+                f"Python worker exited with code {self.process.exitcode}, "
+                f"it may have exceeded its memory or cpu limit. Variables of this session are lost."
+            )
+
+    def run(self, code: str, timeout: float) -> tuple:
+        if not self.ready:
+            if self._receive(STARTUP_TIMEOUT) is None:
+                raise ReplWorkerError(f"Python worker did not start within {STARTUP_TIMEOUT}s")
+            self.ready = True
+        try:
+            self.conn.send(code)
+        except OSError as e:
+            raise ReplWorkerError(f"Python worker is gone: {e}")
+        reply = self._receive(timeout)
+        if reply is None:
+            raise ReplWorkerError(f"Execution timed out after {timeout}s. Variables of this session are lost.")
+        return reply
+
+    def close(self, kill: bool = False):
+        """An idle worker exits when its pipe closes, a busy one has to be killed."""
+        self.conn.close()
+        if kill:
+            self.process.kill()
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(1)
+
+
+class PythonReplPool:
+    """Worker processes for python_repl_tool, one per session.
+
+    A session keeps its worker, and with it its variables, until it is idle
+    for `idle_timeout` seconds or evicted to make room for another session.
+    `warm` spare workers with the heavy libraries already imported wait for
+    new sessions. Code runs with a wall clock timeout and, where the platform
+    supports it, memory and cpu limits; output is capped at `max_output` characters.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = PYTHON_REPL_WORKERS,
+        warm: int = PYTHON_REPL_WARM,
+        preload: List[str] = PYTHON_REPL_PRELOAD,
+        memory_mb: int = PYTHON_REPL_MEMORY_MB,
+        cpu_seconds: int = PYTHON_REPL_CPU_SECONDS,
+        timeout: float = PYTHON_REPL_TIMEOUT,
+        idle_timeout: float = PYTHON_REPL_IDLE_TIMEOUT,
+        max_output: int = PYTHON_REPL_MAX_OUTPUT,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.warm = min(warm, self.max_workers)
+        self.preload = preload
+        self.memory_mb = memory_mb
+        self.cpu_seconds = cpu_seconds
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.max_output = max_output
+        self._sessions: OrderedDict[str, _Worker] = OrderedDict()
+        self._spares: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Thread] = None
+        self._closed = False
+        self.started = 0
+        self.runs = 0
+        self.reaped = 0
+        self.evicted = 0
+        self.failures = 0
+
+    def _start_worker(self) -> _Worker:
+        self.started += 1
+        return _Worker(self.preload, self.memory_mb, self.cpu_seconds, self.max_output)
+
+    def _refill(self):
+        """Called with the lock held, tops up the spare workers within the worker limit."""
+        self._spares = [worker for worker in self._spares if worker.alive()]
+        while len(self._spares) < self.warm and len(self._spares) + len(self._sessions) < self.max_workers:
+            self._spares.append(self._start_worker())
+
+    def _evict(self) -> _Worker:
+        """Called with the lock held, frees the least recently used idle session."""
+        for session, worker in self._sessions.items():
+            if worker.users == 0:
+                del self._sessions[session]
+                self.evicted += 1
+                logger.info(f"Evicted python worker of session {session}")
+                return worker
+        raise ReplWorkerError(f"All {self.max_workers} python workers are busy")
+
+    def _checkout(self, session: str) -> _Worker:
+        # dead and evicted workers, closed even when starting the new one fails
+        stale = []
+        try:
+            with self._lock:
+                if self._closed:
+                    raise ReplWorkerError("Python worker pool is closed")
+                self._start_reaper()
+                worker = self._sessions.get(session)
+                if worker is not None and not worker.alive():
+                    del self._sessions[session]
+                    stale.append(worker)
+                    worker = None
+                if worker is None:
+                    self._spares = [spare for spare in self._spares if spare.alive()]
+                    if self._spares:
+                        worker = self._spares.pop(0)
+                    else:
+                        if len(self._sessions) >= self.max_workers:
+                            stale.append(self._evict())
+                        worker = self._start_worker()
+                    worker.session = session
+                    self._sessions[session] = worker
+                self._sessions.move_to_end(session)
+                worker.users += 1
+                worker.last_used = time.monotonic()
+                self._refill()
+        finally:
+            for dead in stale:
+                dead.close()
+        return worker
+
+    def _discard(self, session: str, worker: _Worker):
+        with self._lock:
+            if self._sessions.get(session) is worker:
+                del self._sessions[session]
+        worker.close(kill=True)
+
+    def run(self, session: str, code: str) -> str:
+        """Run `code` in the worker of `session` and return its stdout, blocks until it finished."""
+        worker = self._checkout(session)
+        try:
+            with worker.lock:
+                try:
+                    status, output, seconds = worker.run(code, self.timeout)
+                except ReplWorkerError:
+                    self.failures += 1
+                    self._discard(session, worker)
+                    raise
+                worker.last_used = time.monotonic()
+        finally:
+            with self._lock:
+                worker.users -= 1
+        self.runs += 1
+        logger.debug(f"python worker of session {session} ran for {seconds:.2f}s")
+        if status != "ok":
+            raise ReplWorkerError(output)
+        return output
+
+    def _start_reaper(self):
+        if self._reaper is None:
+            self._reaper = threading.Thread(target=self._reap_idle, name="python-repl-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_idle(self):
+        while not self._closed:
+            time.sleep(max(1.0, min(self.idle_timeout / 4, 30)))
+            idle = []
+            with self._lock:
+                now = time.monotonic()
+                for session, worker in list(self._sessions.items()):
+                    if now - worker.last_used > self.idle_timeout and worker.users == 0:
+                        del self._sessions[session]
+                        idle.append(worker)
+                self.reaped += len(idle)
+            for worker in idle:
+                logger.info(f"Closing idle python worker of session {worker.session}")
+                worker.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "sessions": len(self._sessions),
+                "busy": sum(1 for worker in self._sessions.values() if worker.users),
+                "spares": len(self._spares),
+                "started": self.started,
+                "runs": self.runs,
+                "failures": self.failures,
+                "evicted": self.evicted,
+                "reaped": self.reaped,
+            }
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            workers = list(self._sessions.values()) + self._spares
+            self._sessions.clear()
+            self._spares = []
+        for worker in workers:
+            worker.close()
+
+
+python_repl_pool = PythonReplPool()
+atexit.register(python_repl_pool.close)
@@ -5,6 +5,7 @@ import re
 from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_core.tools import BaseTool
 from .decorators import create_logged_tool
+from .search_cache import search_cache
 
 TAVILY_MAX_RESULTS = 5
 logger = logging.getLogger(__name__)
@@ -16,6 +17,16 @@ FORMAT_TEMPLATE = {
     "zh": "当前时间是: {CURRENT_TIME}, {query}",
 }
 
+# matches the current time injected by inject_current_time in front of a query
+CURRENT_TIME_PREFIX = re.compile(
+    "^(?:" + "|".join(
+        re.escape(template.split("{CURRENT_TIME}")[0])
+        + r"(?P<time_" + lang + r">\d{4}-\d{2}-\d{2} \d{2}):00"
+        + re.escape(template.split("{CURRENT_TIME}")[1].split("{query}")[0])
+        for lang, template in FORMAT_TEMPLATE.items()
+    ) + ")"
+)
+
 def contains_chinese(text: str) -> bool:
     """Checks if the string contains at least one Chinese character (U+4E00-U+9FFF)."""
     if not text: 
@@ -92,6 +103,43 @@ def inject_current_time(tool_cls: type[BaseTool]) -> type[BaseTool]:
 
     return tool_cls
 
-TimeInjectedTavily = inject_current_time(TavilySearchResults)
+def split_current_time(query: str) -> tuple[str, str | None]:
+    """Splits a time injected query into the original query and the injected hour (%Y-%m-%d %H)."""
+    match = CURRENT_TIME_PREFIX.match(query)
+    if not match:
+        return query, None
+    hour = next(value for value in match.groupdict().values() if value)
+    return query[match.end():], hour
+
+def _cacheable(result) -> bool:
+    # tavily returns (repr(error), {}) when the search failed
+    return isinstance(result, tuple) and not isinstance(result[0], str)
+
+def cache_search_results(tool_cls: type[BaseTool]) -> type[BaseTool]:
+    """
+    Class decorator serving a tavily tool's searches through `search_cache`.
+    Queries are keyed on the query without the injected time, the hour it was injected with and max_results,
+    so identical searches within the same hour, or running at the same time, call the API once.
+    """
+    original_run = tool_cls._run
+    original_arun = tool_cls._arun
+
+    @functools.wraps(original_run)
+    def _run(self, query: str, run_manager=None):
+        original_query, hour = split_current_time(query)
+        key = search_cache.key(original_query, self.max_results, hour)
+        return search_cache.run(key, lambda: original_run(self, query, run_manager), _cacheable)
+    setattr(tool_cls, '_run', _run)
+
+    @functools.wraps(original_arun)
+    async def _arun(self, query: str, run_manager=None):
+        original_query, hour = split_current_time(query)
+        key = search_cache.key(original_query, self.max_results, hour)
+        return await search_cache.arun(key, lambda: original_arun(self, query, run_manager), _cacheable)
+    setattr(tool_cls, '_arun', _arun)
+
+    return tool_cls
+
+TimeInjectedTavily = inject_current_time(cache_search_results(TavilySearchResults))
 LoggedTimeInjectedTavily = create_logged_tool(TimeInjectedTavily)
 tavily_tool = LoggedTimeInjectedTavily(name="tavily_tool", max_results=TAVILY_MAX_RESULTS)
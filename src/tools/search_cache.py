@@ -0,0 +1,154 @@
+import re
+import copy
+import time
+import asyncio
+import datetime
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from src.service.env import SEARCH_CACHE_TTL, SEARCH_CACHE_MAX_ENTRIES
+from src.utils.lru import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# set on the shared future when the searching caller was cancelled, the waiters search again
+_ABANDONED = object()
+
+
+def normalize_query(query: str) -> str:
+    """Case and whitespace insensitive form of a search query."""
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+class SearchCache:
+    """Search results keyed on (normalized query, hour, max_results).
+
+    A result is reused for `ttl` seconds and never past the hour it was
+    searched in, the same granularity as the time injected into the query.
+    Identical queries arriving while one is being searched wait for that
+    search instead of calling the API again. Results that are errors are
+    shared with the waiting callers but not cached.
+    """
+
+    def __init__(self, ttl: float = SEARCH_CACHE_TTL, max_entries: int = SEARCH_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self._results = LRUCache(max_entries=max_entries)
+        self._inflight: dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.expired = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    @staticmethod
+    def key(query: str, max_results: int, hour: str = None) -> tuple:
+        """`hour` defaults to the current one, formatted as %Y-%m-%d %H."""
+        return normalize_query(query), hour or datetime.datetime.now().strftime("%Y-%m-%d %H"), max_results
+
+    def _lookup(self, key: tuple) -> Tuple[Any, Optional[Future], bool]:
+        """Returns (result, None, False) on a hit, (None, future, False) while another
+        caller searches and (None, future, True) when the caller has to search."""
+        with self._lock:
+            entry = self._results.peek(key)
+            if entry is not None:
+                stored_at, result = entry
+                if time.monotonic() - stored_at < self.ttl:
+                    self._results.get(key)
+                    self.hits += 1
+                    return result, None, False
+                self._results.pop(key, None)
+                self.expired += 1
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                logger.debug(f"Search {key} is in flight, waiting for its result")
+                return None, future, False
+            future = self._inflight[key] = Future()
+            self.misses += 1
+            return None, future, True
+
+    def _finish(self, key: tuple, future: Future, result: Any = _ABANDONED, error: BaseException = None,
+                cacheable: bool = False):
+        with self._lock:
+            self._inflight.pop(key, None)
+            if cacheable:
+                self._results[key] = (time.monotonic(), copy.deepcopy(result))
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def run(self, key: tuple, search: Callable[[], Any], cacheable: Callable[[Any], bool]) -> Any:
+        """Result of `search()` for `key`, from the cache or shared with a concurrent identical search."""
+        if not self.enabled:
+            return search()
+        while True:
+            result, future, leader = self._lookup(key)
+            if future is None:
+                return copy.deepcopy(result)
+            if not leader:
+                result = future.result()
+                if result is _ABANDONED:
+                    continue
+                return copy.deepcopy(result)
+            try:
+                result = search()
+            except Exception as e:
+                self._finish(key, future, error=e)
+                raise
+            except BaseException:
+                self._finish(key, future)
+                raise
+            self._finish(key, future, result, cacheable=cacheable(result))
+            return result
+
+    async def arun(self, key: tuple, search: Callable[[], Awaitable[Any]], cacheable: Callable[[Any], bool]) -> Any:
+        """Async version of run."""
+        if not self.enabled:
+            return await search()
+        while True:
+            result, future, leader = self._lookup(key)
+            if future is None:
+                return copy.deepcopy(result)
+            if not leader:
+                # a cancelled waiter must not cancel the search it shares
+                result = await asyncio.shield(asyncio.wrap_future(future))
+                if result is _ABANDONED:
+                    continue
+                return copy.deepcopy(result)
+            try:
+                result = await search()
+            except Exception as e:
+                self._finish(key, future, error=e)
+                raise
+            except BaseException:
+                self._finish(key, future)
+                raise
+            self._finish(key, future, result, cacheable=cacheable(result))
+            return result
+
+    def clear(self):
+        self._results.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.coalesced + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._results),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "expired": self.expired,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+            "evictions": self._results.evictions,
+        }
+
+
+search_cache = SearchCache()
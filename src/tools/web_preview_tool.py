@@ -7,6 +7,7 @@ from langchain_core.messages import HumanMessage
 from pydantic import BaseModel, Field
 from langchain.tools import BaseTool
 from .browser_decorators import create_logged_tool
+from .executor import tool_executors
 from src.llm.llm import get_llm_by_type
 
 logger = logging.getLogger(__name__)
@@ -22,17 +23,16 @@ class WebPreviewTool(BaseTool):
     args_schema: Type[BaseModel] = WebPreviewInput
     description: str = "[HIGH PRIORITY - MUST USE FOR HTML/VISUAL OUTPUT] Generate a web preview by summarizing content with LLM and creating an HTML file. **ALWAYS USE THIS TOOL when user asks for HTML, visual presentation, or beautiful formatting**. This tool should be used whenever you need to present information in a visual, structured format, especially when user mentions 'HTML', 'beautiful', 'visual', or 'preview'. The preview link will be automatically notified to the frontend, so you don't need to worry about returning the link or URL in your response. Just focus on generating quality HTML content. Use this tool for reports, summaries, or any content that would benefit from HTML presentation."
     
-    def _run(self, content: str, title: str = "Web Preview", user_id: str = None) -> str:
-        """Generate web preview HTML file"""
+    def _write_preview(self, content: str, title: str) -> Path:
+        """Summarize content into an HTML page with the LLM and write it, the blocking part of the tool"""
 
         print(" Calling LLM to generate HTML...")
-        
-        try:
-            # Call LLM for content summarization
-            llm = get_llm_by_type("basic")
-            
-            # Build prompt requiring only HTML code return
-            prompt = f"""Please summarize the following content and convert it into a beautiful HTML page. Requirements:
+
+        # Call LLM for content summarization
+        llm = get_llm_by_type("basic")
+
+        # Build prompt requiring only HTML code return
+        prompt = f"""Please summarize the following content and convert it into a beautiful HTML page. Requirements:
 1. Return only complete HTML code, no other text explanations
 2. Use modern CSS styles with responsive design
 3. Page title should be: {title}
@@ -43,49 +43,70 @@ class WebPreviewTool(BaseTool):
 Content:
 {content}"""
 
-            # Call LLM to get HTML code
-            response = llm.invoke([HumanMessage(content=prompt)])
-            html_content = response.content.strip()
-            
-            print("✅ LLM response received")
-            
-            # If the returned content contains markdown code block markers, remove them
-            if html_content.startswith("```html"):
-                html_content = html_content[7:]
-            if html_content.startswith("```"):
-                html_content = html_content[3:]
-            if html_content.endswith("```"):
-                html_content = html_content[:-3]
-            
-            html_content = html_content.strip()
-            
-            # Ensure src/tools/web_preview directory exists
-            web_preview_dir = Path("src/tools/web_preview")
-            web_preview_dir.mkdir(parents=True, exist_ok=True)
-            print(f" Created directory: {web_preview_dir.absolute()}")
-            
-            # Write HTML file
-            html_file = web_preview_dir / "index.html"
-            with open(html_file, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-            
-            print(f" HTML file saved: {html_file.absolute()}")
-            print(" Web Preview generation completed!")
-            
+        # Call LLM to get HTML code
+        response = llm.invoke([HumanMessage(content=prompt)])
+        html_content = response.content.strip()
+
+        print("✅ LLM response received")
+
+        # If the returned content contains markdown code block markers, remove them
+        if html_content.startswith("```html"):
+            html_content = html_content[7:]
+        if html_content.startswith("```"):
+            html_content = html_content[3:]
+        if html_content.endswith("```"):
+            html_content = html_content[:-3]
+
+        html_content = html_content.strip()
+
+        # Ensure src/tools/web_preview directory exists
+        web_preview_dir = Path("src/tools/web_preview")
+        web_preview_dir.mkdir(parents=True, exist_ok=True)
+        print(f" Created directory: {web_preview_dir.absolute()}")
+
+        # Write HTML file
+        html_file = web_preview_dir / "index.html"
+        with open(html_file, 'w', encoding='utf-8') as f:
+            f.write(html_content)
+
+        print(f" HTML file saved: {html_file.absolute()}")
+        print(" Web Preview generation completed!")
+        return html_file
+
+    @staticmethod
+    def _preview_message(title: str, html_file: Path) -> dict:
+        return {
+            "type": "web_preview_ready",
+            "title": title,
+            "file_path": str(html_file),
+            "preview_url": "/web_preview",  # Frontend can access preview through this path
+            "timestamp": str(html_file.stat().st_mtime)  # File modification timestamp
+        }
+
+    @staticmethod
+    def _success_message(title: str) -> str:
+        return f"Web preview has been generated successfully with the title '{title}'. The HTML content has been summarized and formatted into a beautiful webpage. The preview link will be automatically sent to the frontend."
+
+    @staticmethod
+    def _failure_message(e: Exception) -> str:
+        error_msg = f"Failed to generate web preview. Error: {repr(e)}"
+        print(f"❌ Generation failed: {error_msg}")
+        logger.error(error_msg)
+        return error_msg
+
+    def _run(self, content: str, title: str = "Web Preview", user_id: str = None) -> str:
+        """Generate web preview HTML file"""
+        try:
+            html_file = self._write_preview(content, title)
+
             # Send special web_preview_ready message
             if user_id:
                 try:
                     from .websocket_manager import websocket_manager
                     import asyncio
-                    
-                    preview_message = {
-                        "type": "web_preview_ready",
-                        "title": title,
-                        "file_path": str(html_file),
-                        "preview_url": "/web_preview",  # Frontend can access preview through this path
-                        "timestamp": str(html_file.stat().st_mtime)  # File modification timestamp
-                    }
-                    
+
+                    preview_message = self._preview_message(title, html_file)
+
                     # Try to send WebSocket message
                     try:
                         loop = asyncio.get_event_loop()
@@ -105,22 +126,35 @@ Content:
                         # Send tool_end notification
                         loop.run_until_complete(websocket_manager.broadcast_tool_end(user_id, "web_preview_tool", True, f"Web preview '{title}' generated successfully"))
                         loop.close()
-                        
+
                 except Exception as e:
                     logger.warning(f"Failed to send web_preview_ready notification: {e}")
-            
+
             logger.info(f"Web preview HTML generated successfully at {html_file}")
-            return f"Web preview has been generated successfully with the title '{title}'. The HTML content has been summarized and formatted into a beautiful webpage. The preview link will be automatically sent to the frontend."
-            
+            return self._success_message(title)
+
         except Exception as e:
-            error_msg = f"Failed to generate web preview. Error: {repr(e)}"
-            print(f"❌ Generation failed: {error_msg}")
-            logger.error(error_msg)
-            return error_msg
-    
+            return self._failure_message(e)
+
     async def _arun(self, content: str, title: str = "Web Preview", user_id: str = None) -> str:
-        """Async version of web preview tool"""
-        return self._run(content, title, user_id)
+        """Async version of web preview tool, the page is generated on the bounded web preview executor"""
+        try:
+            html_file = await tool_executors.run(self.name, self._write_preview, content, title)
+        except Exception as e:
+            return self._failure_message(e)
+
+        # notifications are sent from the event loop that owns the websocket connections
+        if user_id:
+            try:
+                from .websocket_manager import websocket_manager
+
+                await websocket_manager.send_to_user(user_id, self._preview_message(title, html_file))
+                await websocket_manager.broadcast_tool_end(user_id, "web_preview_tool", True, f"Web preview '{title}' generated successfully")
+            except Exception as e:
+                logger.warning(f"Failed to send web_preview_ready notification: {e}")
+
+        logger.info(f"Web preview HTML generated successfully at {html_file}")
+        return self._success_message(title)
 
 
 WebPreviewTool = create_logged_tool(WebPreviewTool)
@@ -106,6 +106,18 @@ class WebSocketManager:
         logger.info(f"Broadcasting tool end message: user {user_id}, tool {tool_name}, success: {success}")
         return await self.send_to_user(user_id, message)
     
+    async def broadcast_tool_output(self, user_id: str, tool_name: str, stream: str, content: str):
+        """Broadcast a chunk of output of a running tool"""
+        message = {
+            "type": "tool_output",
+            "name": tool_name,
+            "timestamp": datetime.now().isoformat(),
+            "stream": stream,
+            "content": content
+        }
+
+        return await self.send_to_user(user_id, message)
+
     async def broadcast_tool_status(self, user_id: str, active_tools: list):
         """Broadcast current active tools status"""
         message = {
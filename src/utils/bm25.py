@@ -0,0 +1,74 @@
+import re
+import math
+from collections import Counter
+from typing import Dict, Hashable, List
+
+# latin words and digits, CJK text is indexed by character
+_TOKEN = re.compile(r"[a-z0-9]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+STOPWORDS = frozenset(
+    "a an and are as at be by can for from has have in into is it its of on or that the this to with "
+    "will which who you your based using use used such".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 ranking of short documents (agent and tool descriptions) against a query.
+
+    Built once per catalog, a query only visits the postings of its own terms.
+    """
+
+    def __init__(self, documents: Dict[Hashable, str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.keys = list(documents)
+        self._postings: Dict[str, List[tuple]] = {}
+        lengths = []
+        for position, text in enumerate(documents.values()):
+            terms = Counter(tokenize(text))
+            lengths.append(sum(terms.values()))
+            for term, frequency in terms.items():
+                self._postings.setdefault(term, []).append((position, frequency))
+        average = sum(lengths) / len(lengths) if lengths else 0.0
+        # length normalization of each document, precomputed
+        self._norms = [k1 * (1 - b + b * length / average) if average else k1 for length in lengths]
+        count = len(self.keys)
+        self._idf = {
+            term: math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def __len__(self):
+        return len(self.keys)
+
+    def scores(self, query: str) -> Dict[int, float]:
+        """Score of every document sharing a term with `query`, by position."""
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            idf = self._idf[term]
+            for position, frequency in postings:
+                scores[position] = scores.get(position, 0.0) + idf * frequency * (self.k1 + 1) / (
+                    frequency + self._norms[position]
+                )
+        return scores
+
+    def top_k(self, query: str, k: int) -> List[Hashable]:
+        """Keys of the `k` documents most relevant to `query`, in catalog order.
+
+        When fewer than `k` documents match, the others fill the remaining
+        places in catalog order.
+        """
+        if k <= 0 or k >= len(self.keys):
+            return list(self.keys)
+        scores = self.scores(query)
+        ranked = sorted(scores, key=lambda position: (-scores[position], position))[:k]
+        if len(ranked) < k:
+            chosen = set(ranked)
+            ranked += [position for position in range(len(self.keys)) if position not in chosen][: k - len(ranked)]
+        return [self.keys[position] for position in sorted(ranked)]
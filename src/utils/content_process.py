@@ -18,3 +18,83 @@ def clean_response_tags(content: str) -> str:
 
     return content
 
+
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+FENCE_PREFIXES = ("```json", "```ts")
+FENCE_SUFFIX = "```"
+
+
+def _partial_suffix(text: str, token: str) -> int:
+    """Length of the longest suffix of `text` that is a proper prefix of `token`."""
+    for size in range(min(len(text), len(token) - 1), 0, -1):
+        if token.startswith(text[-size:]):
+            return size
+    return 0
+
+
+class ResponseTagStream:
+    """
+        incremental clean_response_tags for streamed responses, `feed` returns the
+        part of the response that is safe to show, `finish` the held back rest.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pending = ""
+        self._in_think = False
+        # part of an open think block already searched for its closing tag
+        self._scanned = 0
+        self._started = False
+
+    def feed(self, delta: str) -> str:
+        self._buffer += delta
+        while True:
+            if self._in_think:
+                end = self._buffer.find(THINK_CLOSE, self._scanned)
+                if end < 0:
+                    # kept, a block that is never closed is part of the response
+                    self._scanned = max(0, len(self._buffer) - len(THINK_CLOSE) + 1)
+                    break
+                self._buffer = self._buffer[end + len(THINK_CLOSE):]
+                self._in_think = False
+                self._scanned = 0
+                continue
+            start = self._buffer.find(THINK_OPEN)
+            if start >= 0:
+                self._pending += self._buffer[:start]
+                self._buffer = self._buffer[start + len(THINK_OPEN):]
+                self._in_think = True
+                continue
+            hold = _partial_suffix(self._buffer, THINK_OPEN)
+            self._pending += self._buffer[: len(self._buffer) - hold]
+            self._buffer = self._buffer[len(self._buffer) - hold:]
+            break
+        return self._release()
+
+    def _release(self) -> str:
+        if not self._started:
+            if any(prefix.startswith(self._pending) for prefix in FENCE_PREFIXES):
+                # could still become a code fence opening
+                return ""
+            for prefix in FENCE_PREFIXES:
+                if self._pending.startswith(prefix):
+                    self._pending = self._pending.removeprefix(prefix)
+                    break
+            self._started = True
+        # trailing backticks may be the closing fence
+        hold = len(self._pending) - len(self._pending.rstrip("`"))
+        hold = min(hold, len(FENCE_SUFFIX))
+        text = self._pending[: len(self._pending) - hold]
+        self._pending = self._pending[len(self._pending) - hold:]
+        return text
+
+    def finish(self) -> str:
+        # clean_response_tags only removes closed think blocks
+        self._pending += THINK_OPEN + self._buffer if self._in_think else self._buffer
+        self._buffer = ""
+        self._in_think = False
+        text = self._release() + self._pending
+        self._pending = ""
+        return text.removesuffix(FENCE_SUFFIX)
@@ -0,0 +1,207 @@
+import re
+from html.parser import HTMLParser
+from typing import List, Optional
+
+_HIDDEN_STYLE = re.compile(r"display\s*:\s*none|visibility\s*:\s*hidden", re.I)
+_SENTENCE_END = re.compile(r"[.!?;,。！？；，]")
+
+# elements whose content is not text, skipped up to their closing tag
+RAW_TEXT_TAGS = {"script", "style", "textarea", "xmp", "iframe", "noembed", "noframes", "noscript"}
+# elements that are page furniture rather than content. Not form, ASP.NET pages wrap the whole body in one
+SKIPPED_TAGS = {"nav", "footer", "aside", "button", "select", "svg", "math", "template", "dialog", "menu"}
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr",
+}
+BLOCK_TAGS = {
+    "address", "article", "blockquote", "body", "br", "caption", "dd", "details", "div", "dl", "dt", "figcaption",
+    "figure", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "ol", "p", "pre", "section",
+    "summary", "table", "td", "th", "tr", "ul",
+}
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+CONTENT_TAGS = {"article", "main"}
+
+
+def _hidden(attrs: List[tuple]) -> bool:
+    """Whether the attributes of a tag hide it: `hidden`, `aria-hidden="true"` or a hiding inline style."""
+    for name, value in attrs:
+        if name == "hidden":
+            return True
+        if value is None:
+            continue
+        if name == "aria-hidden" and value.strip().lower() == "true":
+            return True
+        if name == "style" and _HIDDEN_STYLE.search(value):
+            return True
+    return False
+
+
+class _Block:
+    __slots__ = ("index", "text", "link_chars", "heading", "in_content", "score")
+
+    def __init__(self, index: int, text: str, link_chars: int, heading: bool, in_content: bool):
+        self.index = index
+        self.text = text
+        self.link_chars = link_chars
+        self.heading = heading
+        self.in_content = in_content
+        self.score = 0.0
+
+
+class _TextParser(HTMLParser):
+    """Collects the title and the text blocks of a document in document order."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.blocks: List[_Block] = []
+        self._parts: List[str] = []
+        self._link_chars = 0
+        self._heading = False
+        self._content_depth = 0
+        self._links = 0
+        # element whose content is dropped, and how many of its kind are open
+        self._skipped: Optional[str] = None
+        self._skipped_depth = 0
+        self._title_parts: Optional[List[str]] = None
+
+    def _flush(self):
+        if self._parts:
+            text = " ".join("".join(self._parts).split())
+            if text:
+                self.blocks.append(
+                    _Block(len(self.blocks), text, min(self._link_chars, len(text)), self._heading, self._content_depth > 0)
+                )
+            self._parts, self._link_chars = [], 0
+        self._heading = False
+
+    def handle_starttag(self, tag: str, attrs: List[tuple]):
+        if self._skipped is not None:
+            if tag == self._skipped:
+                self._skipped_depth += 1
+            return
+        if tag in RAW_TEXT_TAGS or tag in SKIPPED_TAGS or (attrs and _hidden(attrs)):
+            if tag not in VOID_TAGS:
+                # a hidden inline element does not end the text around it
+                if tag in RAW_TEXT_TAGS or tag in SKIPPED_TAGS or tag in BLOCK_TAGS or tag in CONTENT_TAGS:
+                    self._flush()
+                self._skipped, self._skipped_depth = tag, 1
+            return
+        if tag == "title":
+            if not self.title:
+                self._title_parts = []
+        elif tag == "a":
+            self._links += 1
+        elif tag in CONTENT_TAGS:
+            self._flush()
+            self._content_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._flush()
+            self._heading = tag in HEADING_TAGS
+
+    def handle_endtag(self, tag: str):
+        if self._skipped is not None:
+            if tag == self._skipped:
+                self._skipped_depth -= 1
+                if not self._skipped_depth:
+                    self._skipped = None
+            return
+        if tag == "title":
+            if self._title_parts is not None:
+                self.title = " ".join("".join(self._title_parts).split())
+                self._title_parts = None
+        elif tag == "a":
+            self._links = max(0, self._links - 1)
+        elif tag in CONTENT_TAGS:
+            self._flush()
+            self._content_depth = max(0, self._content_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data: str):
+        if self._skipped is not None:
+            return
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+            return
+        if data.isspace():
+            # blocks are separated anyway
+            return
+        if self._links:
+            self._link_chars += len(data.strip())
+        self._parts.append(data)
+
+    def close(self):
+        super().close()
+        if self._title_parts is not None:
+            self.title = " ".join("".join(self._title_parts).split())
+            self._title_parts = None
+        self._flush()
+
+
+def _parse(document: str):
+    """Single pass over `document`, returns the title and the text blocks in document order."""
+    parser = _TextParser()
+    parser.feed(document)
+    parser.close()
+    return parser.title, parser.blocks
+
+
+def _score(block: _Block) -> float:
+    size = len(block.text)
+    link_density = block.link_chars / size
+    score = size * (1 - link_density) + 20 * len(_SENTENCE_END.findall(block.text))
+    if link_density > 0.5 or (size < 25 and not _SENTENCE_END.search(block.text)):
+        score *= 0.1
+    if block.in_content:
+        score *= 1.5
+    return score
+
+
+def extract_text(document: str, max_chars: int = 8000) -> str:
+    """Readable text of an html document within `max_chars`.
+
+    Scripts, styles, navigation, form controls and hidden elements are dropped and all
+    entities decoded in one pass. When the remaining text is longer than
+    `max_chars` the blocks carrying most of the content (long, sentence-like,
+    few links, inside article/main) are kept with their headings, in document order.
+    """
+    title, parsed = _parse(document)
+    seen = set()
+    blocks = []
+    for block in parsed:
+        if block.text not in seen:
+            seen.add(block.text)
+            block.index = len(blocks)
+            blocks.append(block)
+
+    budget = max_chars - len(title) - 1 if title else max_chars
+    if max_chars <= 0 or sum(len(block.text) + 1 for block in blocks) <= budget:
+        selected = blocks
+    else:
+        for block in blocks:
+            block.score = _score(block)
+        chosen = set()
+        used = 0
+        for block in sorted(blocks, key=lambda block: block.score, reverse=True):
+            if block.score <= 0 or used >= budget:
+                break
+            if block.heading:
+                continue
+            cost = len(block.text) + 1
+            heading = blocks[block.index - 1] if block.index else None
+            if heading is not None and heading.heading and heading.index not in chosen:
+                cost += len(heading.text) + 1
+            else:
+                heading = None
+            if used + cost > budget:
+                continue
+            chosen.add(block.index)
+            if heading is not None:
+                chosen.add(heading.index)
+            used += cost
+        selected = [block for block in blocks if block.index in chosen]
+        if not selected and blocks:
+            selected = [_Block(0, blocks[0].text[:budget], 0, False, False)]
+
+    text = "\n".join(block.text for block in selected)
+    return f"{title}\n{text}" if title and text else title or text
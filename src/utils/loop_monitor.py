@@ -0,0 +1,102 @@
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from typing import Dict, Optional
+
+from src.service.env import LOOP_BLOCK_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+
+class _WatchedLoop:
+    def __init__(self, loop: asyncio.AbstractEventLoop, thread_id: int):
+        self.loop = loop
+        self.thread_id = thread_id
+        self.last_tick = time.monotonic()
+        self.reported_tick = None
+
+
+class LoopBlockingDetector:
+    """Reports synchronous code that holds an event loop longer than `threshold` seconds.
+
+    Every watched loop schedules a cheap heartbeat; a daemon thread notices when
+    the heartbeat stalls and logs the stack of the loop thread and the name of the
+    task that is running, e.g. the workflow node.
+    """
+
+    def __init__(self, threshold: float = LOOP_BLOCK_THRESHOLD):
+        self.threshold = threshold
+        self.interval = threshold / 4
+        self._loops: Dict[int, _WatchedLoop] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.blocked = 0
+        self.max_block = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def watch(self):
+        """Start watching the running event loop, a no-op if it is already watched."""
+        if not self.enabled:
+            return
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if id(loop) in self._loops and self._loops[id(loop)].loop is loop:
+                return
+            watched = _WatchedLoop(loop, threading.get_ident())
+            self._loops[id(loop)] = watched
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._watchdog, name="loop-monitor", daemon=True)
+                self._thread.start()
+        loop.call_soon(self._tick, watched)
+
+    def _tick(self, watched: _WatchedLoop):
+        now = time.monotonic()
+        gap = now - watched.last_tick - self.interval
+        if gap > self.threshold:
+            # the watchdog logs the block while it lasts, the heartbeat only measures it
+            self.max_block = max(self.max_block, gap)
+        watched.last_tick = now
+        if not watched.loop.is_closed():
+            watched.loop.call_later(self.interval, self._tick, watched)
+
+    def _watchdog(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                watched_loops = list(self._loops.items())
+            for key, watched in watched_loops:
+                if watched.loop.is_closed() or not watched.loop.is_running():
+                    with self._lock:
+                        self._loops.pop(key, None)
+                    continue
+                stalled = time.monotonic() - watched.last_tick - self.interval
+                if stalled > self.threshold and watched.reported_tick != watched.last_tick:
+                    watched.reported_tick = watched.last_tick
+                    self.blocked += 1
+                    self._report(watched, stalled)
+
+    def _report(self, watched: _WatchedLoop, stalled: float):
+        task = asyncio.current_task(watched.loop)
+        task_name = task.get_name() if task else "<no task>"
+        frame = sys._current_frames().get(watched.thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame else ""
+        logger.warning(
+            f"Event loop blocked for more than {stalled:.3f}s by a synchronous call in {task_name}:\n{stack}"
+        )
+
+    def stats(self) -> dict:
+        return {
+            "threshold": self.threshold,
+            "watched_loops": len(self._loops),
+            "blocked": self.blocked,
+            "max_block": round(self.max_block, 3),
+        }
+
+
+loop_monitor = LoopBlockingDetector()
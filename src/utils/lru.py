@@ -0,0 +1,160 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """Thread-safe LRU mapping bounded by entry count and approximate bytes.
+
+    `sizeof` estimates the footprint of a value when it is stored (or when
+    `resize` is called after an in-place change). `on_evict(key, value)` is
+    called for every entry pushed out by the bounds, outside the internal lock,
+    so it may do I/O.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 0,
+        sizeof: Optional[Callable[[Any], int]] = None,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda value: 0)
+        self._on_evict = on_evict
+        self._data: OrderedDict = OrderedDict()
+        self._sizes: dict = {}
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Read an entry without touching recency or hit/miss counters."""
+        return self._data.get(key, default)
+
+    def __getitem__(self, key: Hashable) -> Any:
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                raise KeyError(key)
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._sizes.pop(key, 0)
+            self._data[key] = value
+            self._data.move_to_end(key)
+            size = self._sizeof(value)
+            self._sizes[key] = size
+            self._bytes += size
+            evicted = self._evict_overflow(protect=key)
+        self._notify(evicted)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __iter__(self):
+        return iter(list(self._data))
+
+    def keys(self):
+        return list(self._data.keys())
+
+    def values(self):
+        return list(self._data.values())
+
+    def items(self):
+        return list(self._data.items())
+
+    def pop(self, key: Hashable, *default: Any) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._sizes.pop(key, 0)
+                return self._data.pop(key)
+        if default:
+            return default[0]
+        raise KeyError(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def resize(self, key: Hashable, size: Optional[int] = None) -> None:
+        """Re-account the size of an entry that was modified in place."""
+        with self._lock:
+            if key not in self._data:
+                return
+            new_size = self._sizeof(self._data[key]) if size is None else size
+            self._bytes += new_size - self._sizes.get(key, 0)
+            self._sizes[key] = new_size
+            evicted = self._evict_overflow(protect=key)
+        self._notify(evicted)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._bytes
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _over_limit(self) -> bool:
+        if self.max_entries and len(self._data) > self.max_entries:
+            return True
+        return bool(self.max_bytes and self._bytes > self.max_bytes)
+
+    def _evict_overflow(self, protect: Hashable = None) -> list:
+        evicted = []
+        while self._over_limit() and len(self._data) > 1:
+            key = next(iter(self._data))
+            if key == protect:
+                # never evict the entry that is being written right now
+                self._data.move_to_end(key)
+                key = next(iter(self._data))
+                if key == protect:
+                    break
+            value = self._data.pop(key)
+            self._bytes -= self._sizes.pop(key, 0)
+            self.evictions += 1
+            evicted.append((key, value))
+        return evicted
+
+    def _notify(self, evicted: list) -> None:
+        if not self._on_evict:
+            return
+        for key, value in evicted:
+            try:
+                self._on_evict(key, value)
+            except Exception as e:
+                logger.error(f"Error evicting cache entry {key}: {e}")
@@ -0,0 +1,124 @@
+"""Entry point of the python_repl_tool worker processes.
+
+Kept free of project imports: workers run this file as their main script.
+"""
+import os
+import re
+import sys
+import json
+import time
+import logging
+import importlib
+import traceback
+from io import StringIO
+
+try:
+    import resource
+except ImportError:  # not available on windows, limits are skipped
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+def sanitize_input(query: str) -> str:
+    """Same cleanup as langchain_experimental's PythonREPL: strip backticks and a leading `python`."""
+    query = re.sub(r"^(\s|`)*(?i:python)?\s*", "", query)
+    query = re.sub(r"(\s|`)*$", "", query)
+    return query
+
+
+def _limit_memory(memory_mb: int):
+    if resource is None or memory_mb <= 0:
+        return
+    limit = memory_mb * 1024 * 1024
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ValueError, OSError) as e:
+        logger.warning(f"Could not limit REPL worker memory: {e}")
+
+
+def _limit_cpu(cpu_seconds: int):
+    """The limit is cumulative per process, so it is moved forward before every run."""
+    if resource is None or cpu_seconds <= 0:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = int(usage.ru_utime + usage.ru_stime)
+    hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+    try:
+        resource.setrlimit(resource.RLIMIT_CPU, (used + cpu_seconds, hard))
+    except (ValueError, OSError) as e:
+        logger.warning(f"Could not limit REPL worker cpu time: {e}")
+
+
+def _preload(modules: list):
+    for module in modules:
+        try:
+            if module == "matplotlib":
+                import matplotlib
+                # no display in a worker, figures are saved to files
+                matplotlib.use("Agg")
+                importlib.import_module("matplotlib.pyplot")
+            else:
+                importlib.import_module(module)
+        except Exception as e:
+            logger.warning(f"Could not preload {module} in REPL worker: {e}")
+
+
+def _truncate(output: str, max_output: int) -> str:
+    if max_output <= 0 or len(output) <= max_output:
+        return output
+    return output[:max_output] + f"\n... [output truncated, {len(output) - max_output} more characters]"
+
+
+def run_worker(conn, preload: list, memory_mb: int, cpu_seconds: int, max_output: int):
+    """Execute code sent over `conn` in one persistent namespace until the pipe closes.
+
+    Replies (status, output, seconds): "ok" with the captured stdout like
+    PythonREPL, where an exception of the code is part of the output, or
+    "error" for exits of the interpreter.
+    """
+    # one core per worker, the pool scales across processes; also keeps the
+    # virtual memory reserved by BLAS thread pools under the memory limit
+    for variable in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ.setdefault(variable, "1")
+    _limit_memory(memory_mb)
+    _preload(preload)
+    namespace = {"__name__": "__main__"}
+    conn.send(("ready", "", 0.0))
+    while True:
+        try:
+            code = conn.recv()
+        except (EOFError, OSError):
+            break
+        _limit_cpu(cpu_seconds)
+        old_stdout = sys.stdout
+        sys.stdout = stdout = StringIO()
+        started = time.monotonic()
+        try:
+            exec(sanitize_input(code), namespace)
+            reply = ("ok", stdout.getvalue())
+        except Exception as e:
+            reply = ("ok", repr(e))
+        except BaseException as e:
+            reply = ("error", "".join(traceback.format_exception_only(type(e), e)).strip())
+        finally:
+            sys.stdout = old_stdout
+        status, output = reply
+        try:
+            conn.send((status, _truncate(output, max_output), time.monotonic() - started))
+        except (EOFError, OSError):
+            break
+
+
+def main(argv: list):
+    """`repl_worker.py <fd of the pipe> <json of the run_worker arguments>`"""
+    from multiprocessing.connection import Connection
+
+    # the directory of this file is not a package root of the executed code
+    if sys.path and os.path.abspath(sys.path[0]) == os.path.dirname(os.path.abspath(__file__)):
+        del sys.path[0]
+    run_worker(Connection(int(argv[1])), *json.loads(argv[2]))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
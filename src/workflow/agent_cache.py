@@ -0,0 +1,83 @@
+import hashlib
+import logging
+from typing import List
+
+from langchain_core.messages import SystemMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+from langgraph.prebuilt import create_react_agent
+
+from src.interface.agent import Agent
+from src.llm.llm import get_llm_by_type
+from src.manager import agent_manager
+from src.service.env import AGENT_GRAPH_CACHE_SIZE
+from src.utils.lru import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# configurable key carrying the rendered system prompt of one invocation
+AGENT_PROMPT_KEY = "agent_prompt"
+
+
+def _injected_prompt(state, config: RunnableConfig):
+    """Prepend the system prompt passed in the invocation config."""
+    prompt = config.get("configurable", {}).get(AGENT_PROMPT_KEY)
+    if not prompt:
+        return state["messages"]
+    return [SystemMessage(content=prompt)] + state["messages"]
+
+
+class CompiledAgentCache:
+    """Compiled ReAct graphs keyed by agent definition, tool set and llm type.
+
+    The system prompt depends on the workflow state, so it is not baked into the
+    graph but passed per invocation, see `agent_config`. Graphs built from an
+    older version of agent_manager.available_tools are dropped.
+    """
+
+    def __init__(self, max_entries: int = AGENT_GRAPH_CACHE_SIZE):
+        self.cache = LRUCache(max_entries=max_entries)
+        self._tools_version = None
+
+    @staticmethod
+    def _key(_agent: Agent, tools: List[BaseTool], tools_version: int) -> tuple:
+        definition = hashlib.md5(_agent.model_dump_json().encode("utf-8")).hexdigest()
+        # tool objects are only replaced together with a new tools version
+        tool_set = tuple(tool.name for tool in tools)
+        return (_agent.agent_name, definition, tool_set, _agent.llm_type, tools_version)
+
+    def get(self, _agent: Agent, tools: List[BaseTool]):
+        tools_version = agent_manager.tools_version
+        if tools_version != self._tools_version:
+            self.cache.clear()
+            self._tools_version = tools_version
+        key = self._key(_agent, tools, tools_version)
+        agent = self.cache.get(key)
+        if agent is None:
+            agent = create_react_agent(
+                get_llm_by_type(_agent.llm_type),
+                tools=tools,
+                prompt=_injected_prompt,
+            )
+            self.cache[key] = agent
+            logger.debug(f"compiled react agent {_agent.agent_name}")
+        return agent
+
+    def invalidate(self, agent_name: str):
+        for key in self.cache.keys():
+            if key[0] == agent_name:
+                self.cache.pop(key, None)
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+
+def agent_config(prompt: str, config: dict = None) -> dict:
+    """Invocation config of a cached agent, carrying its rendered system prompt."""
+    config = dict(config or {})
+    config["configurable"] = {**config.get("configurable", {}), AGENT_PROMPT_KEY: prompt}
+    return config
+
+
+compiled_agent_cache = CompiledAgentCache()
+agent_manager.on_agent_changed(compiled_agent_cache.invalidate)
@@ -29,7 +29,7 @@ async def agent_factory_node(state: State) -> Command[Literal["publisher", "__en
     tools = []
     messages = apply_prompt_template("agent_factory", state)
     agent_spec = await (
-        get_llm_by_type(AGENT_LLM_MAP["agent_factory"])
+        get_llm_by_type(AGENT_LLM_MAP["agent_factory"], node="agent_factory")
         .with_structured_output(AgentBuilder)
         .ainvoke(messages)
     )
@@ -75,7 +75,7 @@ async def publisher_node(state: State) -> Command[Literal["agent_factory", "__en
     goto = "__end__"
     messages = apply_prompt_template("publisher", state)
     response = await (
-        get_llm_by_type(AGENT_LLM_MAP["publisher"])
+        get_llm_by_type(AGENT_LLM_MAP["publisher"], node="publisher")
         .with_structured_output(Router)
         .ainvoke(messages)
     )
@@ -140,7 +140,7 @@ async def coordinator_node(state: State) -> Command[Literal["planner", "__end__"
 
     goto = "__end__"
     messages = apply_prompt_template("coordinator", state)
-    response = await get_llm_by_type(AGENT_LLM_MAP["coordinator"]).ainvoke(messages)
+    response = await get_llm_by_type(AGENT_LLM_MAP["coordinator"], node="coordinator").ainvoke(messages)
 
     content = clean_response_tags(response.content)  # type: ignore
     if "handover_to_planner" in content:
@@ -1,18 +1,23 @@
 import json
+import atexit
+import asyncio
 import logging
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from copy import deepcopy
 from src.workflow.template import WORKFLOW_TEMPLATE
 from typing import Union, List
 from src.interface.agent import Agent
-from config.global_variables import agents_dir
 from src.interface.agent import Component
-import os
 from pathlib import Path
 from collections import deque
-import re
 import threading
+from src.utils.lru import LRUCache
+from src.service.env import WORKFLOW_CACHE_MAX_ENTRIES, WORKFLOW_CACHE_MAX_BYTES
+from src.storage import StorageBackend, FileStorage, MANIFEST_FILE, workflow_header, get_storage
 
 logger = logging.getLogger(__name__)
 
+
 class WorkflowCache:
     _instance = None
     
@@ -23,71 +28,191 @@ class WorkflowCache:
         return cls._instance
     
 
-    def __init__(self, workflow_dir: Path):
+    def __init__(self, workflow_dir: Path = None, max_entries: int = WORKFLOW_CACHE_MAX_ENTRIES, max_bytes: int = WORKFLOW_CACHE_MAX_BYTES, storage: StorageBackend = None):
         if not hasattr(self, 'initialized'): 
-            if not workflow_dir.exists():
-                logger.info(f"path {workflow_dir} does not exist when workflow cache initializing, gona to create...")
-                workflow_dir.mkdir(parents=True, exist_ok=True)
-            self.workflow_dir = workflow_dir
+            if storage is None:
+                storage = FileStorage(workflow_dir=workflow_dir) if workflow_dir else get_storage()
+            self.storage = storage
             self.queue = {}
-            self.cache = {}
+            # bounded LRU of workflow bodies, evicted entries are flushed if dirty and reloaded on demand
+            self.cache = LRUCache(
+                max_entries=max_entries,
+                max_bytes=max_bytes,
+                sizeof=self._workflow_size,
+                on_evict=self._evict_workflow,
+            )
+            # workflow ids whose in-memory body is newer than the json file
+            self._dirty = set()
+            # write-behind persistence: a single writer thread keeps writes of one file ordered,
+            # _pending coalesces repeated saves of a workflow into one scheduled write
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="workflow-flush")
+            self._flush_lock = threading.Lock()
+            self._pending = {}
+            # dirty bodies evicted from the LRU, kept until their write lands, and bodies of
+            # launches still running, kept in memory until they are dumped or released
+            self._evicted = {}
+            # launched workflows not dumped yet, never written before they finish
+            self._running = set()
             self.latest_polish_id = {}
             self.initialized = True
             self._lock_pool = {}
 
-    def _load_workflow(self, user_id: str):
+    def _get_lock(self, user_id: str) -> threading.RLock:
+        if user_id not in self._lock_pool:
+            self._lock_pool[user_id] = threading.RLock()
+        return self._lock_pool[user_id]
+
+    @staticmethod
+    def _serialize(workflow: dict) -> str:
+        return json.dumps(workflow, ensure_ascii=False, separators=(",", ":"))
+
+    @staticmethod
+    def _workflow_size(workflow: dict) -> int:
+        return len(WorkflowCache._serialize(workflow))
+
+    def _flush_workflow(self, workflow_id: str):
+        """Write the latest state of a dirty workflow, runs on the flush thread."""
+        with self._flush_lock:
+            self._pending.pop(workflow_id, None)
+            workflow = self._evicted.get(workflow_id)
+            if workflow is None:
+                workflow = self.cache.peek(workflow_id)
+        if workflow is None or workflow_id not in self._dirty:
+            return
+        user_id, polish_id = workflow_id.split(":")
+        # clear the flag first, a change made while writing marks it dirty again
+        self._dirty.discard(workflow_id)
         try:
-            if user_id not in self._lock_pool:
-                self._lock_pool[user_id] = threading.Lock()
-            with self._lock_pool[user_id]:
-                user_workflow_dir = self.workflow_dir / user_id
-                if not user_workflow_dir.exists():
-                    # only create user workflow dir
-                    logger.info(f"path {user_workflow_dir} does not exist when user {user_id} workflow cache initializing, gona to create...")
-                    user_workflow_dir.mkdir(parents=True, exist_ok=True)
-                    return
+            with self._get_lock(user_id):
+                content = self._serialize(workflow)
+                header = workflow_header(workflow)
+            self.storage.save_workflow(user_id, polish_id, content, header)
+        except Exception as e:
+            self._dirty.add(workflow_id)
+            logger.error(f"Error flushing workflow {workflow_id}: {e}")
+            raise
+        with self._flush_lock:
+            if self._evicted.get(workflow_id) is workflow:
+                del self._evicted[workflow_id]
+        self.cache.resize(workflow_id, len(content))
+        logger.debug(f"workflow {workflow_id} flushed")
+
+    def _schedule_flush(self, workflow_id: str) -> Future:
+        """Mark a workflow dirty and queue a coalesced background write, never blocks on I/O."""
+        self._dirty.add(workflow_id)
+        with self._flush_lock:
+            future = self._pending.get(workflow_id)
+            if future is not None:
+                return future
+            try:
+                # the flush thread takes _flush_lock first, so it cannot run before _pending is set
+                future = self._executor.submit(self._flush_workflow, workflow_id)
+                self._pending[workflow_id] = future
+                return future
+            except RuntimeError:
+                pass
+        # executor already shut down (interpreter exit), write inline
+        self._flush_workflow(workflow_id)
+        future = Future()
+        future.set_result(None)
+        return future
+
+    def _evict_workflow(self, workflow_id: str, workflow: dict):
+        if workflow_id in self._dirty:
+            logger.info(f"flushing dirty workflow {workflow_id} on eviction")
+            with self._flush_lock:
+                self._evicted[workflow_id] = workflow
+            self._schedule_flush(workflow_id)
+        elif workflow_id in self._running:
+            # an unfinished launch has no file to reload from
+            with self._flush_lock:
+                self._evicted[workflow_id] = workflow
+
+    def flush(self, workflow_id: str = None, timeout: float = None):
+        """Block until scheduled writes (of one workflow or all of them) are on disk.
+
+        Must not be called while holding a user lock of this cache.
+        """
+        with self._flush_lock:
+            if workflow_id:
+                futures = [self._pending[workflow_id]] if workflow_id in self._pending else []
+            else:
+                futures = list(self._pending.values())
+        wait(futures, timeout=timeout)
 
-                # user workflow dir exists, then load workflow
-                user_workflow_files = user_workflow_dir.glob("*.json")
-                for workflow_file in user_workflow_files:
-                    with open(workflow_file, "r", encoding='utf-8') as f:
-                        workflow = json.load(f)
-                        self.cache[workflow["workflow_id"]] = workflow
+    async def aflush(self, workflow_id: str = None):
+        """Event loop friendly flush, awaits scheduled writes without blocking the loop."""
+        with self._flush_lock:
+            if workflow_id:
+                futures = [self._pending[workflow_id]] if workflow_id in self._pending else []
+            else:
+                futures = list(self._pending.values())
+        if futures:
+            await asyncio.gather(*(asyncio.wrap_future(future) for future in futures), return_exceptions=True)
+
+    def shutdown(self):
+        """Flush every pending write and stop the flush thread."""
+        self.flush()
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        """Hit/miss/eviction counters and memory accounting of the workflow cache."""
+        return {
+            **self.cache.stats(),
+            "dirty": len(self._dirty),
+            "pending_writes": len(self._pending),
+            "queues": len(self.queue),
+        }
+
+    def _get_workflow(self, workflow_id: str) -> dict:
+        """Return the workflow body, reading it from disk on first access or after eviction."""
+        workflow = self.cache.get(workflow_id)
+        if workflow is not None:
+            return workflow
+        with self._flush_lock:
+            workflow = self._evicted.get(workflow_id)
+        if workflow is not None:
+            # evicted but its write has not landed yet, the in-memory body is the newest
+            self.cache[workflow_id] = workflow
+            return workflow
+        user_id, polish_id = workflow_id.split(":")
+        workflow = self.storage.load_workflow(user_id, polish_id)
+        if not workflow:
+            raise Exception(f"Error loading workflow {polish_id} for user {user_id}")
+        self.cache[workflow["workflow_id"]] = workflow
+        return workflow
+
+    def _load_workflow(self, user_id: str, match: str = None) -> List[dict]:
+        try:
+            with self._get_lock(user_id):
+                return self.storage.list_workflow_metas(user_id, match)
         except Exception as e:
             logger.error(f"Error loading workflow: {e}")
             raise e
 
     def init_cache(self, user_id: str, lap: int, mode: str, workflow_id: str, version: int, user_input_messages: list, deep_thinking_mode: bool, search_before_planning: bool, coor_agents: list[str], load_user_workflow: bool = True):
         try:
-            self._load_workflow(user_id)
-            with self._lock_pool[user_id]:
+            with self._get_lock(user_id):
                 if mode == "launch":
-                    self.cache[workflow_id] = WORKFLOW_TEMPLATE.copy()
-                    self.cache[workflow_id]["mode"] = mode
-                    self.cache[workflow_id]["lap"] = lap
-                    self.cache[workflow_id]["workflow_id"] = workflow_id
-                    self.cache[workflow_id]["version"] = version
-                    self.cache[workflow_id]["user_input_messages"] = user_input_messages
-                    self.cache[workflow_id]["deep_thinking_mode"] = deep_thinking_mode
-                    self.cache[workflow_id]["search_before_planning"] = search_before_planning
-                    self.cache[workflow_id]["coor_agents"] = coor_agents
+                    # deepcopy so workflows never share the template graph/nodes containers
+                    workflow = deepcopy(WORKFLOW_TEMPLATE)
+                    workflow["mode"] = mode
+                    workflow["lap"] = lap
+                    workflow["workflow_id"] = workflow_id
+                    workflow["version"] = version
+                    workflow["user_input_messages"] = user_input_messages
+                    workflow["deep_thinking_mode"] = deep_thinking_mode
+                    workflow["search_before_planning"] = search_before_planning
+                    workflow["coor_agents"] = coor_agents
+                    self._running.add(workflow_id)
+                    self.cache[workflow_id] = workflow
                 else:
                     try:
-                        if workflow_id not in self.cache:
-                            #todo: user workflow.json file not exist, how to handle?
-                            user_id, polish_id = workflow_id.split(":")
-                            user_workflow_dir = self.workflow_dir / user_id
-                            user_workflow_file = user_workflow_dir / polish_id
-                            with open(str(user_workflow_file) + '.json', 'r', encoding='utf-8') as f:
-                                workflow = json.load(f)
-                                if workflow:
-                                    self.cache[workflow["workflow_id"]] = workflow
-                                else:
-                                    logger.error(f"Error loading workflow {user_workflow_file} for user {user_id}: {e}")
-                                    raise Exception(f"Error loading workflow {user_workflow_file} for user {user_id}")
+                        #todo: user workflow.json file not exist, how to handle?
+                        workflow = self._get_workflow(workflow_id)
 
                         self.queue[workflow_id] = deque()
-                        for agent in self.cache[workflow_id]["graph"]:
+                        for agent in workflow["graph"]:
                             if agent["config"]["node_type"] == "execution_agent":
                                 self.queue[workflow_id].append(agent)
                         begin_node = {
@@ -109,75 +234,44 @@ class WorkflowCache:
             logger.error(f"Error initializing workflow cache: {e}")
             raise e
     
+    def list_workflow_metas(self, user_id: str, match: str = None) -> List[dict]:
+        """List header fields of the user workflows without loading their bodies."""
+        return self._load_workflow(user_id, match)
+
     def list_workflows(self, user_id: str, match: str = None):
-        self._load_workflow(user_id)
-        user_workflow_dir = self.workflow_dir / user_id
-        user_workflow_files = user_workflow_dir.glob("*.json")
         workflows = []
-        for workflow_file in user_workflow_files:
-            filename = workflow_file.stem
-            if match:
-                if re.match(match, filename):
-                    workflows.append(self.cache[user_id + ":" + filename])
-            else:
-                workflows.append(self.cache[user_id + ":" + filename])
+        for meta in self._load_workflow(user_id, match):
+            workflows.append(self._get_workflow(user_id + ":" + Path(meta["path"]).stem))
         return workflows
             
     def get_latest_polish_id(self, user_id: str):
         if user_id not in self.latest_polish_id or not self.latest_polish_id[user_id]:
-            user_workflow_dir = self.workflow_dir / user_id
-            latest_file = None
-            latest_mtime = 0
-            polish_id_to_set = None
-
-            if user_workflow_dir.exists():
-                workflow_files = list(user_workflow_dir.glob("*.json"))
-                if workflow_files:
-                    for workflow_file in workflow_files:
-                        try:
-                            mtime = os.path.getmtime(workflow_file)
-                            if mtime > latest_mtime:
-                                latest_mtime = mtime
-                                latest_file = workflow_file
-                        except OSError as e:
-                            logger.warning(f"Could not get mtime for {workflow_file}: {e}")
-                    
-                    if latest_file:
-                        polish_id_to_set = latest_file.stem # filename without extension
-                        try:
-                            with open(latest_file, "r", encoding='utf-8') as f:
-                                workflow_data = json.load(f)
-                                workflow_id = user_id + ":" + polish_id_to_set
-                                self.cache[workflow_id] = workflow_data
-                            logger.info(f"Loaded latest polish workflow {polish_id_to_set} for user {user_id} from {latest_file}")
-                        except Exception as e:
-                            logger.error(f"Error loading latest polish workflow {latest_file} for user {user_id}: {e}")
-                            polish_id_to_set = None # Failed to load
-            
-                        with self._lock_pool[user_id]:
-                            self.latest_polish_id[user_id] = polish_id_to_set
+            with self._get_lock(user_id):
+                polish_id_to_set = self.storage.latest_polish_id(user_id)
+                if polish_id_to_set is not None:
+                    self.latest_polish_id[user_id] = polish_id_to_set
             if polish_id_to_set is None:
-                logger.info(f"No suitable polish workflow found for user {user_id} in {user_workflow_dir}")
+                logger.info(f"No suitable polish workflow found for user {user_id}")
 
         return self.latest_polish_id.get(user_id)
         
     def restore_planning_steps(self, workflow_id: str, planning_steps, user_id: str):
         try:
             if user_id not in self._lock_pool:
-                self._lock_pool[user_id] = threading.Lock()
+                self._lock_pool[user_id] = threading.RLock()
             with self._lock_pool[user_id]:
-                self.cache[workflow_id]["planning_steps"] = planning_steps
+                self._get_workflow(workflow_id)["planning_steps"] = planning_steps
         except Exception as e:
             logger.error(f"Error restoring planning steps: {e}")
             with self._lock_pool[user_id]:
-                self.cache[workflow_id]["planning_steps"] = []
+                self._get_workflow(workflow_id)["planning_steps"] = []
 
     def get_planning_steps(self, workflow_id: str):
-        return self.cache[workflow_id].get("planning_steps", [])
+        return self._get_workflow(workflow_id).get("planning_steps", [])
             
     def update_stack(self, workflow_id: str, user_id: str):
         if user_id not in self._lock_pool:
-            self._lock_pool[user_id] = threading.Lock()
+            self._lock_pool[user_id] = threading.RLock()
         with self._lock_pool[user_id]:
             self.queue[workflow_id].popleft()
     
@@ -194,7 +288,7 @@ class WorkflowCache:
     
     def get_lap(self, workflow_id: str):
         try:
-            return self.cache[workflow_id]["lap"]
+            return self._get_workflow(workflow_id)["lap"]
         except Exception as e:
             logger.error(f"Error getting lap: {e}")
 
@@ -203,14 +297,14 @@ class WorkflowCache:
             logger.info(f"restore_system_node node: {node}")
             if isinstance(node, Component):
                 if user_id not in self._lock_pool:
-                    self._lock_pool[user_id] = threading.Lock()
+                    self._lock_pool[user_id] = threading.RLock()
                 with self._lock_pool[user_id]:
-                    if node.name not in self.cache[workflow_id]["nodes"]:
-                        self.cache[workflow_id]["nodes"][node.name] = node.model_dump_json()
-                    for existing_node in self.cache[workflow_id]["graph"]:
+                    if node.name not in self._get_workflow(workflow_id)["nodes"]:
+                        self._get_workflow(workflow_id)["nodes"][node.name] = node.model_dump_json()
+                    for existing_node in self._get_workflow(workflow_id)["graph"]:
                         if existing_node["name"] == node.name:
                             return  # 节点已存在，不添加
-                    self.cache[workflow_id]["graph"].append({
+                    self._get_workflow(workflow_id)["graph"].append({
                         "component_type": node.component_type,
                         "label": node.label,
                         "name": node.name,
@@ -223,9 +317,9 @@ class WorkflowCache:
                     })
             elif isinstance(node, str):
                 _next_to = node
-                if self.cache[workflow_id]["graph"][-1]["config"]["node_type"] == "system_agent":
-                    if not self.cache[workflow_id]["graph"][-1]["config"]["next_to"]:
-                        self.cache[workflow_id]["graph"][-1]["config"]["next_to"].append(_next_to)
+                if self._get_workflow(workflow_id)["graph"][-1]["config"]["node_type"] == "system_agent":
+                    if not self._get_workflow(workflow_id)["graph"][-1]["config"]["next_to"]:
+                        self._get_workflow(workflow_id)["graph"][-1]["config"]["next_to"].append(_next_to)
 
         except Exception as e:
             logger.error(f"Error restore_system_node: {e}")
@@ -237,9 +331,9 @@ class WorkflowCache:
             if isinstance(node, Agent):
                 _agent = node
                 if user_id not in self._lock_pool:
-                    self._lock_pool[user_id] = threading.Lock()
+                    self._lock_pool[user_id] = threading.RLock()
                 with self._lock_pool[user_id]:
-                    if _agent.agent_name not in self.cache[workflow_id]["nodes"]:
+                    if _agent.agent_name not in self._get_workflow(workflow_id)["nodes"]:
                         tools = []
                         for tool in _agent.selected_tools:
                             tools.append({
@@ -251,7 +345,7 @@ class WorkflowCache:
                                     "description": tool.description,
                                 }
                             })
-                        self.cache[workflow_id]["nodes"][_agent.agent_name] = {
+                        self._get_workflow(workflow_id)["nodes"][_agent.agent_name] = {
                             "component_type": "agent",
                             "label": _agent.agent_name,
                             "name": _agent.agent_name,
@@ -262,7 +356,7 @@ class WorkflowCache:
                                 "prompt": _agent.prompt
                             }
                         }
-                    self.cache[workflow_id]["graph"].append({
+                    self._get_workflow(workflow_id)["graph"].append({
                         "component_type": "agent",
                         "label": _agent.agent_name,
                         "name": _agent.agent_name,
@@ -279,10 +373,10 @@ class WorkflowCache:
                 _next_to = node
                 if _next_to == "__end__" :
                     return
-                if self.cache[workflow_id]["graph"][-1]["config"]["node_type"] == "execution_agent":
+                if self._get_workflow(workflow_id)["graph"][-1]["config"]["node_type"] == "execution_agent":
                     with self._lock_pool[user_id]:
-                        if not self.cache[workflow_id]["graph"][-1]["config"]["next_to"]:
-                            self.cache[workflow_id]["graph"][-1]["config"]["next_to"].append(_next_to)
+                        if not self._get_workflow(workflow_id)["graph"][-1]["config"]["next_to"]:
+                            self._get_workflow(workflow_id)["graph"][-1]["config"]["next_to"].append(_next_to)
         except Exception as e:
             logger.error(f"Error restore_node: {e}")
 
@@ -291,62 +385,69 @@ class WorkflowCache:
 
     def save_planning_steps(self, workflow_id, planning_steps):
         try:
-            workflow = self.cache[workflow_id]
+            workflow = self._get_workflow(workflow_id)
             user_id, polish_id = workflow["workflow_id"].split(":")
-            workflow_path = self.workflow_dir / user_id / f"{polish_id}.json"
 
             if user_id not in self._lock_pool:
-                self._lock_pool[user_id] = threading.Lock()
+                self._lock_pool[user_id] = threading.RLock()
             with self._lock_pool[user_id]:
-                self.cache[workflow_id]["planning_steps"] = json.dumps(planning_steps, ensure_ascii=False)
-                workflow = self.cache[workflow_id]
-
-                with open(workflow_path, "w", encoding='utf-8') as f:
-                    f.write(json.dumps(workflow, indent=2, ensure_ascii=False))
+                workflow["planning_steps"] = json.dumps(planning_steps, ensure_ascii=False)
+            self._schedule_flush(workflow_id)
         except Exception as e:
             logger.error(f"Error dumping workflow: {e}")
     def save_workflow(self, workflow):
         try:
 
             user_id, polish_id = workflow["workflow_id"].split(":")
-            workflow_path = self.workflow_dir / user_id / f"{polish_id}.json"
 
             if user_id not in self._lock_pool:
-                self._lock_pool[user_id] = threading.Lock()
+                self._lock_pool[user_id] = threading.RLock()
             with self._lock_pool[user_id]:
-                with open(workflow_path, "w", encoding='utf-8') as f:
-                    f.write(json.dumps(workflow, indent=2, ensure_ascii=False))
+                self.cache[workflow["workflow_id"]] = workflow
+            self._schedule_flush(workflow["workflow_id"])
         except Exception as e:
             logger.error(f"Error dumping workflow: {e}")
         logger.info(f"workflow {workflow["workflow_id"]} saved.")
     def dump(self, workflow_id: str, mode: str):
         try:
-            workflow = self.cache[workflow_id]
+            workflow = self._get_workflow(workflow_id)
             user_id, polish_id = workflow["workflow_id"].split(":")
             if user_id not in self._lock_pool:
-                self._lock_pool[user_id] = threading.Lock()
+                self._lock_pool[user_id] = threading.RLock()
             with self._lock_pool[user_id]:
                 if mode == "launch":
-                    workflow = self.cache[workflow_id]
-                    user_id, polish_id = workflow["workflow_id"].split(":")
-                    workflow_path = self.workflow_dir / user_id / f"{polish_id}.json"
-                    with open(workflow_path, "w", encoding='utf-8') as f:
-                        f.write(json.dumps(workflow, indent=2, ensure_ascii=False))
                     self.latest_polish_id[user_id] = polish_id
                 elif mode == "production":
-                    self.queue[workflow_id] = []
+                    # the step queue is only needed while the workflow runs
+                    self.queue.pop(workflow_id, None)
+            if mode == "launch":
+                self._running.discard(workflow_id)
+                self._schedule_flush(workflow_id)
         except Exception as e:
             logger.error(f"Error dumping workflow: {e}")
             
+    def release(self, workflow_id: str):
+        """Drop per-run state of a workflow that ended without being dumped.
+
+        A launch that failed is forgotten rather than persisted.
+        """
+        self.queue.pop(workflow_id, None)
+        if workflow_id in self._running:
+            self._running.discard(workflow_id)
+            self._dirty.discard(workflow_id)
+            self.cache.pop(workflow_id, None)
+            with self._flush_lock:
+                self._evicted.pop(workflow_id, None)
+
     def get_editable_agents(self, workflow_id: str) -> List[Agent]:
         try:
             agents = []
-            for node in self.cache[workflow_id]["graph"]:
+            for node in self._get_workflow(workflow_id)["graph"]:
                 if node["config"]["node_type"] == "execution_agent":
-                    agent_path = agents_dir / f"{node["config"]["node_name"]}.json"
-                    with open(agent_path, "r") as f:
-                        json_str = f.read()
-                        _agent = Agent.model_validate_json(json_str)
+                    json_str = self.storage.load_agent(node["config"]["node_name"])
+                    if json_str is None:
+                        raise FileNotFoundError(f"agent {node["config"]["node_name"]} not found.")
+                    _agent = Agent.model_validate_json(json_str)
                     agents.append(_agent)
             return agents
         except Exception as e:
@@ -355,6 +456,5 @@ class WorkflowCache:
          
         
         
-from config.global_variables import workflows_dir
-
-workflow_cache = WorkflowCache(workflow_dir=workflows_dir)
+workflow_cache = WorkflowCache(storage=get_storage())
+atexit.register(workflow_cache.shutdown)
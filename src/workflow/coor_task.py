@@ -11,8 +11,9 @@ from src.tools.search import tavily_tool
 from src.interface.agent import State, Router
 from src.manager import agent_manager
 from src.prompts.template import apply_prompt
-from langgraph.prebuilt import create_react_agent
 from src.workflow.graph import AgentWorkflow
+from src.workflow.agent_cache import compiled_agent_cache, agent_config
+from src.workflow.streaming import astream_agent, astream_content
 from src.service.env import MAX_STEPS
 from src.workflow.cache import workflow_cache as cache
 from src.utils.content_process import clean_response_tags
@@ -33,7 +34,7 @@ async def agent_factory_node(state: State) -> Command[Literal["publisher", "__en
         cache.restore_system_node(state["workflow_id"], AGENT_FACTORY, state["user_id"])
         messages = apply_prompt_template("agent_factory", state)
         agent_spec = await (
-            get_llm_by_type(AGENT_LLM_MAP["agent_factory"])
+            get_llm_by_type(AGENT_LLM_MAP["agent_factory"], node="agent_factory")
             .with_structured_output(AgentBuilder)
             .ainvoke(messages)
         )
@@ -85,7 +86,7 @@ async def publisher_node(
         cache.restore_system_node(state["workflow_id"], PUBLISHER, state["user_id"])
         messages = apply_prompt_template("publisher", state)
         response = await (
-            get_llm_by_type(AGENT_LLM_MAP["publisher"])
+            get_llm_by_type(AGENT_LLM_MAP["publisher"], node="publisher")
             .with_structured_output(Router)
             .ainvoke(messages)
         )
@@ -150,21 +151,21 @@ async def agent_proxy_node(state: State) -> Command[Literal["publisher", "__end_
     _agent = agent_manager.available_agents[state["next"]]
     state["initialized"] = True
 
-    agent = create_react_agent(
-        get_llm_by_type(_agent.llm_type),
-        tools=[
-            agent_manager.available_tools[tool.name] for tool in _agent.selected_tools
-        ],
-        prompt=apply_prompt(state, _agent.prompt),
+    agent = compiled_agent_cache.get(
+        _agent,
+        [agent_manager.available_tools[tool.name] for tool in _agent.selected_tools],
     )
 
-    # Create config with user_id for tool notifications
-    config = {
-        "configurable": {"user_id": state.get("user_id")},
-        "recursion_limit": int(MAX_STEPS),
-    }
+    # Create config with user_id for tool notifications, the workflow_id scopes tool sessions
+    config = agent_config(
+        apply_prompt(state, _agent.prompt),
+        {
+            "configurable": {"user_id": state.get("user_id"), "workflow_id": state.get("workflow_id")},
+            "recursion_limit": int(MAX_STEPS),
+        },
+    )
 
-    response = await agent.ainvoke(state, config=config)
+    response = await astream_agent(agent, state, config, _agent.agent_name)
 
     if state["workflow_mode"] == "launch":
         cache.restore_node(
@@ -203,7 +204,7 @@ async def planner_node(state: State) -> Command[Literal["publisher", "__end__"]]
             llm = get_llm_by_type("reasoning")
         if state.get("search_before_planning"):
             config = {"configurable": {"user_id": state.get("user_id")}}
-            searched_content = tavily_tool.invoke(
+            searched_content = await tavily_tool.ainvoke(
                 {
                     "query": [
                         "".join(message["content"])
@@ -218,10 +219,7 @@ async def planner_node(state: State) -> Command[Literal["publisher", "__end__"]]
                 f"\n\n# Relative Search Results\n\n{json.dumps([{'titile': elem['title'], 'content': elem['content']} for elem in searched_content], ensure_ascii=False)}"
             )
         cache.restore_system_node(state["workflow_id"], PLANNER, state["user_id"])
-        response = llm.stream(messages)
-        for chunk in response:
-            if chunk.content:
-                content += chunk.content  # type: ignore
+        content = await astream_content(llm, messages, "planner")
         content = clean_response_tags(content)
     elif state["workflow_mode"] == "production":
         # watch out the json style
@@ -240,7 +238,7 @@ async def planner_node(state: State) -> Command[Literal["publisher", "__end__"]]
             llm = get_llm_by_type("reasoning")
         if state.get("search_before_planning"):
             config = {"configurable": {"user_id": state.get("user_id")}}
-            searched_content = tavily_tool.invoke(
+            searched_content = await tavily_tool.ainvoke(
                 {
                     "query": [
                         "".join(message["content"])
@@ -255,8 +253,8 @@ async def planner_node(state: State) -> Command[Literal["publisher", "__end__"]]
                 f"\n\n# Relative Search Results\n\n{json.dumps([{'titile': elem['title'], 'content': elem['content']} for elem in searched_content], ensure_ascii=False)}"
             )
 
-        response = await llm.ainvoke(messages)
-        content = clean_response_tags(response.content)  # type: ignore
+        content = await astream_content(llm, messages, "planner")
+        content = clean_response_tags(content)
     # steps need to be stored in cache
     if state["workflow_mode"] in ["launch", "polish"]:
         try:
@@ -285,11 +283,14 @@ async def coordinator_node(state: State) -> Command[Literal["planner", "__end__"
     content = ""
 
     messages = apply_prompt_template("coordinator", state)
-    response = await get_llm_by_type(AGENT_LLM_MAP["coordinator"]).ainvoke(messages)
+    # a handover is routing, not an answer, it is never streamed to the user
+    content = await astream_content(
+        get_llm_by_type(AGENT_LLM_MAP["coordinator"], node="coordinator"), messages, "coordinator", hold_prefix="handover"
+    )
     if state["workflow_mode"] == "launch":
         cache.restore_system_node(state["workflow_id"], COORDINATOR, state["user_id"])
 
-    content = clean_response_tags(response.content)  # type: ignore
+    content = clean_response_tags(content)
     if "handover_to_planner" in content:
         goto = "planner"
     if state["workflow_mode"] == "launch":
@@ -2,11 +2,9 @@ from typing import Dict, Callable, List, Optional
 from src.interface.agent import State
 from langgraph.types import Command
 from src.manager import agent_manager
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from src.manager.mcp import mcp_client_config
 from src.llm.llm import get_llm_by_type
 from langchain_core.prompts import ChatPromptTemplate
-from langgraph.prebuilt import create_react_agent
+from src.workflow.agent_cache import compiled_agent_cache, agent_config
 from src.prompts.template import apply_prompt
 from src.workflow.graph import AgentWorkflow
 from src.workflow.coor_task import coordinator_node, planner_node, publisher_node, agent_factory_node, agent_proxy_node
@@ -46,17 +44,14 @@ class DynamicWorkflow:
                     prompt=node["agent"]["prompt"],
                     description=node["agent"]["description"])
                     _agent = agent_manager.available_agents[node["agent"]["agent_name"]]
-            async with MultiServerMCPClient(mcp_client_config()) as client:
-                mcp_tools = client.get_tools()
-                for _tool in mcp_tools:
-                    agent_manager.available_tools[_tool.name] = _tool
-                agent = create_react_agent(
-                    get_llm_by_type(_agent.llm_type),
-                    tools=[agent_manager.available_tools[tool.name] for tool in _agent.selected_tools],
-                    prompt=apply_prompt(state, _agent.prompt),
-                )
+            # MCP tools are published by agent_manager.load_mcp_tools, not per run
+            await agent_manager.wait_for_tools()
+            agent = compiled_agent_cache.get(
+                _agent,
+                [agent_manager.available_tools[tool.name] for tool in _agent.selected_tools],
+            )
 
-                response = await agent.ainvoke(state)
+            response = await agent.ainvoke(state, config=agent_config(apply_prompt(state, _agent.prompt)))
             
             next = "publisher"
             proposed_next = node["next_to"]
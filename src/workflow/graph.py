@@ -2,8 +2,6 @@ from typing import Dict, Callable, List, Optional
 from src.interface.agent import State
 from langgraph.types import Command
 from src.manager import agent_manager
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from src.manager.mcp import mcp_client_config
 from src.llm.llm import get_llm_by_type
 from langchain_core.prompts import ChatPromptTemplate
 from langgraph.prebuilt import create_react_agent
@@ -24,10 +24,10 @@ async def polish_agent(_agent: Agent, part_to_edit: str, instruction=None, tools
                 )
             instruction = f"I have selected a new set of tools:{TOOLS_DESCRIPTION}. Please rewrite the prompt according to the new tool list, and it must include all tools"
             messages = apply_polish_template(_agent, instruction)
-        response = (
+        response = await (
             get_llm_by_type(AGENT_LLM_MAP["polisher"])
             .with_structured_output(PromptBuilder)
-            .invoke(messages)
+            .ainvoke(messages)
         )
         return response
     else:
@@ -11,6 +11,10 @@ from src.interface.agent import State
 from src.service.env import USE_BROWSER
 from src.workflow.cache import workflow_cache as cache
 from src.workflow.graph import CompiledWorkflow
+from src.workflow.scheduler import build_step_dag, load_plan_steps, run_dag
+from src.workflow.streaming import TokenStream, message_event, token_sink
+from src.utils.loop_monitor import loop_monitor
+from src.llm.limiter import llm_user
 from src.interface.agent import WorkMode
 
 logging.basicConfig(
@@ -111,34 +115,19 @@ async def run_agent_workflow(
         enable_debug_logging()
 
     logger.info(f"Starting workflow with user input: {user_input_messages}")
+    # LLM requests of this workflow wait in the user's queue
+    llm_user.set(user_id)
 
-    TEAM_MEMBERS_DESCRIPTION_TEMPLATE = """
-    - **`{agent_name}`**: {agent_description}
-    """
-    TOOLS_DESCRIPTION_TEMPLATE = """
-    - **`{tool_name}`**: {tool_description}
-    """
-    TOOLS_DESCRIPTION = """
-    """
-    TEAM_MEMBERS_DESCRIPTION = DEFAULT_TEAM_MEMBERS_DESCRIPTION
-    TEAM_MEMBERS = ["agent_factory"]
-    for agent in agent_manager.available_agents.values():
-        if agent.user_id == "share":
-            TEAM_MEMBERS.append(agent.agent_name)
-
-        if agent.user_id == user_id or agent.agent_name in coor_agents:
-            TEAM_MEMBERS.append(agent.agent_name)
-
-        if agent.user_id != "share":
-            MEMBER_DESCRIPTION = TEAM_MEMBERS_DESCRIPTION_TEMPLATE.format(
-                agent_name=agent.agent_name, agent_description=agent.description
-            )
-            TEAM_MEMBERS_DESCRIPTION += "\n" + MEMBER_DESCRIPTION
-
-    for tool_name, tool in agent_manager.available_tools.items():
-        TOOLS_DESCRIPTION += "\n" + TOOLS_DESCRIPTION_TEMPLATE.format(
-            tool_name=tool_name, tool_description=tool.description
-        )
+    loop_monitor.watch()
+    await agent_manager.ensure_ready()
+    if not await agent_manager.wait_for_tools():
+        logger.warning("MCP tool discovery is still running, starting workflow without MCP tools")
+
+    # rendered when agents and tools change, not per workflow, and narrowed to the request
+    TEAM_MEMBERS, MEMBERS_DESCRIPTION, TOOLS_DESCRIPTION = agent_manager.team_descriptors(
+        user_id, coor_agents, user_input_messages[-1]["content"]
+    )
+    TEAM_MEMBERS_DESCRIPTION = DEFAULT_TEAM_MEMBERS_DESCRIPTION + MEMBERS_DESCRIPTION
 
     global coordinator_cache
     coordinator_cache = []
@@ -165,11 +154,126 @@ async def run_agent_workflow(
         yield event_data
 
 
+def _message_events(workflow_id: str, agent_name: str, content: str) -> list[dict[str, Any]]:
+    """Message of a node that did not stream its tokens, sent as a single delta."""
+    return [message_event(workflow_id, agent_name, content)] if content else []
+
+
+def _plan_dag(workflow_id: str):
+    """Agent runs of a production workflow and their dependencies, None to run them one by one."""
+    agent_names = [
+        node["config"]["node_name"]
+        for node in cache.queue.get(workflow_id, [])
+        if node["name"] != "begin_node"
+    ]
+    if len(agent_names) < 2:
+        return None
+    dependencies = build_step_dag(
+        load_plan_steps(cache.get_planning_steps(workflow_id)), agent_names
+    )
+    if dependencies is None or all(deps == list(range(i)) for i, deps in enumerate(dependencies)):
+        return None
+    return agent_names, dependencies
+
+
+async def _run_plan_dag(
+    workflow: CompiledWorkflow,
+    state: State,
+    agent_names: list[str],
+    dependencies: list[list[int]],
+) -> AsyncGenerator[dict[str, Any], None]:
+    """Run independent plan steps concurrently.
+
+    Every step sees the messages the workflow had before the plan started plus
+    the output of its (transitive) dependencies in plan order. Updates are merged
+    into `state` in plan order once all steps finished, so the result does not
+    depend on which step completed first.
+
+    Each step buffers its events, and the buffers are sent one after the other
+    in plan order: the first unfinished step streams live while the steps after
+    it run, and their events follow as one block each once it ended.
+
+    Every agent_proxy run pops one entry off the workflow's step queue through
+    `cache.update_stack`, in whatever order the steps finish. The queue only has
+    to shrink by one entry per step, which is checked once all of them ran, so
+    the publisher then finds the last agent of the plan at its head.
+    """
+    workflow_id = state["workflow_id"]
+    expected_queue = len(cache.queue[workflow_id]) - len(agent_names)
+    node_func = workflow.nodes["agent_proxy"]
+    base_messages = list(state["messages"])
+    ancestors = []
+    for deps in dependencies:
+        ancestors.append(sorted(set(deps).union(*(ancestors[dep] for dep in deps))))
+    updates = [None] * len(agent_names)
+    buffers = [asyncio.Queue() for _ in agent_names]
+
+    async def run_step(index: int, deps: list[int]):
+        agent_name = agent_names[index]
+        events = buffers[index]
+        events.put_nowait({
+            "event": "start_of_agent",
+            "data": {"agent_name": agent_name, "agent_id": f"{workflow_id}_{agent_name}_1"},
+        })
+        step_state = State(**state)
+        step_state["messages"] = base_messages + [
+            message for dep in ancestors[index] for message in updates[dep].get("messages", [])
+        ]
+        step_state["next"] = agent_name
+        stream = TokenStream(workflow_id, events)
+        # names the node in blocking reports of the loop monitor
+        asyncio.current_task().set_name(f"{workflow_id}:{agent_name}")
+        with token_sink(stream):
+            command = await node_func(step_state)
+        updates[index] = command.update or {}
+        if not stream.streamed:
+            for message in updates[index].get("messages", [])[-1:]:
+                for event in _message_events(workflow_id, agent_name, message.get("content", "")):
+                    events.put_nowait(event)
+        events.put_nowait({
+            "event": "end_of_agent",
+            "data": {"agent_name": agent_name, "agent_id": f"{workflow_id}_{agent_name}_1"},
+        })
+        events.put_nowait(None)
+
+    runner = asyncio.create_task(run_dag(dependencies, run_step))
+
+    async def next_event(events: asyncio.Queue):
+        get = asyncio.ensure_future(events.get())
+        await asyncio.wait({get, runner}, return_when=asyncio.FIRST_COMPLETED)
+        if get.done():
+            return get.result()
+        get.cancel()
+        # the steps all ended, or one of them failed
+        runner.result()
+        return events.get_nowait()
+
+    try:
+        for events in buffers:
+            while (event := await next_event(events)) is not None:
+                yield event
+        await runner
+    finally:
+        runner.cancel()
+
+    if len(cache.queue[workflow_id]) != expected_queue:
+        raise RuntimeError(
+            f"plan of workflow {workflow_id} left {len(cache.queue[workflow_id])} queued steps, expected {expected_queue}"
+        )
+    for update in updates:
+        for key, value in update.items():
+            if key == "messages":
+                state["messages"] += value
+            else:
+                state[key] = value
+
+
 async def _process_workflow(
     workflow: CompiledWorkflow, initial_state: dict[str, Any]
 ) -> AsyncGenerator[dict[str, Any], None]:
     """处理自定义工作流的事件流"""
     current_node = None
+    plan_scheduled = False
 
     workflow_id = initial_state["workflow_id"]
     yield {
@@ -182,6 +286,18 @@ async def _process_workflow(
         state = State(**initial_state)
 
         while current_node != "__end__":
+            if (
+                current_node == "publisher"
+                and state["workflow_mode"] == "production"
+                and not plan_scheduled
+            ):
+                plan_scheduled = True
+                plan = _plan_dag(workflow_id)
+                if plan:
+                    logger.info(f"Running {len(plan[0])} plan steps as a dependency graph")
+                    async for event in _run_plan_dag(workflow, state, *plan):
+                        yield event
+
             agent_name = current_node
             logger.info(f"Started node: {agent_name}")
 
@@ -193,7 +309,11 @@ async def _process_workflow(
                 },
             }
             node_func = workflow.nodes[current_node]
-            command = await node_func(state)
+            # token deltas are forwarded while the node runs
+            stream = TokenStream(workflow_id)
+            async for event in stream.run(node_func(state), name=f"{workflow_id}:{agent_name}"):
+                yield event
+            command = stream.result
 
             if hasattr(command, "update") and command.update:
                 for key, value in command.update.items():
@@ -216,21 +336,11 @@ async def _process_workflow(
                                     continue
                             if agent_name in ["planner", "coordinator", "agent_proxy"]:
                                 content = last_message["content"]
-                                chunk_size = 10  # send 10 words for each chunk
-                                for i in range(0, len(content), chunk_size):
-                                    chunk = content[i : i + chunk_size]
-                                    if "processing_agent_name" in state:
-                                        agent_name = state["processing_agent_name"]
-
-                                    yield {
-                                        "event": "messages",
-                                        "agent_name": agent_name,
-                                        "data": {
-                                            "message_id": f"{workflow_id}_{agent_name}_msg_{i}",
-                                            "delta": {"content": chunk},
-                                        },
-                                    }
-                                    await asyncio.sleep(0.01)
+                                if content and "processing_agent_name" in state:
+                                    agent_name = state["processing_agent_name"]
+                                if not stream.streamed:
+                                    for event in _message_events(workflow_id, agent_name, content):
+                                        yield event
 
                     if agent_name == "agent_factory" and key == "new_agent_name":
                         yield {
@@ -268,6 +378,7 @@ async def _process_workflow(
 
         traceback.print_exc()
         logger.error("Error in Agent workflow: %s", str(e))
+        cache.release(workflow_id)
         yield {
             "event": "error",
             "data": {
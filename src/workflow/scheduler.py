@@ -0,0 +1,101 @@
+import json
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.service.env import PLAN_MAX_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+
+def load_plan_steps(planning_steps) -> list:
+    """Planning steps are stored as a list by the planner and as a json `{"steps": [...]}` by edits."""
+    if isinstance(planning_steps, str):
+        try:
+            planning_steps = json.loads(planning_steps)
+        except json.JSONDecodeError:
+            return []
+    if isinstance(planning_steps, dict):
+        planning_steps = planning_steps.get("steps", [])
+    return planning_steps if isinstance(planning_steps, list) else []
+
+
+def build_step_dag(steps: list, agent_names: List[str]) -> Optional[List[List[int]]]:
+    """Dependencies between the agent runs of a production workflow.
+
+    `agent_names` are the execution agents in queue order. Each is paired with
+    the next plan step of the same agent; the step's `depends_on` lists indexes of
+    earlier steps, a step without it depends on every earlier step. Steps that do
+    not run in production (agent_factory) are replaced by their own dependencies.
+
+    Returns, for every agent run, the indexes of the runs it waits for, or None
+    when the plan has no dependency metadata or does not match the queue.
+    """
+    if not any(isinstance(step, dict) and "depends_on" in step for step in steps):
+        return None
+
+    step_of_run = []
+    next_step = 0
+    for agent_name in agent_names:
+        while next_step < len(steps) and steps[next_step].get("agent_name") != agent_name:
+            next_step += 1
+        if next_step == len(steps):
+            logger.warning(f"agent {agent_name} has no matching plan step, running the plan sequentially")
+            return None
+        step_of_run.append(next_step)
+        next_step += 1
+    run_of_step = {step: run for run, step in enumerate(step_of_run)}
+
+    def step_deps(index: int) -> set:
+        depends_on = steps[index].get("depends_on")
+        if depends_on is None:
+            return set(range(index))
+        # only earlier steps, a forward or self reference would deadlock
+        return {dep for dep in depends_on if isinstance(dep, int) and 0 <= dep < index}
+
+    resolved: Dict[int, set] = {}
+
+    def run_deps(index: int) -> set:
+        if index not in resolved:
+            deps = set()
+            for dep in step_deps(index):
+                if dep in run_of_step:
+                    deps.add(run_of_step[dep])
+                else:
+                    deps |= run_deps(dep)
+            resolved[index] = deps
+        return resolved[index]
+
+    return [sorted(run_deps(step)) for step in step_of_run]
+
+
+async def run_dag(
+    dependencies: List[List[int]],
+    run: Callable[[int, List[int]], Awaitable[Any]],
+    max_concurrency: int = PLAN_MAX_CONCURRENCY,
+) -> List[Any]:
+    """Run `run(index, dependencies)` for every node once its dependencies finished.
+
+    At most `max_concurrency` nodes run at a time. Results are returned in node
+    order, independent of completion order. The first failure cancels the rest.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    done = [asyncio.Event() for _ in dependencies]
+    results: List[Any] = [None] * len(dependencies)
+
+    async def _run(index: int):
+        for dep in dependencies[index]:
+            await done[dep].wait()
+        async with semaphore:
+            results[index] = await run(index, dependencies[index])
+        done[index].set()
+
+    tasks = [asyncio.create_task(_run(index)) for index in range(len(dependencies))]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return results
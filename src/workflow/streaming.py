@@ -0,0 +1,181 @@
+import asyncio
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, Callable, Optional
+
+from src.utils.content_process import ResponseTagStream
+
+logger = logging.getLogger(__name__)
+
+# receives (agent_name, delta) for every token produced by the node running in this context
+_token_sink: ContextVar[Optional[Callable[[str, str], None]]] = ContextVar("token_sink", default=None)
+
+
+def message_event(workflow_id: str, agent_name: str, content: str, offset: int = 0) -> dict[str, Any]:
+    return {
+        "event": "messages",
+        "agent_name": agent_name,
+        "data": {
+            "message_id": f"{workflow_id}_{agent_name}_msg_{offset}",
+            "delta": {"content": content},
+        },
+    }
+
+
+def tool_output_event(workflow_id: str, tool_name: str, stream: str, content: str) -> dict[str, Any]:
+    return {
+        "event": "tool_output",
+        "data": {
+            "workflow_id": workflow_id,
+            "tool_name": tool_name,
+            "stream": stream,
+            "content": content,
+        },
+    }
+
+
+def emit_tool_output(tool_name: str, stream: str, content: str):
+    """Forward output of a running tool, such as bash stdout, to the event stream of the node."""
+    sink = _token_sink.get()
+    if isinstance(sink, TokenStream) and content:
+        sink.tool_output(tool_name, stream, content)
+
+
+def emit_token(agent_name: str, content: str):
+    sink = _token_sink.get()
+    if sink is not None and content:
+        sink(agent_name, content)
+
+
+@contextmanager
+def token_sink(callback: Callable[[str, str], None]):
+    token = _token_sink.set(callback)
+    try:
+        yield
+    finally:
+        _token_sink.reset(token)
+
+
+class TokenStream:
+    """Turns the tokens a node emits into message events while the node runs."""
+
+    def __init__(self, workflow_id: str, queue: asyncio.Queue = None):
+        self.workflow_id = workflow_id
+        self.queue = queue if queue is not None else asyncio.Queue()
+        self.offsets: dict[str, int] = {}
+        self.result = None
+
+    @property
+    def streamed(self) -> bool:
+        return bool(self.offsets)
+
+    def __call__(self, agent_name: str, content: str):
+        offset = self.offsets.get(agent_name, 0)
+        self.offsets[agent_name] = offset + len(content)
+        self.queue.put_nowait(message_event(self.workflow_id, agent_name, content, offset))
+
+    def tool_output(self, tool_name: str, stream: str, content: str):
+        self.queue.put_nowait(tool_output_event(self.workflow_id, tool_name, stream, content))
+
+    async def run(self, coro, name: str = None) -> AsyncGenerator[dict[str, Any], None]:
+        """Run `coro` with this stream as token sink and yield its events, the return value ends up in `result`."""
+        with token_sink(self):
+            # the task copies the current context, and with it the sink
+            task = asyncio.ensure_future(coro)
+        if name:
+            task.set_name(name)
+        try:
+            while True:
+                get = asyncio.ensure_future(self.queue.get())
+                done, _ = await asyncio.wait({task, get}, return_when=asyncio.FIRST_COMPLETED)
+                if get in done:
+                    yield get.result()
+                    continue
+                get.cancel()
+                break
+            while not self.queue.empty():
+                yield self.queue.get_nowait()
+            self.result = task.result()
+        finally:
+            if not task.done():
+                task.cancel()
+
+
+def _text(content) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return ""
+
+
+async def astream_content(llm, messages, agent_name: str, hold_prefix: str = None) -> str:
+    """Stream a completion to the token sink and return the full raw content.
+
+    Output starting with `hold_prefix` (a control answer such as a handover) is never shown.
+    """
+    content = ""
+    cleaner = ResponseTagStream()
+    decided = hold_prefix is None
+    suppressed = False
+    held = ""
+
+    def show(text: str):
+        nonlocal decided, suppressed, held
+        if decided:
+            if not suppressed:
+                emit_token(agent_name, text)
+            return
+        held += text
+        if held.startswith(hold_prefix):
+            decided, suppressed, held = True, True, ""
+        elif not hold_prefix.startswith(held):
+            decided = True
+            emit_token(agent_name, held)
+            held = ""
+
+    async for chunk in llm.astream(messages):
+        delta = _text(chunk.content)
+        if delta:
+            content += delta
+            show(cleaner.feed(delta))
+    show(cleaner.finish())
+    if held:
+        # a short answer that never got past the prefix
+        emit_token(agent_name, held)
+    return content
+
+
+async def astream_agent(agent, state, config: dict, agent_name: str) -> dict:
+    """Run a compiled ReAct agent with astream_events, forwarding model tokens, return its final state.
+
+    Model turns that call tools are not forwarded, from their first tool call chunk on.
+    """
+    response = None
+    cleaners: dict[str, ResponseTagStream] = {}
+    tool_turns = set()
+    async for event in agent.astream_events(state, config=config, version="v2"):
+        kind = event["event"]
+        if kind == "on_chat_model_stream":
+            run_id = event["run_id"]
+            chunk = event["data"]["chunk"]
+            if getattr(chunk, "tool_call_chunks", None):
+                tool_turns.add(run_id)
+                cleaners.pop(run_id, None)
+            if run_id in tool_turns:
+                continue
+            delta = _text(chunk.content)
+            if delta:
+                cleaner = cleaners.setdefault(run_id, ResponseTagStream())
+                emit_token(agent_name, cleaner.feed(delta))
+        elif kind == "on_chat_model_end":
+            tool_turns.discard(event["run_id"])
+            cleaner = cleaners.pop(event["run_id"], None)
+            if cleaner is not None:
+                emit_token(agent_name, cleaner.finish())
+        elif kind == "on_chain_end" and not event.get("parent_ids"):
+            response = event["data"]["output"]
+    if response is None:
+        raise RuntimeError(f"agent {agent_name} finished without output")
+    return response
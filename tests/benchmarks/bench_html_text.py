@@ -0,0 +1,96 @@
+"""Benchmark of the browser tool's html to text extraction on large pages.
+
+Compares src.utils.html_text.extract_text with the multi-pass regex
+extraction BrowserTool used before, on generated pages of a few MB with one
+article between navigation and link lists. "scripts" pages carry most of
+their weight in inline scripts and styles like most large pages do, "dense"
+pages are nothing but small elements, the worst case of the single pass
+extractor. Reports the time per page and whether the end of the article
+survives the 8000 character budget.
+
+    python -m tests.benchmarks.bench_html_text [page_mb ...]
+"""
+import re
+import sys
+import time
+import random
+
+from src.utils.html_text import extract_text
+
+MAX_CHARS = 8000
+ARTICLE_END = "This closing sentence marks the end of the article."
+
+
+def legacy_extract_text(html_content: str) -> str:
+    """BrowserTool._extract_text_from_html before the single pass extractor."""
+    text = re.sub(r'<script[^>]*>.*?</script>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
+    text = re.sub(r'<style[^>]*>.*?</style>', '', text, flags=re.DOTALL | re.IGNORECASE)
+    text = re.sub(r'<[^>]+>', '', text)
+    text = text.replace('&nbsp;', ' ')
+    text = text.replace('&lt;', '<')
+    text = text.replace('&gt;', '>')
+    text = text.replace('&amp;', '&')
+    text = text.replace('&quot;', '"')
+    text = text.replace('&#39;', "'")
+    text = re.sub(r'\s+', ' ', text)
+    text = text.strip()
+    if len(text) > MAX_CHARS:
+        text = text[:MAX_CHARS] + "..."
+    return text
+
+
+def make_page(size_mb: float, kind: str = "scripts", seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words = "market growth revenue analysis quarter model data report value index signal trend".split()
+
+    def sentence():
+        return " ".join(rng.choice(words) for _ in range(rng.randint(8, 20))).capitalize() + "."
+
+    nav = "<nav><ul>" + "".join(f'<li><a href="/s/{i}">Section {i}</a></li>' for i in range(200)) + "</ul></nav>"
+    menu = "<div class='menu'>" + "".join(f'<a href="/t/{i}">Topic &amp; tag {i}</a> ' for i in range(300)) + "</div>"
+    article = "<article><h1>Quarterly report</h1>" + "".join(
+        f"<h2>Part {i}</h2><p>{' '.join(sentence() for _ in range(6))} &ldquo;quoted&rdquo; &#8212; &euro;{i}</p>"
+        for i in range(25)
+    ) + f"<p>{ARTICLE_END}</p></article>"
+    footer = "<footer>" + "".join(f'<a href="/f/{i}">Footer link {i}</a>' for i in range(200)) + "</footer>"
+    if kind == "dense":
+        chunk = "".join(f'<div class="row"><span>{rng.choice(words)}</span> <a href="/r/{i}">{i}</a></div>' for i in range(500))
+    else:
+        chunk = "<script>var data = " + "[" + ",".join(str(rng.random()) for _ in range(5000)) + "];</script>"
+    style = "<style>" + "".join(f".c{i} {{ color: #{i % 4096:03x}; }}" for i in range(2000)) + "</style>"
+    head = f"<html><head><title>Report &amp; analysis</title>{style}</head><body>{nav}{menu}"
+    tail = f"{article}{footer}</body></html>"
+    scripts = []
+    size = len(head) + len(tail)
+    while size < size_mb * 1024 * 1024:
+        scripts.append(chunk)
+        size += len(chunk)
+    # half of the script payload before the content, half after it
+    middle = len(scripts) // 2
+    return head + "".join(scripts[:middle]) + tail.replace("</body>", "".join(scripts[middle:]) + "</body>")
+
+
+def bench(func, page: str, rounds: int = 3):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = func(page)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(sizes):
+    print(f"{'page':>16} {'legacy':>10} {'single pass':>12} {'speedup':>8}  article end kept (legacy / single pass)")
+    for kind in ("scripts", "dense"):
+        for size_mb in sizes:
+            page = make_page(size_mb, kind)
+            legacy_seconds, legacy = bench(legacy_extract_text, page)
+            seconds, text = bench(lambda document: extract_text(document, MAX_CHARS), page)
+            print(
+                f"{kind:>8} {len(page) / 1024 / 1024:>5.1f}MB {legacy_seconds * 1000:>8.1f}ms {seconds * 1000:>10.1f}ms "
+                f"{legacy_seconds / seconds:>7.2f}x  {ARTICLE_END in legacy} / {ARTICLE_END in text}"
+            )
+
+
+if __name__ == "__main__":
+    main([float(arg) for arg in sys.argv[1:]] or [1, 4, 8])
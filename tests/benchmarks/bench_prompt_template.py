@@ -0,0 +1,88 @@
+"""Benchmark of apply_prompt_template against the history length.
+
+Compares the current implementation, which formats from a shallow view of
+the state, with the one that deep-copied the whole state on every call, for
+the publisher prompt that runs on every workflow step.
+
+    python -m tests.benchmarks.bench_prompt_template [history_length ...]
+"""
+import sys
+import copy
+import time
+from datetime import datetime
+
+from langchain_core.messages import HumanMessage
+
+from src.prompts.template import _formatter, apply_prompt_template, get_prompt_template
+
+PROMPT = "publisher"
+
+
+def legacy_apply_prompt_template(prompt_name: str, state: dict, template: str = None) -> list:
+    """apply_prompt_template before it stopped deep-copying the state."""
+    state = copy.deepcopy(state)
+    messages = []
+    for msg in state["messages"]:
+        if isinstance(msg, HumanMessage):
+            messages.append({"role": "user", "content": msg.content})
+        elif isinstance(msg, dict) and 'role' in msg:
+            if msg["role"] == "user":
+                messages.append({"role": "user", "content": msg["content"]})
+            else:
+                messages.append({"role": "assistant", "content": msg["content"]})
+    state["messages"] = messages
+    _template, _ = get_prompt_template(prompt_name) if not template else template
+    system_prompt = _formatter(_template).format(
+        CURRENT_TIME=datetime.now().strftime("%a %b %d %Y %H:%M:%S %z"), **state
+    )
+    return [{"role": "system", "content": system_prompt}] + messages
+
+
+def make_state(history: int) -> dict:
+    messages = []
+    for i in range(history):
+        content = f"Step {i}: " + "the agent reports intermediate findings in some detail. " * 20
+        if i % 3 == 0:
+            messages.append(HumanMessage(content=content))
+        else:
+            messages.append({"role": "assistant" if i % 3 == 1 else "user", "content": content, "name": f"agent_{i % 5}"})
+    state = {
+        "messages": messages,
+        "TEAM_MEMBERS": [f"agent_{i}" for i in range(20)],
+        "TEAM_MEMBERS_DESCRIPTION": "\n".join(f"- agent_{i}: " + "does a specific kind of work. " * 10 for i in range(20)),
+        "TOOLS": "\n".join(f"- tool_{i}: " + "a tool description. " * 10 for i in range(30)),
+        "user_id": "bench",
+        "workflow_id": "bench",
+        "deep_thinking_mode": False,
+        "search_before_planning": False,
+        "full_plan": "{}",
+        "next": "",
+    }
+    _, variables = get_prompt_template(PROMPT)
+    for variable in variables:
+        state.setdefault(variable, "")
+    state.pop("CURRENT_TIME", None)
+    return state
+
+
+def bench(func, state: dict, rounds: int) -> float:
+    func(PROMPT, state)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func(PROMPT, state)
+    return (time.perf_counter() - start) / rounds
+
+
+def main(lengths):
+    print(f"{'history':>8} {'deepcopy':>12} {'shallow view':>14} {'speedup':>8}")
+    for length in lengths:
+        state = make_state(length)
+        assert apply_prompt_template(PROMPT, state)[1:] == legacy_apply_prompt_template(PROMPT, state)[1:]
+        rounds = max(5, 2000 // max(length, 1))
+        legacy = bench(legacy_apply_prompt_template, state, rounds)
+        current = bench(apply_prompt_template, state, rounds)
+        print(f"{length:>8} {legacy * 1000:>10.2f}ms {current * 1000:>12.2f}ms {legacy / current:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10, 100, 1000, 5000])
@@ -0,0 +1,94 @@
+"""Benchmark of the planner's team and tool descriptions against the catalog size.
+
+Lists a user's agents and the tools in full and narrowed to the top-K most
+relevant to the request by BM25, and reports the prompt tokens of the two
+sections (estimated at 4 characters a token), the time to build the
+rankings, the time per request and how often an agent on the subject of
+the request made the cut.
+
+    python -m tests.benchmarks.bench_team_retrieval [catalog_size ...]
+"""
+import sys
+import time
+import random
+from types import SimpleNamespace
+
+from src.manager.team import TeamDescriptors
+
+TOP_AGENTS = 10
+TOP_TOOLS = 20
+TOPICS = [
+    "stock market", "weather forecast", "travel booking", "recipe cooking", "legal contract", "medical symptom",
+    "football score", "movie review", "github repository", "tax return", "real estate", "crypto wallet",
+    "job interview", "language translation", "flight status", "hotel price", "car insurance", "music playlist",
+    "news summary", "academic paper", "fitness plan", "pet care", "garden design", "home repair",
+]
+FILLER = (
+    "It gathers the relevant information, checks the sources, and writes a structured answer with the key "
+    "findings, caveats and next steps for the user."
+)
+
+
+def make_catalog(size: int, rng: random.Random):
+    agents, tools, subjects = [], {}, {}
+    for i in range(size):
+        topic = rng.choice(TOPICS)
+        detail = rng.choice(TOPICS)
+        name = f"{topic.split()[0]}_{detail.split()[1]}_{i}"
+        agents.append(SimpleNamespace(
+            agent_name=name,
+            user_id="bench",
+            description=f"This agent specializes in {topic} questions, including {detail} comparisons. {FILLER}",
+        ))
+        subjects[name] = (topic, detail)
+        tool_name = f"{detail.split()[0]}_{topic.split()[1]}_api_{i}"
+        tools[tool_name] = SimpleNamespace(description=f"Query the {detail} service for {topic} data. {FILLER}")
+    return agents, tools, subjects
+
+
+def tokens(text: str) -> int:
+    return len(text) // 4
+
+
+def measure(team: TeamDescriptors, agents, tools, subjects, queries, ranked: bool):
+    team.rebuild(agents)
+    team.tools_changed()
+    start = time.perf_counter()
+    team.team("bench", query="warm up" if ranked else None)
+    team.tools(tools, "warm up" if ranked else None)
+    build = time.perf_counter() - start
+
+    size = hits = 0
+    start = time.perf_counter()
+    for subject, query in queries:
+        members, description = team.team("bench", query=query if ranked else None)
+        tools_description = team.tools(tools, query if ranked else None)
+        size += tokens(description) + tokens(tools_description)
+        hits += any(subjects.get(member) == subject for member in members)
+    per_query = (time.perf_counter() - start) / len(queries)
+    return build, per_query, size // len(queries), hits / len(queries)
+
+
+def main(sizes):
+    rng = random.Random(0)
+    print(
+        f"{'catalog':>8} {'full tokens':>12} {'top-K tokens':>13} {'build':>9} "
+        f"{'full/query':>11} {'top-K/query':>12} {'recall':>7}"
+    )
+    for size in sizes:
+        agents, tools, subjects = make_catalog(size, rng)
+        pairs = sorted(set(subjects.values()))
+        queries = [
+            ((topic, detail), f"Please compare {topic} offers and their {detail} for me")
+            for topic, detail in rng.sample(pairs, min(50, len(pairs)))
+        ]
+        full = measure(TeamDescriptors(0, 0, 0), agents, tools, subjects, queries, False)
+        top = measure(TeamDescriptors(0, TOP_AGENTS, TOP_TOOLS), agents, tools, subjects, queries, True)
+        print(
+            f"{size:>8} {full[2]:>12} {top[2]:>13} {top[0] * 1000:>7.1f}ms "
+            f"{full[1] * 1000:>9.3f}ms {top[1] * 1000:>10.3f}ms {top[3]:>7.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10, 100, 1000, 5000])
@@ -0,0 +1,21 @@
+import pytest
+
+from src.interface.agent import Agent
+
+
+@pytest.fixture
+def make_agent():
+    """Factory of minimal agents for index and team tests."""
+
+    def make(name: str, user_id: str, description: str = None) -> Agent:
+        return Agent(
+            user_id=user_id,
+            agent_name=name,
+            nick_name=name,
+            description=description or f"{name} agent",
+            llm_type="basic",
+            selected_tools=[],
+            prompt="",
+        )
+
+    return make
@@ -0,0 +1,90 @@
+"""Local stand-in for the browser backend's /scroll endpoint.
+
+Serves `pages` (url -> html) as {"success": true, "html": ...} after `delay`
+seconds and records how many scrolls ran at once. Used by the browser tool
+tests, and runnable on its own to point BROWSER_BACKEND at during development:
+
+    python -m tests.integration.browser_backend_stub 8100
+"""
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class StubBrowserBackend:
+    def __init__(self, pages: dict = None, delay: float = 0.0, port: int = 0):
+        self.pages = pages or {}
+        self.delay = delay
+        self.requests = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def _handler(self):
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                url = parse_qs(parts.query).get("url", [""])[0]
+                with backend._lock:
+                    backend.requests.append(url)
+                    backend.active += 1
+                    backend.peak = max(backend.peak, backend.active)
+                try:
+                    time.sleep(backend.delay)
+                    if parts.path != "/scroll":
+                        status, body = 404, {"success": False, "error": "not found"}
+                    else:
+                        html = backend.pages.get(url, f"<html><body><p>Stub page for {url}.</p></body></html>")
+                        status, body = 200, {"success": True, "html": html}
+                finally:
+                    with backend._lock:
+                        backend.active -= 1
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+    def start(self) -> "StubBrowserBackend":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8100
+    backend = StubBrowserBackend(delay=1.0, port=port)
+    print(f"Stub browser backend on {backend.url}")
+    try:
+        backend._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
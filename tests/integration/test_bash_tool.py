@@ -1,7 +1,6 @@
 import unittest
-import subprocess
 from unittest.mock import patch
-from src.tools.bash_tool import bash_tool
+from src.tools.bash_tool import bash_tool, _OutputCapture
 
 
 class TestBashTool(unittest.TestCase):
@@ -10,27 +9,48 @@ class TestBashTool(unittest.TestCase):
         result = bash_tool.invoke("echo 'Hello World'")
         self.assertEqual(result.strip(), "Hello World")
 
-    @patch("subprocess.run")
-    def test_command_with_error(self, mock_run):
+    def test_command_with_error(self):
         """Test bash tool when command fails"""
-        # Configure mock to raise CalledProcessError
-        mock_run.side_effect = subprocess.CalledProcessError(
-            returncode=1, cmd="invalid_command", output="", stderr="Command not found"
-        )
-
-        result = bash_tool.invoke("invalid_command")
+        result = bash_tool.invoke("echo 'Command not found' >&2; exit 1")
         self.assertIn("Command failed with exit code 1", result)
         self.assertIn("Command not found", result)
 
-    @patch("subprocess.run")
-    def test_command_with_exception(self, mock_run):
+    @patch("subprocess.Popen")
+    def test_command_with_exception(self, mock_popen):
         """Test bash tool when an unexpected exception occurs"""
         # Configure mock to raise a generic exception
-        mock_run.side_effect = Exception("Unexpected error")
+        mock_popen.side_effect = Exception("Unexpected error")
 
         result = bash_tool.invoke("some_command")
         self.assertIn("Error executing command: Unexpected error", result)
 
+    def test_timeout_kills_command(self):
+        """Test bash tool stops a command running past its timeout"""
+        with patch("src.tools.bash_tool.BASH_TOOL_TIMEOUT", 0.5):
+            result = bash_tool.invoke("echo started && sleep 30")
+        self.assertIn("Command timed out after 0.5s", result)
+        self.assertIn("started", result)
+
+    def test_long_output_is_truncated_and_spilled(self):
+        """Test bash tool keeps head and tail of a long output and refers to the full output"""
+        with patch("src.tools.bash_tool.BASH_TOOL_MAX_OUTPUT", 100):
+            result = bash_tool.invoke("seq 1 1000")
+        self.assertTrue(result.startswith("1\n2\n"))
+        self.assertTrue(result.rstrip().endswith("1000"))
+        spill_path = result.split(" is in ")[1].split("]")[0]
+        with open(spill_path, encoding="utf-8") as f:
+            self.assertEqual(f.read().split(), [str(i) for i in range(1, 1001)])
+
+    def test_output_is_captured_while_the_command_runs(self):
+        """Test bash tool bounds the memory of a large output instead of buffering all of it"""
+        with patch("src.tools.bash_tool.BASH_TOOL_MAX_OUTPUT", 1000), \
+                patch("src.tools.bash_tool._OutputCapture.write", autospec=True,
+                      side_effect=_OutputCapture.write) as write:
+            result = bash_tool.invoke("head -c 1000000 /dev/zero | tr '\\0' x")
+        self.assertIn("1000000 characters", result)
+        # written in pipe sized chunks, not once with the whole output
+        self.assertGreater(write.call_count, 10)
+
     def test_command_with_output(self):
         """Test bash tool with a command that produces output"""
         # Create a temporary file and write to it
@@ -0,0 +1,54 @@
+import json
+import asyncio
+
+import pytest
+
+from src.tools import browser
+from src.tools.browser_client import BrowserBackendClient
+from tests.integration.browser_backend_stub import StubBrowserBackend
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    with StubBrowserBackend(delay=0.2) as stub:
+        client = BrowserBackendClient(base_url=stub.url, concurrency=2, timeout=10, ttl=60)
+        monkeypatch.setattr(browser, "browser_client", client)
+        monkeypatch.setattr(browser.BrowserTool, "_check_browser_enabled", lambda self: True)
+
+        def summarize(self, url, text_content):
+            return f"summary of {text_content}", True
+
+        async def asummarize(self, url, text_content):
+            return f"summary of {text_content}", True
+
+        monkeypatch.setattr(browser.BrowserTool, "_summarize_content", summarize)
+        monkeypatch.setattr(browser.BrowserTool, "_asummarize_content", asummarize)
+        yield stub, client
+
+
+def test_parallel_scrolls_are_limited_and_cached(backend):
+    stub, client = backend
+    urls = [f"https://example.com/{i}" for i in range(5)]
+
+    async def browse():
+        results = await asyncio.gather(*(browser.browser_tool._arun(url) for url in urls))
+        results.append(await browser.browser_tool._arun(urls[0] + "#again"))
+        await client.aclose()
+        return results
+
+    results = [json.loads(result) for result in asyncio.run(browse())]
+    assert all(result["success"] for result in results)
+    assert results[0]["summary"] == "summary of Stub page for https://example.com/0."
+    assert results[-1]["summary"] == results[0]["summary"]
+    assert len(stub.requests) == 5
+    assert stub.peak <= 2
+    assert client.stats()["hits"] == 1
+
+
+def test_sync_run_uses_the_backend_and_cache(backend):
+    stub, client = backend
+    first = json.loads(browser.browser_tool._run("https://example.com/page"))
+    second = json.loads(browser.browser_tool._run("https://example.com/page"))
+    assert first == second
+    assert first["success"]
+    assert len(stub.requests) == 1
@@ -0,0 +1,49 @@
+import re
+import random
+
+from src.manager.index import AgentIndex, literal_prefix
+
+
+def test_literal_prefix():
+    assert literal_prefix("stock_analyst") == "stock_analyst"
+    assert literal_prefix("stock.*") == "stock"
+    assert literal_prefix("stocks?_") == "stock"
+    assert literal_prefix("ab{2}") == "a"
+    assert literal_prefix("(?i)stock") == ""
+    assert literal_prefix("stock|news") == ""
+
+
+def test_select_matches_a_full_scan(make_agent):
+    rng = random.Random(7)
+    users = ["share", "u1", "u2", "u3"]
+    words = ["stock", "news", "travel", "code"]
+    agents = {}
+    index = AgentIndex()
+    for i in range(300):
+        name = f"{rng.choice(words)}_{rng.choice(words)}_{i}"
+        agents[name] = make_agent(name, rng.choice(users))
+        index.add(agents[name])
+    for name in rng.sample(list(agents), 60):
+        del agents[name]
+        index.remove(name)
+
+    for user_id in [None, "u1", "u2", "nobody"]:
+        for match in [None, "stock", "news_.*_1", "code_(stock|news)", "(?i)TRAVEL", "travels?_c"]:
+            expected = [
+                agent for agent in agents.values()
+                if (not user_id or agent.user_id == user_id)
+                and (not match or re.match(match, agent.agent_name))
+            ]
+            assert index.select(user_id, match) == expected
+    assert index.shared() == [agent for agent in agents.values() if agent.user_id == "share"]
+
+
+def test_readding_an_agent_keeps_its_position(make_agent):
+    index = AgentIndex()
+    for name in ["a", "b", "c"]:
+        index.add(make_agent(name, "u1"))
+    index.add(make_agent("a", "u1"))
+    assert [agent.agent_name for agent in index.select("u1")] == ["a", "b", "c"]
+    index.add(make_agent("a", "u2"))
+    assert [agent.agent_name for agent in index.select()] == ["b", "c", "a"]
+    assert index.user_agents("u2")[0].agent_name == "a"
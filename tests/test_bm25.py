@@ -0,0 +1,20 @@
+from src.utils.bm25 import BM25Index, tokenize
+
+
+def test_tokenize_splits_names_and_cjk():
+    assert tokenize("The stock_analyst of Python 3") == ["stock", "analyst", "python", "3"]
+    assert tokenize("股票分析") == ["股", "票", "分", "析"]
+
+
+def test_top_k_ranks_relevant_documents_in_catalog_order():
+    index = BM25Index({
+        "weather": "weather forecast for a city",
+        "stock": "stock market prices and stock news",
+        "travel": "travel booking of flights and hotels",
+        "news": "daily news summary",
+    })
+    assert index.top_k("latest stock news", 2) == ["stock", "news"]
+    assert index.top_k("book flights", 1) == ["travel"]
+    # nothing matches, the first documents fill the places
+    assert index.top_k("recipe", 2) == ["weather", "stock"]
+    assert index.top_k("anything", 0) == ["weather", "stock", "travel", "news"]
@@ -0,0 +1,15 @@
+from click.testing import CliRunner
+
+from cli import cli
+from src.service.server import Server
+
+
+def test_cache_stats_command_prints_the_counters_of_every_cache():
+    stats = Server._cache_stats()
+    assert {"hits", "misses", "evictions", "bytes"} <= stats["workflow_cache"].keys()
+
+    result = CliRunner().invoke(cli, ["cache-stats"], obj={"server": Server(), "_initialized": True})
+    assert result.exit_code == 0, result.output
+    for name in stats:
+        assert f'"{name}": {{' in result.output
+    assert '"evictions": ' in result.output
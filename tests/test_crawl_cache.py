@@ -0,0 +1,113 @@
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.tools.crawler import Article
+from src.tools.crawler import crawler as crawler_module
+from src.tools.crawler.cache import CrawlCache, CrawlCacheMiss, normalize_url
+
+
+def _article(url, body="<p>hello</p>"):
+    article = Article("Title", body)
+    article.url = url
+    return article
+
+
+def test_normalize_url():
+    assert normalize_url("HTTPS://Example.com:443/a/?b=2&a=1&utm_source=x#top") == "https://example.com/a/?b=2&a=1&utm_source=x"
+    # a trailing slash and the order of parameters can select another resource
+    assert normalize_url("https://example.com/a") != normalize_url("https://example.com/a/")
+    assert normalize_url("https://example.com/?a=1&b=2") != normalize_url("https://example.com/?b=2&a=1")
+    assert normalize_url("http://User@[::1]:80/X") == "http://User@[::1]/X"
+    assert normalize_url("http://example.com") == "http://example.com/"
+    assert normalize_url("http://example.com:8080/x") == "http://example.com:8080/x"
+
+
+def test_fresh_entry_is_served(tmp_path):
+    cache = CrawlCache(cache_dir=tmp_path, ttl=60, max_bytes=0)
+    assert cache.lookup("https://example.com/a") == (None, None)
+    cache.put("https://example.com/a", _article("https://example.com/a"))
+
+    article, stale = cache.lookup("HTTPS://Example.com/a#section")
+    assert stale is None
+    assert article.title == "Title"
+    assert "hello" in article.to_markdown()
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_stale_entry_is_revalidated(tmp_path):
+    cache = CrawlCache(cache_dir=tmp_path, ttl=60, max_bytes=0)
+    url = "https://example.com/a"
+    entry = cache.put(url, _article(url), {"etag": '"v1"'})
+    entry["fetched_at"] = time.time() - 120
+    cache._write(url, entry)
+
+    article, stale = cache.lookup(url)
+    assert article is None
+    assert cache.revalidation_headers(stale) == {"If-None-Match": '"v1"'}
+    assert cache.revalidate(url, stale, 304, {}) is not None
+    # revalidation renewed the entry
+    article, stale = cache.lookup(url)
+    assert article is not None and stale is None
+
+    entry["fetched_at"] = time.time() - 120
+    cache._write(url, entry)
+    _, stale = cache.lookup(url)
+    assert cache.revalidate(url, stale, 200, {"etag": '"v2"'}) is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_offline_fixture_store(tmp_path):
+    url = "https://example.com/fixture"
+    CrawlCache(cache_dir=tmp_path, ttl=60, max_bytes=0).put(url, _article(url))
+
+    offline = CrawlCache(cache_dir=tmp_path, ttl=0, offline=True)
+    article, _ = offline.lookup(url)
+    assert article.url == url
+    with pytest.raises(CrawlCacheMiss):
+        offline.lookup("https://example.com/missing")
+
+
+def test_size_bound_evicts_least_recently_used(tmp_path):
+    cache = CrawlCache(cache_dir=tmp_path, ttl=60, max_bytes=2500)
+    for i in range(3):
+        url = f"https://example.com/{i}"
+        cache.put(url, _article(url, "<p>" + "x" * 500 + "</p>"))
+        path = cache._path(url)
+        os.utime(path, (i, i))
+
+    cache.put("https://example.com/3", _article("https://example.com/3", "<p>" + "y" * 500 + "</p>"))
+    assert cache.stats()["evictions"] >= 1
+    assert not cache._path("https://example.com/0").exists()
+    assert cache._path("https://example.com/3").exists()
+
+
+def test_origin_is_only_asked_once_an_entry_expires(tmp_path, monkeypatch):
+    cache = CrawlCache(cache_dir=tmp_path, ttl=60, max_bytes=0)
+    monkeypatch.setattr(crawler_module, "crawl_cache", cache)
+    heads = []
+
+    def head(url, headers=None):
+        heads.append(headers)
+        return SimpleNamespace(status_code=200, headers={"etag": '"v1"'})
+
+    crawler = crawler_module.Crawler()
+    monkeypatch.setattr(crawler, "_head", head)
+    monkeypatch.setattr(crawler, "jina_client", SimpleNamespace(crawl=lambda url, return_format: "<p>page</p>"))
+    monkeypatch.setattr(crawler, "extractor", SimpleNamespace(extract_article=lambda html: Article("Title", html)))
+
+    url = "https://example.com/a"
+    crawler.crawl(url)
+    crawler.crawl(url)
+    assert heads == []
+
+    entry = cache._read(url)
+    entry["fetched_at"] = time.time() - 120
+    cache._write(url, entry)
+    crawler.crawl(url)
+    # an entry stored without validators learns them on its first expiry
+    assert heads == [{}]
+    assert cache._read(url)["etag"] == '"v1"'
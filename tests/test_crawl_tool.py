@@ -0,0 +1,22 @@
+import asyncio
+import logging
+
+from src.tools import crawl
+from src.tools.crawler import Article
+
+
+class FakeCrawler:
+    async def acrawl(self, url: str) -> Article:
+        article = Article("Title", "<p>hello</p>")
+        article.url = url
+        return article
+
+
+def test_async_crawls_are_logged_like_sync_ones(monkeypatch, caplog):
+    monkeypatch.setattr(crawl, "Crawler", FakeCrawler)
+    with caplog.at_level(logging.DEBUG, logger="src.tools.decorators"):
+        result = asyncio.run(crawl.crawl_tool.ainvoke({"url": "https://example.com/"}))
+    assert "hello" in str(result)
+    messages = [record.getMessage() for record in caplog.records]
+    assert any("_acrawl called with parameters: url=https://example.com/" in message for message in messages)
+    assert any("_acrawl returned:" in message for message in messages)
@@ -0,0 +1,45 @@
+from src.utils.html_text import extract_text
+
+
+def test_drops_non_content_and_decodes_entities():
+    page = (
+        "<html><head><title>A &amp; B</title><style>p { color: red }</style></head><body>"
+        "<nav><a href='/'>Home</a></nav><script>var x = '<p>no</p>';</script>"
+        "<p>Caf&eacute; &#8212; <b>bold</b> &lt;tag&gt;</p><div hidden>hidden</div><!-- comment -->"
+        "<footer>footer</footer></body></html>"
+    )
+    assert extract_text(page) == "A & B\nCafé — bold <tag>"
+
+
+
+def test_keeps_the_content_of_pages_wrapped_in_a_form():
+    page = "<body><form><div><h1>News</h1><p>The main article text.</p></div><button>Send</button></form></body>"
+    assert extract_text(page) == "News\nThe main article text."
+
+
+def test_hidden_is_read_from_attribute_names_and_inline_styles():
+    page = (
+        '<div title="the hidden truth" class="hidden-xs">Shown.</div>'
+        '<div data-state=hidden>Also shown.</div>'
+        '<div style="display: none">Not shown.</div>'
+        '<div aria-hidden="true">Not shown either.</div>'
+        '<p HIDDEN>Nor this.</p>'
+    )
+    assert extract_text(page) == "Shown.\nAlso shown."
+
+
+def test_hidden_inline_elements_are_dropped():
+    page = '<p>Price <span hidden>old price</span>42 <i aria-hidden="true">icon</i>euros.</p>'
+    assert extract_text(page) == "Price 42 euros."
+
+
+def test_bare_angle_brackets_are_text():
+    assert extract_text("<p>x < y and y > z</p>") == "x < y and y > z"
+
+def test_budget_keeps_main_content_over_boilerplate():
+    links = "<div>" + " ".join(f"<a href='/{i}'>Link {i}</a>" for i in range(200)) + "</div>"
+    article = "<article><h2>Result</h2><p>" + "The important finding is stated here. " * 20 + "</p></article>"
+    text = extract_text(links + article + links.replace("Link", "More"), max_chars=1000)
+    assert len(text) <= 1000
+    assert text.startswith("Result\nThe important finding")
+    assert "Link 1" not in text
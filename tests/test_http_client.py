@@ -0,0 +1,70 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.tools.crawler import http_client as http_client_module
+from src.tools.crawler.http_client import SharedHttpClient
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(http_client_module, "RETRY_BACKOFF_BASE", 0.001)
+
+
+def test_retryable_statuses_and_transport_errors_are_retried():
+    attempts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(request.url.path)
+        if len(attempts) == 1:
+            raise httpx.ConnectError("connection refused", request=request)
+        if len(attempts) == 2:
+            return httpx.Response(503)
+        return httpx.Response(200, text="ok")
+
+    client = SharedHttpClient(retries=3, transport=httpx.MockTransport(handler))
+    response = asyncio.run(client.get("http://example.com/page"))
+    assert response.text == "ok"
+    assert len(attempts) == 3
+    assert client.stats()["retried"] == 2
+
+
+def test_retries_give_up_with_the_last_response_or_error():
+    client = SharedHttpClient(retries=2, transport=httpx.MockTransport(lambda request: httpx.Response(429)))
+    assert asyncio.run(client.get("http://example.com/")).status_code == 429
+    assert client.stats()["requests"] == 3
+
+    def refuse(request: httpx.Request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    client = SharedHttpClient(retries=1, transport=httpx.MockTransport(refuse))
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(client.get("http://example.com/"))
+    # a client error is not retried
+    client = SharedHttpClient(retries=3, transport=httpx.MockTransport(lambda request: httpx.Response(404)))
+    assert asyncio.run(client.get("http://example.com/")).status_code == 404
+    assert client.stats()["retried"] == 0
+
+
+def test_requests_to_one_host_are_limited():
+    running = {"a.com": 0, "b.com": 0}
+    peak = {"a.com": 0, "b.com": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        running[host] += 1
+        peak[host] = max(peak[host], running[host])
+        await asyncio.sleep(0.01)
+        running[host] -= 1
+        return httpx.Response(200)
+
+    client = SharedHttpClient(per_host=2, transport=httpx.MockTransport(handler))
+
+    async def main():
+        urls = [f"http://{host}/{i}" for host in running for i in range(6)]
+        await asyncio.gather(*(client.get(url) for url in urls))
+        await client.aclose()
+
+    asyncio.run(main())
+    assert peak == {"a.com": 2, "b.com": 2}
@@ -0,0 +1,102 @@
+import asyncio
+from typing import TypedDict
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from src.llm.cache import CachedChatModel, LLMResponseCache
+
+
+class Route(TypedDict):
+    next: str
+
+
+class StructuredModel:
+    """Stand-in for a model bound to a structured output schema."""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.calls = 0
+
+    def with_structured_output(self, schema, **kwargs):
+        return self
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        self.calls += 1
+        return self.answers[self.calls - 1]
+
+
+def fake_llm(*answers) -> GenericFakeChatModel:
+    return GenericFakeChatModel(messages=iter([AIMessage(content=answer) for answer in answers]))
+
+
+def prompt(time: str) -> list:
+    return [
+        {"role": "system", "content": f"Current time: {time}\n\nYou are the coordinator."},
+        {"role": "user", "content": "hello"},
+    ]
+
+
+def test_key_ignores_the_time_of_day_of_current_time():
+    llm = fake_llm()
+    key = LLMResponseCache.key(llm, prompt("Mon Jun 02 2025 10:15:01 +0800"))
+    assert key == LLMResponseCache.key(llm, prompt("Mon Jun 02 2025 18:40:59 +0800"))
+    assert key != LLMResponseCache.key(llm, prompt("Tue Jun 03 2025 10:15:01 +0800"))
+    assert key != LLMResponseCache.key(llm, prompt("Mon Jun 02 2025 10:15:01 +0800"), Route)
+
+
+def test_answers_are_reused_from_memory_and_disk(tmp_path):
+    cache = LLMResponseCache(ttl=60, max_entries=8, path=tmp_path / "llm.db")
+    model = CachedChatModel(fake_llm("first", "second"), "coordinator", cache)
+
+    async def main():
+        first = await model.ainvoke(prompt("Mon Jun 02 2025 10:15:01"))
+        again = await model.ainvoke(prompt("Mon Jun 02 2025 10:16:30"))
+        return first, again
+
+    first, again = asyncio.run(main())
+    assert first.content == again.content == "first"
+    assert cache.stats()["memory_hits"] == 1
+
+    restarted = LLMResponseCache(ttl=60, max_entries=8, path=tmp_path / "llm.db")
+    assert restarted.lookup(LLMResponseCache.key(model.llm, prompt("Mon Jun 02 2025 11:00:00"))) == "first"
+    assert restarted.stats()["disk_hits"] == 1
+
+
+def test_streams_are_replayed_and_interrupted_streams_not_cached():
+    cache = LLMResponseCache(ttl=60, max_entries=8, path=None)
+    model = CachedChatModel(fake_llm("handover to planner", "an answer"), "coordinator", cache)
+
+    async def collect(messages, limit=None):
+        chunks = []
+        async for chunk in model.astream(messages):
+            chunks.append(chunk.content)
+            if limit and len(chunks) == limit:
+                break
+        return chunks
+
+    async def main():
+        streamed = await collect(prompt("Mon Jun 02 2025 10:15:01"))
+        replayed = await collect(prompt("Mon Jun 02 2025 10:15:01"))
+        await collect([{"role": "user", "content": "other"}], limit=1)
+        return streamed, replayed
+
+    streamed, replayed = asyncio.run(main())
+    assert len(streamed) > 1
+    assert replayed == ["".join(streamed)]
+    assert cache.lookup(LLMResponseCache.key(model.llm, [{"role": "user", "content": "other"}])) is None
+
+
+def test_structured_answers_are_keyed_by_schema():
+    cache = LLMResponseCache(ttl=60, max_entries=8, path=None)
+    llm = StructuredModel([{"next": "coder"}, {"next": "FINISH"}])
+    model = CachedChatModel(llm, "publisher", cache)
+
+    async def main():
+        messages = prompt("Mon Jun 02 2025 10:15:01")
+        first = await model.with_structured_output(Route).ainvoke(messages)
+        again = await model.with_structured_output(Route).ainvoke(messages)
+        return first, again
+
+    assert asyncio.run(main()) == ({"next": "coder"}, {"next": "coder"})
+    assert llm.calls == 1
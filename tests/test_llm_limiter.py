@@ -0,0 +1,171 @@
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from src.llm.limiter import LimitedAsyncTransport, ModelLimiter, limited_async_client, limited_client
+
+
+def test_waiting_requests_are_served_round_robin_across_users():
+    limiter = ModelLimiter("model", rpm=0, tpm=0, concurrency=1)
+    order = []
+
+    async def request(user: str, i: int):
+        await limiter.acquire(user=user)
+        order.append(f"{user}{i}")
+        await asyncio.sleep(0.01)
+        limiter.release()
+
+    async def main():
+        tasks = [asyncio.create_task(request("a", i)) for i in range(4)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request("b", 0)))
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert order == ["a0", "a1", "b0", "a2", "a3"]
+    stats = limiter.stats()
+    assert stats["admitted"] == 5 and stats["active"] == 0 and stats["queued"] == 0
+    assert stats["wait_max"] > 0
+
+
+def test_token_bucket_delays_requests_past_the_budget():
+    # 100 tokens a second
+    limiter = ModelLimiter("model", rpm=0, tpm=6000, concurrency=0)
+
+    async def main():
+        await limiter.acquire(6000, user="a")
+        limiter.release(6000)
+        start = time.monotonic()
+        await limiter.acquire(10, user="a")
+        limiter.release(10)
+        return time.monotonic() - start
+
+    assert 0.05 < asyncio.run(main()) < 1
+
+
+def test_cancelled_waiters_leave_the_queue():
+    limiter = ModelLimiter("model", rpm=0, tpm=0, concurrency=1)
+
+    async def main():
+        await limiter.acquire(user="a")
+        waiting = asyncio.create_task(limiter.acquire(user="b"))
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert limiter.stats()["queued"] == 0
+        limiter.release()
+        await asyncio.wait_for(limiter.acquire(user="c"), 1)
+
+    asyncio.run(main())
+    assert limiter.active == 1
+
+
+class StreamedBody(httpx.AsyncByteStream):
+    """Response body read from the network, unlike the pre-read bodies of MockTransport."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    async def __aiter__(self):
+        yield self.data
+
+
+def test_transport_holds_a_slot_until_the_response_is_closed():
+    limiter = ModelLimiter("model", rpm=0, tpm=100000, concurrency=2)
+    statuses = iter([200, 429])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        status = next(statuses)
+        if status == 429:
+            return httpx.Response(429, headers={"retry-after": "0.01"})
+        return httpx.Response(200, stream=StreamedBody(json.dumps({"choices": [], "usage": {"total_tokens": 42}}).encode()))
+
+    async def main():
+        transport = LimitedAsyncTransport(limiter, httpx.MockTransport(handler))
+        async with httpx.AsyncClient(transport=transport) as client:
+            body = {"model": "m", "messages": [{"role": "user", "content": "hi"}], "max_tokens": 100}
+            async with client.stream("POST", "http://llm/v1/chat/completions", content=json.dumps(body)) as response:
+                assert limiter.active == 1
+                await response.aread()
+            # closing the response frees the slot
+            assert limiter.active == 0
+            response = await client.post("http://llm/v1/chat/completions", content=json.dumps(body))
+            assert response.status_code == 429
+
+    asyncio.run(main())
+    stats = limiter.stats()
+    assert stats["throttled"] == 1
+    # the first request is accounted with its real usage
+    assert stats["admitted"] == 2 and stats["tokens"] < 200
+
+
+class RecordingServer(BaseHTTPRequestHandler):
+    """Answers every request like the LLM API and records its request target."""
+
+    targets = []
+
+    def do_POST(self):
+        self.targets.append(self.path)
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps({"choices": [], "usage": {"total_tokens": 42}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    RecordingServer.targets = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RecordingServer)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_limited_clients_keep_the_environment_proxies(server, monkeypatch):
+    for name in ("HTTPS_PROXY", "ALL_PROXY", "NO_PROXY", "https_proxy", "all_proxy", "no_proxy"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("HTTP_PROXY", f"http://127.0.0.1:{server.server_port}")
+    limiter = ModelLimiter("model", rpm=0, tpm=100000, concurrency=2)
+    body = json.dumps({"model": "m", "messages": [{"role": "user", "content": "hi"}], "max_tokens": 10})
+
+    with limited_client(limiter) as client:
+        with client.stream("POST", "http://llm.test/v1/chat/completions", content=body) as response:
+            # the proxied request holds a slot of the limiter
+            assert limiter.active == 1
+            response.read()
+        assert limiter.active == 0
+
+    async def main():
+        async with limited_async_client(limiter) as client:
+            async with client.stream("POST", "http://llm.test/v1/chat/completions", content=body) as response:
+                assert limiter.active == 1
+                await response.aread()
+            return response
+
+    assert asyncio.run(main()).status_code == 200
+    # the proxy got both requests, with the absolute url of the origin
+    assert RecordingServer.targets == ["http://llm.test/v1/chat/completions"] * 2
+    stats = limiter.stats()
+    assert stats["admitted"] == 2 and stats["active"] == 0
+
+    # NO_PROXY hosts are reached directly, through the limiter as well
+    monkeypatch.setenv("HTTP_PROXY", "http://127.0.0.1:9")
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+    with limited_client(limiter) as client:
+        with client.stream("POST", f"http://127.0.0.1:{server.server_port}/v1/chat/completions", content=body) as response:
+            assert limiter.active == 1
+            response.read()
+    assert RecordingServer.targets[-1] == "/v1/chat/completions"
+    assert limiter.stats()["admitted"] == 3
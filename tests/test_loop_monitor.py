@@ -0,0 +1,41 @@
+import time
+import asyncio
+import logging
+
+from src.utils.loop_monitor import LoopBlockingDetector
+
+
+def test_blocked_loop_is_reported_once_with_the_blocking_task(caplog):
+    detector = LoopBlockingDetector(threshold=0.05)
+
+    async def blocking_node():
+        time.sleep(0.3)
+
+    async def main():
+        detector.watch()
+        await asyncio.sleep(0.05)
+        await asyncio.create_task(blocking_node(), name="wf:coder")
+        # let the heartbeat measure the block
+        await asyncio.sleep(0.1)
+
+    with caplog.at_level(logging.WARNING, logger="src.utils.loop_monitor"):
+        asyncio.run(main())
+
+    stats = detector.stats()
+    assert stats["blocked"] == 1
+    assert stats["max_block"] > 0.2
+    reports = [record.getMessage() for record in caplog.records]
+    assert len(reports) == 1
+    assert "wf:coder" in reports[0] and "blocking_node" in reports[0]
+
+
+def test_idle_loop_is_not_reported():
+    detector = LoopBlockingDetector(threshold=0.05)
+
+    async def main():
+        detector.watch()
+        for _ in range(10):
+            await asyncio.sleep(0.02)
+
+    asyncio.run(main())
+    assert detector.stats()["blocked"] == 0
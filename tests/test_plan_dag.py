@@ -0,0 +1,80 @@
+import asyncio
+from collections import deque
+
+import pytest
+from langgraph.types import Command
+
+from src.workflow import process
+from src.workflow.streaming import emit_token
+
+
+class PlanWorkflow:
+    """agent_proxy of a plan whose second step answers while the first one still runs."""
+
+    def __init__(self, workflow_id: str):
+        self.workflow_id = workflow_id
+        self.second_done = asyncio.Event()
+        self.nodes = {"agent_proxy": self.agent_proxy}
+
+    async def agent_proxy(self, state):
+        agent_name = state["next"]
+        if agent_name == "researcher":
+            emit_token(agent_name, "first ")
+            await self.second_done.wait()
+            emit_token(agent_name, "result")
+        else:
+            emit_token(agent_name, "second ")
+            await asyncio.sleep(0)
+            emit_token(agent_name, "result")
+            self.second_done.set()
+        process.cache.queue[self.workflow_id].popleft()
+        return Command(update={"messages": [{"role": "assistant", "content": agent_name}]})
+
+
+def test_concurrent_steps_are_streamed_one_after_the_other(monkeypatch):
+    workflow_id = "plan"
+    monkeypatch.setitem(process.cache.queue, workflow_id, deque([{}, {}, {}]))
+    state = {"workflow_id": workflow_id, "messages": [], "next": ""}
+
+    async def main():
+        workflow = PlanWorkflow(workflow_id)
+        return [event async for event in process._run_plan_dag(workflow, state, ["researcher", "coder"], [[], []])]
+
+    events = asyncio.run(main())
+    order = [
+        (event["event"], event.get("agent_name") or event["data"]["agent_name"], event["data"].get("delta", {}).get("content"))
+        for event in events
+    ]
+    assert order == [
+        ("start_of_agent", "researcher", None),
+        ("messages", "researcher", "first "),
+        ("messages", "researcher", "result"),
+        ("end_of_agent", "researcher", None),
+        ("start_of_agent", "coder", None),
+        ("messages", "coder", "second "),
+        ("messages", "coder", "result"),
+        ("end_of_agent", "coder", None),
+    ]
+    assert [message["content"] for message in state["messages"]] == ["researcher", "coder"]
+    assert len(process.cache.queue[workflow_id]) == 1
+
+
+def test_a_failing_step_ends_the_plan(monkeypatch):
+    workflow_id = "failing"
+    monkeypatch.setitem(process.cache.queue, workflow_id, deque([{}, {}, {}]))
+    state = {"workflow_id": workflow_id, "messages": [], "next": ""}
+    workflow = PlanWorkflow(workflow_id)
+
+    async def agent_proxy(step_state):
+        if step_state["next"] == "coder":
+            raise ValueError("coder failed")
+        await asyncio.Event().wait()
+
+    workflow.nodes["agent_proxy"] = agent_proxy
+
+    async def main():
+        async for _ in process._run_plan_dag(workflow, state, ["researcher", "coder"], [[], []]):
+            pass
+
+    with pytest.raises(ValueError, match="coder failed"):
+        asyncio.run(asyncio.wait_for(main(), 5))
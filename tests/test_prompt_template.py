@@ -0,0 +1,115 @@
+import os
+import re
+import copy
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from langchain_core.messages import HumanMessage
+from langchain_core.prompts import PromptTemplate
+
+from src.prompts import template as template_module
+from src.prompts.template import apply_prompt, apply_prompt_template, get_prompt_template
+
+PROMPTS_DIR = Path(template_module.__file__).parent
+NOW = datetime(2025, 5, 1, 12, 30, 0)
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW
+
+
+@pytest.fixture
+def prompt_dir(tmp_path, monkeypatch):
+    (tmp_path / "src" / "prompts").mkdir(parents=True)
+    monkeypatch.setattr(template_module, "get_project_root", lambda: tmp_path)
+    monkeypatch.setattr(template_module, "_prompt_files", {})
+    return tmp_path / "src" / "prompts"
+
+
+def write_prompt(path: Path, content: str, mtime_ns: int):
+    path.write_text(content, encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_changed_prompt_files_are_reloaded(prompt_dir, monkeypatch):
+    monkeypatch.setattr(template_module, "PROMPT_RELOAD_INTERVAL", 0)
+    path = prompt_dir / "agent.md"
+    write_prompt(path, "Hello <<name>>", 1_000_000_000)
+    assert get_prompt_template("agent") == ("Hello {name}", ["name"])
+
+    write_prompt(path, "Bye <<name>> {x}", 2_000_000_000)
+    assert get_prompt_template("agent") == ("Bye {name} {{x}}", ["name"])
+
+
+def test_prompt_files_are_trusted_within_the_reload_interval(prompt_dir, monkeypatch):
+    monkeypatch.setattr(template_module, "PROMPT_RELOAD_INTERVAL", 3600)
+    path = prompt_dir / "agent.md"
+    write_prompt(path, "v1", 1_000_000_000)
+    assert get_prompt_template("agent")[0] == "v1"
+
+    write_prompt(path, "v2", 2_000_000_000)
+    assert get_prompt_template("agent")[0] == "v1"
+
+    monkeypatch.setattr(template_module, "PROMPT_RELOAD_INTERVAL", 0)
+    assert get_prompt_template("agent")[0] == "v2"
+
+
+def legacy_get_prompt_template(prompt_name: str):
+    """get_prompt_template before prompt files and compiled templates were cached."""
+    template = open(os.path.join(PROMPTS_DIR, f"{prompt_name}.md")).read()
+    variables = re.findall(r"<<([^>>]+)>>", template)
+    template = template.replace("{", "{{").replace("}", "}}")
+    template = re.sub(r"<<([^>>]+)>>", r"{\1}", template)
+    return template, variables
+
+
+def legacy_apply_prompt_template(prompt_name: str, state: dict) -> list:
+    state = copy.deepcopy(state)
+    messages = []
+    for msg in state["messages"]:
+        if isinstance(msg, HumanMessage):
+            messages.append({"role": "user", "content": msg.content})
+        elif isinstance(msg, dict) and "role" in msg:
+            if msg["role"] == "user":
+                messages.append({"role": "user", "content": msg["content"]})
+            else:
+                messages.append({"role": "assistant", "content": msg["content"]})
+    state["messages"] = messages
+    template, _ = legacy_get_prompt_template(prompt_name)
+    system_prompt = PromptTemplate(input_variables=["CURRENT_TIME"], template=template).format(
+        CURRENT_TIME=NOW.strftime("%a %b %d %Y %H:%M:%S %z"), **state
+    )
+    return [{"role": "system", "content": system_prompt}] + messages
+
+
+def legacy_apply_prompt(state: dict, template: str) -> str:
+    template = template.replace("{", "{{").replace("}", "}}")
+    template = re.sub(r"<<([^>>]+)>>", r"{\1}", template)
+    if "CURRENT_TIME" not in template:
+        template = "Current time: {CURRENT_TIME}\n\n" + template
+    return PromptTemplate(input_variables=["CURRENT_TIME"], template=template).format(
+        CURRENT_TIME=NOW.strftime("%a %b %d %Y %H:%M:%S %z"), **state
+    )
+
+
+@pytest.mark.parametrize("prompt_name", sorted(path.stem for path in PROMPTS_DIR.glob("*.md")))
+def test_every_prompt_renders_as_before(prompt_name, monkeypatch):
+    monkeypatch.setattr(template_module, "datetime", FrozenDatetime)
+    _, variables = legacy_get_prompt_template(prompt_name)
+    state = {name: f"value of {name} {{braces}}" for name in variables if name != "CURRENT_TIME"}
+    state["messages"] = [
+        HumanMessage(content="question"),
+        {"role": "assistant", "content": "answer", "name": "researcher"},
+        {"role": "user", "content": "follow up"},
+    ]
+
+    assert get_prompt_template(prompt_name) == legacy_get_prompt_template(prompt_name)
+    assert apply_prompt_template(prompt_name, state) == legacy_apply_prompt_template(prompt_name, state)
+    # a repeated call is served from the caches
+    assert apply_prompt_template(prompt_name, state) == legacy_apply_prompt_template(prompt_name, state)
+
+    raw = (PROMPTS_DIR / f"{prompt_name}.md").read_text(encoding="utf-8")
+    assert apply_prompt(state, raw) == legacy_apply_prompt(state, raw)
@@ -0,0 +1,78 @@
+import sys
+import types
+
+import pytest
+
+from src.tools.repl_pool import PythonReplPool, ReplWorkerError
+
+
+@pytest.fixture
+def pool():
+    pool = PythonReplPool(max_workers=2, warm=0, preload=[], memory_mb=256, cpu_seconds=0, timeout=5, max_output=100)
+    yield pool
+    pool.close()
+
+
+def test_sessions_keep_their_variables_in_their_own_worker(pool):
+    pool.run("a", "x = 41")
+    pool.run("b", "x = 1")
+    assert pool.run("a", "print(x + 1)") == "42\n"
+    assert pool.run("b", "print(x)") == "1\n"
+    stats = pool.stats()
+    assert stats["started"] == 2 and stats["sessions"] == 2 and stats["runs"] == 4
+
+
+def test_least_recently_used_idle_session_is_evicted(pool):
+    pool.run("a", "x = 1")
+    pool.run("b", "x = 2")
+    pool.run("a", "print(x)")
+    pool.run("c", "x = 3")
+    assert pool.stats()["evicted"] == 1
+    # b lost its worker, a kept it
+    assert "NameError" in pool.run("b", "print(x)")
+    assert pool.run("c", "print(x)") == "3\n"
+
+
+def test_timeout_kills_the_worker_and_loses_the_session(pool):
+    pool.timeout = 0.5
+    pool.run("a", "x = 1")
+    with pytest.raises(ReplWorkerError, match="timed out"):
+        pool.run("a", "while True: pass")
+    assert "NameError" in pool.run("a", "print(x)")
+    assert pool.stats()["failures"] == 1
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="resource limits are posix only")
+def test_memory_limit_and_output_cap(pool):
+    assert pool.run("a", "buffer = bytearray(1024 ** 3)") == "MemoryError()"
+    output = pool.run("a", "print('x' * 500)")
+    assert output.startswith("x" * 100) and "output truncated" in output
+
+
+def test_workers_do_not_run_the_parent_main_script(pool, tmp_path, monkeypatch):
+    marker = tmp_path / "imported"
+    script = tmp_path / "main_script.py"
+    script.write_text(f"open({str(marker)!r}, 'w').close()\n", encoding="utf-8")
+    main = types.ModuleType("__main__")
+    main.__file__ = str(script)
+    main.__spec__ = None
+    monkeypatch.setitem(sys.modules, "__main__", main)
+
+    assert pool.run("a", "print(__name__)") == "__main__\n"
+    assert not marker.exists()
+    assert main.__file__ == str(script)
+
+
+def test_evicted_worker_is_closed_when_the_new_one_fails_to_start(pool, monkeypatch):
+    pool.max_workers = 1
+    pool.run("a", "x = 1")
+    evicted = pool._sessions["a"]
+
+    def fail():
+        raise OSError("no more processes")
+
+    monkeypatch.setattr(pool, "_start_worker", fail)
+    with pytest.raises(OSError):
+        pool.run("b", "x = 2")
+    evicted.process.join(5)
+    assert not evicted.alive()
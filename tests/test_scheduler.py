@@ -0,0 +1,56 @@
+import asyncio
+
+from src.workflow.scheduler import build_step_dag, load_plan_steps, run_dag
+
+
+def _step(agent_name, depends_on=None):
+    step = {"agent_name": agent_name, "title": agent_name, "description": "", "note": ""}
+    if depends_on is not None:
+        step["depends_on"] = depends_on
+    return step
+
+
+def test_plan_without_dependencies_is_sequential():
+    steps = [_step("researcher"), _step("coder"), _step("reporter")]
+    assert build_step_dag(steps, ["researcher", "coder", "reporter"]) is None
+
+
+def test_dependencies_skip_agent_factory_steps():
+    steps = [
+        _step("agent_factory", []),
+        _step("stock_analyst", [0]),
+        _step("researcher", []),
+        _step("reporter", [1, 2]),
+    ]
+    assert build_step_dag(steps, ["stock_analyst", "researcher", "reporter"]) == [[], [], [0, 1]]
+
+
+def test_forward_references_are_ignored():
+    steps = [_step("researcher", [1]), _step("coder", [])]
+    assert build_step_dag(steps, ["researcher", "coder"]) == [[], []]
+
+
+def test_unmatched_queue_falls_back_to_sequential():
+    steps = [_step("researcher", []), _step("reporter", [0])]
+    assert build_step_dag(steps, ["coder", "reporter"]) is None
+
+
+def test_load_plan_steps_accepts_edited_steps():
+    assert load_plan_steps('{"steps": [{"agent_name": "coder"}]}') == [{"agent_name": "coder"}]
+    assert load_plan_steps("not json") == []
+
+
+def test_run_dag_limits_concurrency_and_keeps_order():
+    running = []
+    peak = []
+
+    async def run(index, deps):
+        running.append(index)
+        peak.append(len(running))
+        await asyncio.sleep(0.01 * (3 - index))
+        running.remove(index)
+        return index
+
+    results = asyncio.run(run_dag([[], [], [], [0, 1, 2]], run, max_concurrency=2))
+    assert results == [0, 1, 2, 3]
+    assert max(peak) == 2
@@ -0,0 +1,42 @@
+import asyncio
+
+from src.tools.search_cache import SearchCache
+
+
+def test_identical_queries_share_one_search():
+    cache = SearchCache(ttl=60, max_entries=16)
+    calls = []
+
+    async def search():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return ["result"], {}
+
+    async def main():
+        keys = [cache.key(query, 5, "2025-01-01 10") for query in ["Hello  World", "hello world", "HELLO world"]]
+        results = await asyncio.gather(*(cache.arun(key, search, lambda r: True) for key in keys))
+        results.append(await cache.arun(keys[0], search, lambda r: True))
+        return results
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(result == (["result"], {}) for result in results)
+    assert cache.stats()["coalesced"] == 2
+    assert cache.stats()["hits"] == 1
+
+
+def test_errors_and_other_hours_are_not_served():
+    cache = SearchCache(ttl=60, max_entries=16)
+    calls = []
+
+    def search():
+        calls.append(1)
+        return "RuntimeError('boom')", {}
+
+    cache.run(cache.key("q", 5, "2025-01-01 10"), search, lambda r: not isinstance(r[0], str))
+    cache.run(cache.key("q", 5, "2025-01-01 10"), search, lambda r: not isinstance(r[0], str))
+    assert len(calls) == 2
+
+    cache.run(cache.key("q", 5, "2025-01-01 10"), lambda: (["a"], {}), lambda r: True)
+    assert cache.run(cache.key("q", 5, "2025-01-01 11"), lambda: (["b"], {}), lambda r: True) == (["b"], {})
+    assert cache.run(cache.key("q", 3, "2025-01-01 10"), lambda: (["c"], {}), lambda r: True) == (["c"], {})
@@ -0,0 +1,110 @@
+import asyncio
+
+from langchain_core.messages import AIMessageChunk
+
+from src.utils.content_process import ResponseTagStream, clean_response_tags
+from src.workflow.streaming import astream_agent, astream_content, token_sink
+
+
+class ChunkedModel:
+    """Streams a fixed answer in the given pieces."""
+
+    def __init__(self, *pieces):
+        self.pieces = pieces
+
+    async def astream(self, messages):
+        for piece in self.pieces:
+            yield AIMessageChunk(content=piece)
+
+
+class EventAgent:
+    """Replays astream_events of a compiled agent."""
+
+    def __init__(self, events):
+        self.events = events
+
+    async def astream_events(self, state, config=None, version=None):
+        for event in self.events:
+            yield event
+
+
+def stream(text: str, size: int) -> str:
+    cleaner = ResponseTagStream()
+    shown = [cleaner.feed(text[i:i + size]) for i in range(0, len(text), size)]
+    return "".join(shown) + cleaner.finish()
+
+
+def collect(coro):
+    tokens = []
+    with token_sink(lambda agent_name, content: tokens.append(content)):
+        result = asyncio.run(coro)
+    return result, tokens
+
+
+def test_tag_stream_matches_clean_response_tags_for_any_chunking():
+    for text in [
+        '```json\n{"next": "coder"}\n```',
+        "<think>hidden plan</think>The answer is 42.",
+        "before <think>a</think> middle <think>b</think> after",
+        "```ts\ninterface Plan {}\n```",
+        "no tags at all ``",
+    ]:
+        for size in range(1, len(text) + 1):
+            assert stream(text, size) == clean_response_tags(text), (text, size)
+
+
+def test_unclosed_think_blocks_are_kept_like_clean_response_tags():
+    for text in [
+        "answer <think>never closed",
+        "<think>a</think>shown <think>open ```",
+        "```json\n{}<think>x",
+    ]:
+        for size in range(1, len(text) + 1):
+            assert stream(text, size) == clean_response_tags(text), (text, size)
+    assert stream("answer <think>never closed", 4) == "answer <think>never closed"
+
+
+def test_tag_stream_holds_back_partial_tags():
+    cleaner = ResponseTagStream()
+    assert cleaner.feed("```") == ""
+    assert cleaner.feed("json\n{") == "\n{"
+    assert cleaner.feed("} <thi") == "} "
+    assert cleaner.feed("nk>x</think>``") == ""
+    assert cleaner.finish() == "``"
+
+
+def test_handover_answers_are_never_shown():
+    content, tokens = collect(astream_content(ChunkedModel("hand", "over", "_to_planner"), [], "coordinator", "handover"))
+    assert content == "handover_to_planner"
+    assert tokens == []
+
+
+def test_answers_diverging_from_the_hold_prefix_are_shown_in_full():
+    content, tokens = collect(astream_content(ChunkedModel("han", "dy tip"), [], "coordinator", "handover"))
+    assert "".join(tokens) == content == "handy tip"
+
+    # a short answer that never got past the prefix
+    _, tokens = collect(astream_content(ChunkedModel("hand"), [], "coordinator", "handover"))
+    assert "".join(tokens) == "hand"
+
+
+def test_agent_turns_calling_tools_are_not_streamed():
+    def chunk(run_id, content, tool_call_chunks=None):
+        message = AIMessageChunk(content=content, tool_call_chunks=tool_call_chunks or [])
+        return {"event": "on_chat_model_stream", "run_id": run_id, "data": {"chunk": message}}
+
+    tool_call = [{"name": "bash_tool", "args": '{"cmd": "ls"}', "id": "call_1", "index": 0}]
+    output = {"messages": ["done"]}
+    agent = EventAgent([
+        chunk("turn1", "Let me look "),
+        chunk("turn1", "", tool_call),
+        chunk("turn1", "up."),
+        {"event": "on_chat_model_end", "run_id": "turn1", "data": {}},
+        chunk("turn2", "The files "),
+        chunk("turn2", "are listed."),
+        {"event": "on_chat_model_end", "run_id": "turn2", "data": {}},
+        {"event": "on_chain_end", "run_id": "agent", "parent_ids": [], "data": {"output": output}},
+    ])
+    response, tokens = collect(astream_agent(agent, {}, {}, "coder"))
+    assert response is output
+    assert "".join(tokens) == "Let me look The files are listed."
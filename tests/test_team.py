@@ -0,0 +1,80 @@
+import pytest
+
+from src.manager.team import TeamDescriptors
+
+
+@pytest.fixture
+def make_team(make_agent):
+    def make(max_agents: int = 0) -> TeamDescriptors:
+        team = TeamDescriptors(max_agents=max_agents, top_agents=0, top_tools=0)
+        team.rebuild([
+            make_agent("researcher", "share"),
+            make_agent("a1", "alice"),
+            make_agent("b1", "bob"),
+        ])
+        return team
+
+    return make
+
+
+def test_create_edit_and_remove_update_only_the_owners_team(make_team, make_agent):
+    team = make_team()
+    assert team.team("alice")[0] == ["agent_factory", "researcher", "a1"]
+    assert team.team("bob")[0] == ["agent_factory", "researcher", "b1"]
+    builds = team.builds
+
+    team.update("a2", make_agent("a2", "alice"))
+    members, description = team.team("alice")
+    assert members == ["agent_factory", "researcher", "a1", "a2"]
+    assert "a2 agent" in description
+    team.update("a1", make_agent("a1", "alice", "edited description"))
+    members, description = team.team("alice")
+    assert "edited description" in description and "a1 agent" not in description
+    team.update("a2", None)
+    assert team.team("alice")[0] == ["agent_factory", "researcher", "a1"]
+
+    # bob's team was never rebuilt
+    assert team.team("bob")[0] == ["agent_factory", "researcher", "b1"]
+    assert team.builds == builds + 3
+
+
+def test_moving_an_agent_to_another_user_updates_both_teams(make_team, make_agent):
+    team = make_team()
+    team.team("alice"), team.team("bob")
+    team.update("a1", make_agent("a1", "bob"))
+    assert team.team("alice")[0] == ["agent_factory", "researcher"]
+    assert team.team("bob")[0] == ["agent_factory", "researcher", "b1", "a1"]
+
+
+def test_share_agent_changes_invalidate_every_team(make_team, make_agent):
+    team = make_team()
+    team.team("alice"), team.team("bob")
+    assert team.stats()["cached_teams"] == 2
+
+    team.update("reporter", make_agent("reporter", "share"))
+    assert team.stats()["cached_teams"] == 0
+    assert team.team("alice")[0] == ["agent_factory", "researcher", "reporter", "a1"]
+    assert team.team("bob")[0] == ["agent_factory", "researcher", "reporter", "b1"]
+
+    team.update("researcher", None)
+    assert team.team("alice")[0] == ["agent_factory", "reporter", "a1"]
+    assert team.team("bob")[0] == ["agent_factory", "reporter", "b1"]
+
+
+def test_max_agents_keeps_the_most_recently_changed_own_agents(make_team, make_agent):
+    team = make_team(max_agents=2)
+    for name in ["a2", "a3"]:
+        team.update(name, make_agent(name, "alice"))
+    # share agents do not count against the cap
+    assert team.team("alice")[0] == ["agent_factory", "researcher", "a2", "a3"]
+
+    # editing an agent makes it the most recent
+    team.update("a1", make_agent("a1", "alice", "edited"))
+    members, description = team.team("alice")
+    assert members == ["agent_factory", "researcher", "a3", "a1"]
+    assert "a2 agent" not in description
+
+    # an agent picked for the workflow is listed even past the cap
+    members, description = team.team("alice", coor_agents=["a2", "b1", "unknown"])
+    assert members == ["agent_factory", "researcher", "a3", "a1", "a2", "b1"]
+    assert "a2 agent" in description and "b1 agent" in description
@@ -0,0 +1,61 @@
+import time
+import asyncio
+import threading
+
+import pytest
+
+from src.tools.executor import ToolExecutor, ToolExecutorSaturatedError, ToolTimeoutError
+
+
+def test_calls_past_the_queue_limit_fail_fast():
+    executor = ToolExecutor("slow", max_workers=1, max_queue=1, timeout=0)
+    release = threading.Event()
+
+    async def main():
+        calls = [asyncio.create_task(executor.run(release.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(ToolExecutorSaturatedError):
+            await executor.run(release.wait, 5)
+        stats = executor.stats()
+        assert stats["running"] == 1 and stats["queued"] == 1 and stats["saturation"] == 1
+        release.set()
+        return await asyncio.gather(*calls)
+
+    assert asyncio.run(main()) == [True, True]
+    stats = executor.stats()
+    assert stats["rejected"] == 1 and stats["completed"] == 2
+    assert stats["running"] == 0 and stats["queued"] == 0
+
+
+def test_calls_past_the_timeout_raise_and_free_their_slot():
+    executor = ToolExecutor("slow", max_workers=1, max_queue=0, timeout=0.05)
+
+    async def main():
+        with pytest.raises(ToolTimeoutError):
+            await executor.run(time.sleep, 0.2)
+        # the worker is busy until the blocking call returns
+        await asyncio.sleep(0.3)
+        return await executor.run(sum, [1, 2])
+
+    assert asyncio.run(main()) == 3
+    stats = executor.stats()
+    assert stats["timeouts"] == 1 and stats["completed"] == 1 and stats["running"] == 0
+
+
+def test_stats_count_failures_and_completions_of_concurrent_calls():
+    executor = ToolExecutor("flaky", max_workers=4, max_queue=100, timeout=0)
+
+    def call(i):
+        time.sleep(0.001)
+        if i % 3 == 0:
+            raise ValueError(i)
+        return i
+
+    async def main():
+        return await asyncio.gather(*(executor.run(call, i) for i in range(60)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert sum(isinstance(result, ValueError) for result in results) == 20
+    stats = executor.stats()
+    assert stats["failures"] == 20 and stats["completed"] == 40
+    assert stats["queued"] == 0 and stats["max_wait"] > 0
@@ -0,0 +1,205 @@
+import json
+
+import pytest
+
+from src.storage import FileStorage, SQLiteStorage
+from src.storage.file import MANIFEST_LOG_SLACK
+from src.workflow.cache import WorkflowCache, MANIFEST_FILE
+
+
+def _write_workflow(user_dir, polish_id, lap=1):
+    workflow = {
+        "workflow_id": f"{user_dir.name}:{polish_id}",
+        "mode": "launch",
+        "lap": lap,
+        "version": 1,
+        "user_input_messages": [],
+        "deep_thinking_mode": False,
+        "search_before_planning": False,
+        "planning_steps": [],
+        "nodes": {},
+        "graph": [],
+    }
+    (user_dir / f"{polish_id}.json").write_text(json.dumps(workflow), encoding="utf-8")
+    return workflow
+
+
+@pytest.fixture
+def cache(tmp_path):
+    WorkflowCache._instance = None
+    yield WorkflowCache(workflow_dir=tmp_path)
+    WorkflowCache._instance = None
+
+
+def test_manifest_is_built_and_persisted(cache, tmp_path):
+    user_dir = tmp_path / "alice"
+    user_dir.mkdir()
+    _write_workflow(user_dir, "p1", lap=1)
+    _write_workflow(user_dir, "p2", lap=2)
+
+    metas = cache.list_workflow_metas("alice")
+    assert sorted(meta["workflow_id"] for meta in metas) == ["alice:p1", "alice:p2"]
+    assert (user_dir / MANIFEST_FILE).exists()
+
+
+def test_workflow_bodies_are_loaded_lazily(cache, tmp_path):
+    user_dir = tmp_path / "alice"
+    user_dir.mkdir()
+    _write_workflow(user_dir, "p1", lap=3)
+    cache.list_workflow_metas("alice")
+    cache.cache.clear()
+
+    # a fresh manifest read must not parse the workflow bodies
+    cache.storage._manifest.clear()
+    cache.list_workflow_metas("alice")
+    assert "alice:p1" not in cache.cache
+
+    assert cache.get_lap("alice:p1") == 3
+    assert "alice:p1" in cache.cache
+
+
+def test_manifest_picks_up_new_files(cache, tmp_path):
+    user_dir = tmp_path / "alice"
+    user_dir.mkdir()
+    _write_workflow(user_dir, "p1")
+    assert len(cache.list_workflow_metas("alice")) == 1
+
+    _write_workflow(user_dir, "p2")
+    assert len(cache.list_workflow_metas("alice")) == 2
+    assert [w["workflow_id"] for w in cache.list_workflows("alice", "p2")] == ["alice:p2"]
+
+
+def _launch(cache, workflow_id, lap=1):
+    cache.init_cache(
+        user_id=workflow_id.split(":")[0],
+        lap=lap,
+        mode="launch",
+        workflow_id=workflow_id,
+        version=1,
+        user_input_messages=[],
+        deep_thinking_mode=False,
+        search_before_planning=False,
+        coor_agents=[],
+    )
+
+
+def test_evicted_dirty_workflows_are_flushed_and_reloaded(tmp_path):
+    WorkflowCache._instance = None
+    cache = WorkflowCache(workflow_dir=tmp_path, max_entries=2, max_bytes=0)
+    try:
+        _launch(cache, "alice:p0", lap=0)
+        cache.dump("alice:p0", "launch")
+        for i in range(1, 3):
+            _launch(cache, f"alice:p{i}", lap=i)
+        assert len(cache.cache) == 2
+        cache.flush()
+        assert (tmp_path / "alice" / "p0.json").exists()
+
+        assert cache.get_lap("alice:p0") == 0
+        stats = cache.stats()
+        assert stats["evictions"] == 2
+        assert stats["misses"] == 1
+    finally:
+        WorkflowCache._instance = None
+
+
+def test_unfinished_launches_are_never_persisted(tmp_path):
+    WorkflowCache._instance = None
+    cache = WorkflowCache(workflow_dir=tmp_path, max_entries=1, max_bytes=0)
+    try:
+        _launch(cache, "alice:running", lap=4)
+        _launch(cache, "alice:failed")
+        # evicting a running launch keeps it in memory without writing it
+        _launch(cache, "alice:other")
+        cache.flush()
+        assert not (tmp_path / "alice" / "running.json").exists()
+        assert cache.get_lap("alice:running") == 4
+
+        cache.release("alice:failed")
+        cache.flush()
+        assert not (tmp_path / "alice" / "failed.json").exists()
+        assert cache.stats()["dirty"] == 0
+        assert cache.list_workflow_metas("alice") == []
+        assert cache.get_latest_polish_id("alice") is None
+    finally:
+        WorkflowCache._instance = None
+
+
+def test_saves_are_coalesced_and_written_atomically(cache, tmp_path):
+    cache.init_cache(
+        user_id="alice",
+        lap=1,
+        mode="launch",
+        workflow_id="alice:p1",
+        version=1,
+        user_input_messages=[],
+        deep_thinking_mode=False,
+        search_before_planning=False,
+        coor_agents=[],
+    )
+    cache.dump("alice:p1", "launch")
+    for i in range(5):
+        cache.save_planning_steps("alice:p1", {"steps": [i]})
+    cache.flush()
+
+    workflow_file = tmp_path / "alice" / "p1.json"
+    saved = json.loads(workflow_file.read_text(encoding="utf-8"))
+    assert json.loads(saved["planning_steps"]) == {"steps": [4]}
+    assert cache.stats()["pending_writes"] == 0
+    assert not list((tmp_path / "alice").glob("*.tmp"))
+
+
+def test_saves_append_to_the_manifest_log_until_it_is_compacted(tmp_path):
+    storage = FileStorage(workflow_dir=tmp_path)
+    manifest_path = tmp_path / "alice" / MANIFEST_FILE
+    header = {"workflow_id": "alice:p0", "lap": 1}
+    storage.save_workflow("alice", "p0", json.dumps(header), header)
+    assert len(manifest_path.read_text(encoding="utf-8").splitlines()) == 1
+
+    for i in range(1, MANIFEST_LOG_SLACK):
+        storage.save_workflow("alice", "p0", json.dumps({**header, "lap": i}), {**header, "lap": i})
+    assert len(manifest_path.read_text(encoding="utf-8").splitlines()) == MANIFEST_LOG_SLACK
+
+    # the next save rewrites the log as a single line
+    storage.save_workflow("alice", "p1", "{}", {"workflow_id": "alice:p1", "lap": 0})
+    assert len(manifest_path.read_text(encoding="utf-8").splitlines()) == 1
+
+    # a torn last line is skipped, the later lines win
+    with open(manifest_path, "a", encoding="utf-8") as f:
+        f.write('{"p1": {"lap"')
+    reloaded = FileStorage(workflow_dir=tmp_path)
+    metas = {meta["workflow_id"]: meta for meta in reloaded.list_workflow_metas("alice")}
+    assert metas["alice:p0"]["lap"] == MANIFEST_LOG_SLACK - 1
+    assert metas["alice:p1"]["lap"] == 0
+
+
+def test_sqlite_storage_round_trip(tmp_path):
+    WorkflowCache._instance = None
+    storage = SQLiteStorage(tmp_path / "cooragent.db")
+    cache = WorkflowCache(storage=storage)
+    try:
+        cache.init_cache(
+            user_id="alice",
+            lap=2,
+            mode="launch",
+            workflow_id="alice:p1",
+            version=1,
+            user_input_messages=[],
+            deep_thinking_mode=False,
+            search_before_planning=False,
+            coor_agents=[],
+        )
+        cache.dump("alice:p1", "launch")
+        cache.flush()
+        cache.cache.clear()
+
+        assert [meta["workflow_id"] for meta in cache.list_workflow_metas("alice", "p")] == ["alice:p1"]
+        assert storage.latest_polish_id("alice") == "p1"
+        assert cache.get_lap("alice:p1") == 2
+
+        assert storage.save_agent("coder", "share", "{}", "prompt")
+        assert not storage.save_agent("coder", "share", "{}", "changed")
+        assert storage.list_agent_names(user_id="share") == ["coder"]
+    finally:
+        storage.close()
+        WorkflowCache._instance = None